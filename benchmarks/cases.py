@@ -0,0 +1,162 @@
+"""Benchmark cases: synthetic inputs of size n for skuld's in-process hot paths.
+
+Each case is `setup(n, tmp) -> ctx` (not timed) and `run(ctx)` (timed). `run` must
+leave `ctx` reusable so it can be repeated; cases that grow state do so by one
+item per call, which is noise next to n.
+"""
+import datetime as dt
+import json
+import os
+import random
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from skuld import cli, jira, state
+from skuld.git import Commit, group_commits_by_issue
+
+ISSUE_RX = r"[A-Z][A-Z0-9]+-\d+"
+PROJECTS = ("SOT", "WEB", "API", "OPS", "DATA")
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[int, Path], Any]
+    run: Callable[[Any], Any]
+    doc: str
+
+
+def _key(rnd: random.Random) -> str:
+    return f"{rnd.choice(PROJECTS)}-{rnd.randint(1, 5000)}"
+
+
+def _iso(base: dt.datetime, i: int) -> str:
+    return (base + dt.timedelta(seconds=37 * i)).isoformat()
+
+
+# git.group_commits_by_issue
+def _commits_setup(n: int, tmp: Path) -> List[Commit]:
+    rnd = random.Random(n)
+    base = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    subjects = []
+    for i in range(n):
+        r = rnd.random()
+        if r < 0.2:
+            subjects.append(f"chore: bump dependencies ({i})")
+        elif r < 0.3:
+            subjects.append(f"{_key(rnd)} {_key(rnd)}: shared fix {i}")
+        else:
+            subjects.append(f"{_key(rnd)}: change number {i}")
+    return [Commit(f"{i:040x}", _iso(base, i), s) for i, s in enumerate(subjects)]
+
+
+def _commits_run(commits: List[Commit]) -> Any:
+    return group_commits_by_issue(commits, ISSUE_RX)
+
+
+# cli._allocate_branches (branch seconds -> issue keys in _build_preview)
+def _branches_setup(n: int, tmp: Path) -> Dict[str, Any]:
+    rnd = random.Random(n)
+    seconds: Dict[str, float] = {}
+    bmap: Dict[str, str] = {}
+    for i in range(n):
+        r = rnd.random()
+        if r < 0.6:
+            name = f"feature/{_key(rnd)}-work-{i}"
+        elif r < 0.8:
+            name = f"topic-{i}"
+            bmap[name] = _key(rnd)
+        else:
+            name = f"scratch-{i}"
+        seconds[name] = rnd.uniform(60, 7200)
+    return {"seconds": seconds, "bmap": bmap}
+
+
+def _branches_run(ctx: Dict[str, Any]) -> Any:
+    return cli._allocate_branches(ctx["seconds"], ISSUE_RX, ctx["bmap"])
+
+
+# state.seen / state.record with n recorded entries
+def _state_setup(n: int, tmp: Path) -> Dict[str, Any]:
+    path = tmp / f"state-{n}.json"
+    base = dt.datetime(2025, 1, 1)
+    entries = []
+    for i in range(n):
+        since, until = _iso(base, 2 * i), _iso(base, 2 * i + 1)
+        entries.append({"id": state._entry_id(f"SOT-{i % 997}", since, until, 600), "issue": f"SOT-{i % 997}",
+                        "since": since, "until": until, "seconds": 600, "worklog_id": str(10000 + i),
+                        "started": since})
+    path.write_text(json.dumps({"entries": entries, "last_sync": {}}, indent=2, sort_keys=True), encoding="utf-8")
+    return {"path": str(path), "calls": 0}
+
+
+def _seen_run(ctx: Dict[str, Any]) -> Any:
+    # A window that was never uploaded: the worst case, a full scan
+    return state.seen(ctx["path"], "SOT-1", "2030-01-01T00:00:00", "2030-01-02T00:00:00", 60)
+
+
+def _record_run(ctx: Dict[str, Any]) -> Any:
+    ctx["calls"] += 1
+    state.record(ctx["path"], "SOT-1", "2030-01-01T00:00:00", "2030-01-02T00:00:00", ctx["calls"],
+                 worklog_id=str(ctx["calls"]), started="2030-01-01T09:00:00")
+
+
+# jira worklog timestamps
+def _worklogs_setup(n: int, tmp: Path) -> List[list]:
+    rnd = random.Random(n)
+    base = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    rows = []
+    for i in range(n):
+        started = (base + dt.timedelta(minutes=rnd.randint(0, 60 * 24 * 60))).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        rows.append([started, rnd.randint(60, 7200), rnd.choice(("me", "me", "someone"))])
+    return rows
+
+
+def _parse_run(rows: List[list]) -> Any:
+    parse = jira._parse_jira_datetime
+    return [parse(r[0]) for r in rows]
+
+
+def _worklog_sum_run(rows: List[list]) -> Any:
+    return jira.sum_my_worklog_seconds(rows, "me", "2025-01-15T00:00:00", "2025-02-15T00:00:00")
+
+
+# cli.load_config with n mapped projects
+def _config_setup(n: int, tmp: Path) -> Dict[str, Any]:
+    lines = ["jira:", "  site: https://example.atlassian.net", "  email: dev@example.com", "  apiToken: x",
+             "wakatime:", "  apiKey: waka_x", "projects:"]
+    for i in range(n):
+        lines += [f"  /home/dev/code/repo-{i}:", f"    wakatimeProject: repo-{i}", "    branchIssues:",
+                  f"      topic-{i}: SOT-{i}"]
+    path = tmp / f"skuld-{n}.yaml"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return {"path": path}
+
+
+def _config_cold_run(ctx: Dict[str, Any]) -> Any:
+    path: Path = ctx["path"]
+    # New mtime, so the compiled copy is stale and the YAML is parsed again
+    ctx["mtime_ns"] = ctx.get("mtime_ns", path.stat().st_mtime_ns) + 1000
+    os.utime(path, ns=(ctx["mtime_ns"], ctx["mtime_ns"]))
+    return cli.load_config(path)
+
+
+def _config_warm_setup(n: int, tmp: Path) -> Dict[str, Any]:
+    ctx = _config_setup(n, tmp)
+    cli.load_config(ctx["path"])  # writes the compiled copy
+    return ctx
+
+
+def _config_warm_run(ctx: Dict[str, Any]) -> Any:
+    return cli.load_config(ctx["path"])
+
+
+CASES: List[Case] = [
+    Case("group_commits_by_issue", _commits_setup, _commits_run, "n commits, 0-2 keys per subject"),
+    Case("allocate_branches", _branches_setup, _branches_run, "n WakaTime branches, keyed/mapped/unmapped"),
+    Case("state_seen", _state_setup, _seen_run, "miss against n recorded entries"),
+    Case("state_record", _state_setup, _record_run, "append to n recorded entries"),
+    Case("parse_jira_datetime", _worklogs_setup, _parse_run, "n worklog timestamps"),
+    Case("sum_my_worklog_seconds", _worklogs_setup, _worklog_sum_run, "n worklog rows, one-month window"),
+    Case("load_config_cold", _config_setup, _config_cold_run, "n projects, parse + index"),
+    Case("load_config_warm", _config_warm_setup, _config_warm_run, "n projects, compiled copy"),
+]
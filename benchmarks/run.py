@@ -0,0 +1,253 @@
+"""Scaling benchmarks for skuld's in-process hot paths.
+
+    python benchmarks/run.py                          # 10, 1k, 100k; saves results/<stamp>.json
+    python benchmarks/run.py --scales 10,1000 -k state
+    python benchmarks/run.py --out benchmarks/results/baseline.json   # at a release
+    python benchmarks/run.py --compare benchmarks/results/baseline.json
+
+Every case is timed at each scale (best of the runs that fit in --min-time, at
+least one, without tracing) and then
+run once under tracemalloc for its peak allocation. The log-log slope between the
+two largest scales is reported as the scaling exponent: ~1 for O(n), ~2 for O(n²).
+`--compare` exits 1 when a case got slower or hungrier than the threshold, or its
+exponent grew, so it can gate a release. Scales whose time extrapolated from the
+previous one would exceed `--budget` are skipped and marked as such.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.cases import CASES, Case  # noqa: E402
+
+try:  # optional: PNG charts
+    import matplotlib  # type: ignore
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # type: ignore
+except ImportError:  # pragma: no cover
+    plt = None  # type: ignore
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SCALES = (10, 1_000, 100_000)
+# Below these, differences are timer and allocator noise
+NOISE_SECONDS = 0.001
+NOISE_BYTES = 256 * 1024
+
+
+def _git_sha() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _measure(case: Case, n: int, tmp: Path, min_time: float, max_repeat: int) -> Dict[str, Any]:
+    ctx = case.setup(n, tmp)
+    times: List[float] = []
+    spent = 0.0
+    while len(times) < max_repeat and spent < min_time:
+        t0 = time.perf_counter()
+        case.run(ctx)
+        dt_s = time.perf_counter() - t0
+        times.append(dt_s)
+        spent += dt_s
+    tracemalloc.start()
+    try:
+        case.run(ctx)
+        _cur, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_s": min(times), "median_s": sorted(times)[len(times) // 2], "repeats": len(times),
+            "peak_bytes": peak}
+
+
+def _exponent(points: Dict[str, Dict[str, Any]], field: str) -> Optional[float]:
+    """Log-log slope between the two largest measured scales."""
+    measured = sorted((int(n), r[field]) for n, r in points.items() if not r.get("skipped") and r.get(field))
+    if len(measured) < 2:
+        return None
+    (n1, v1), (n2, v2) = measured[-2], measured[-1]
+    if n2 <= n1 or v1 <= 0 or v2 <= 0:
+        return None
+    return round(math.log(v2 / v1) / math.log(n2 / n1), 2)
+
+
+def run(cases: List[Case], scales: List[int], min_time: float, max_repeat: int, budget: float) -> Dict[str, Any]:
+    home = tempfile.mkdtemp(prefix="skuld-bench-")
+    os.environ["HOME"] = home  # config/state caches resolve ~ at call time
+    results: Dict[str, Any] = {}
+    for case in cases:
+        points: Dict[str, Dict[str, Any]] = {}
+        prev: Optional[tuple] = None
+        for n in scales:
+            if prev is not None:
+                pn, pt = prev
+                guess = pt * (n / pn)  # at least linear
+                if guess > budget:
+                    points[str(n)] = {"skipped": f"estimated {guess:.0f}s per run exceeds --budget"}
+                    print(f"  {case.name:<24} n={n:<8} skipped (estimated {guess:.0f}s per run)", file=sys.stderr)
+                    continue
+            tmp = Path(tempfile.mkdtemp(prefix=f"{case.name}-{n}-", dir=home))
+            r = _measure(case, n, tmp, min_time, max_repeat)
+            points[str(n)] = r
+            prev = (n, r["time_s"])
+            print(f"  {case.name:<24} n={n:<8} {r['time_s'] * 1000:>10.3f} ms  peak {r['peak_bytes'] / 1024:>10.0f} KiB"
+                  f"  ({r['repeats']} runs)", file=sys.stderr)
+        results[case.name] = {"doc": case.doc, "points": points,
+                              "exponent": {"time": _exponent(points, "time_s"),
+                                           "memory": _exponent(points, "peak_bytes")}}
+    return {
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git": _git_sha(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scales": scales,
+        "results": results,
+    }
+
+
+def compare(new: Dict[str, Any], old: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of `new` against `old`: slower/hungrier than threshold×, or a steeper curve."""
+    problems = []
+    for name, res in new["results"].items():
+        base = (old.get("results") or {}).get(name)
+        if not base:
+            continue
+        for n, r in res["points"].items():
+            b = (base.get("points") or {}).get(n) or {}
+            if r.get("skipped") or b.get("skipped") or not b:
+                continue
+            if r["time_s"] > NOISE_SECONDS and r["time_s"] > b["time_s"] * threshold:
+                problems.append(f"{name} n={n}: time {b['time_s'] * 1000:.2f} -> {r['time_s'] * 1000:.2f} ms"
+                                f" ({r['time_s'] / b['time_s']:.1f}x)")
+            if r["peak_bytes"] > NOISE_BYTES and r["peak_bytes"] > b["peak_bytes"] * threshold:
+                problems.append(f"{name} n={n}: peak {b['peak_bytes'] // 1024} -> {r['peak_bytes'] // 1024} KiB"
+                                f" ({r['peak_bytes'] / max(b['peak_bytes'], 1):.1f}x)")
+        for field in ("time", "memory"):
+            e_new, e_old = res["exponent"].get(field), (base.get("exponent") or {}).get(field)
+            if e_new is not None and e_old is not None and e_new > e_old + 0.5:
+                problems.append(f"{name}: {field} exponent {e_old} -> {e_new}")
+    return problems
+
+
+def _bar(value: float, lo: float, hi: float, width: int = 40) -> str:
+    if value <= 0 or hi <= lo:
+        return ""
+    frac = (math.log10(value) - lo) / (hi - lo)
+    return "#" * max(1, int(round(frac * width)))
+
+
+def ascii_chart(report: Dict[str, Any]) -> str:
+    """Per-case log-scale bars for time and peak memory at each scale."""
+    lines = []
+    for field, unit, scale in (("time_s", "ms", 1000.0), ("peak_bytes", "KiB", 1 / 1024)):
+        vals = [r[field] * scale for res in report["results"].values() for r in res["points"].values()
+                if not r.get("skipped") and r[field] > 0]
+        if not vals:
+            continue
+        lo, hi = math.log10(min(vals)) - 0.5, math.log10(max(vals))
+        lines.append(f"{'time' if field == 'time_s' else 'peak memory'} ({unit}, log scale)")
+        for name, res in report["results"].items():
+            exp = res["exponent"]["time" if field == "time_s" else "memory"]
+            lines.append(f"  {name}  (exponent {exp if exp is not None else '-'})")
+            for n, r in res["points"].items():
+                if r.get("skipped"):
+                    lines.append(f"    {int(n):>8}  skipped")
+                    continue
+                v = r[field] * scale
+                lines.append(f"    {int(n):>8}  {v:>12.3f}  {_bar(v, lo, hi)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def png_chart(report: Dict[str, Any], path: Path) -> bool:
+    if plt is None:
+        return False
+    fig, (ax_t, ax_m) = plt.subplots(1, 2, figsize=(12, 5))
+    for name, res in report["results"].items():
+        pts = sorted((int(n), r) for n, r in res["points"].items() if not r.get("skipped"))
+        if not pts:
+            continue
+        ns = [n for n, _ in pts]
+        ax_t.plot(ns, [r["time_s"] for _, r in pts], marker="o", label=name)
+        ax_m.plot(ns, [max(r["peak_bytes"], 1) for _, r in pts], marker="o", label=name)
+    for ax, label in ((ax_t, "seconds"), (ax_m, "peak bytes")):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("n")
+        ax.set_ylabel(label)
+        ax.grid(True, which="both", alpha=0.3)
+    ax_t.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return True
+
+
+def main(argv: Any = None) -> int:
+    p = argparse.ArgumentParser(description="Scaling benchmarks for skuld hot paths")
+    p.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES), help="Comma-separated input sizes")
+    p.add_argument("-k", dest="only", action="append", help="Only cases whose name contains this (repeatable)")
+    p.add_argument("--min-time", type=float, default=0.2, help="Keep repeating a measurement until this many seconds")
+    p.add_argument("--max-repeat", type=int, default=50, help="Upper bound on repeats per measurement")
+    p.add_argument("--budget", type=float, default=60.0, help="Skip scales estimated to take longer per run (seconds)")
+    p.add_argument("--out", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    p.add_argument("--no-save", action="store_true", help="Do not write a results file")
+    p.add_argument("--compare", metavar="FILE", help="Fail on regressions against an earlier results file")
+    p.add_argument("--threshold", type=float, default=1.5, help="Regression ratio for --compare (default 1.5)")
+    p.add_argument("--plot", metavar="PNG", help="Also write a log-log chart (requires matplotlib)")
+    p.add_argument("--list", action="store_true", help="List cases and exit")
+    args = p.parse_args(argv)
+
+    cases = [c for c in CASES if not args.only or any(k in c.name for k in args.only)]
+    if args.list:
+        for c in cases:
+            print(f"{c.name:<24} {c.doc}")
+        return 0
+    scales = sorted({int(s) for s in args.scales.split(",") if s.strip()})
+    report = run(cases, scales, args.min_time, args.max_repeat, args.budget)
+    print(ascii_chart(report))
+
+    if not args.no_save:
+        out = Path(args.out) if args.out else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved {out}", file=sys.stderr)
+    if args.plot:
+        if png_chart(report, Path(args.plot)):
+            print(f"Wrote {args.plot}", file=sys.stderr)
+        else:
+            print("matplotlib is not installed; skipped --plot", file=sys.stderr)
+
+    if args.compare:
+        try:
+            old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"Cannot read {args.compare}: {e}", file=sys.stderr)
+            return 2
+        problems = compare(report, old, args.threshold)
+        if problems:
+            print(f"Regressions against {args.compare}:")
+            for line in problems:
+                print(f"  - {line}")
+            return 1
+        print(f"No regressions against {args.compare} (threshold {args.threshold}x).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 __all__ = [
+    "Client",
     "main",
     "__version__",
 ]
@@ -6,6 +7,15 @@ __all__ = [
 # NOTE: This version is kept in sync with package.json by release.sh
 __version__ = "0.1.19"
 
+
+def __getattr__(name):
+    # Lazy, like `main`: `python -m skuld.cli` must not import the CLI module before running it
+    if name == "Client":
+        from .client import Client
+        return Client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def main():
     from .cli import main as cli_main
     cli_main()
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+
+def cache_dir(state_path: str) -> Path:
+    """Directory for derived, disposable data (lives next to the state file)."""
+    return Path(os.path.expanduser(state_path)).resolve().parent / "cache"
+
+
+def fingerprint(obj: Any) -> str:
+    """Stable short hash of a JSON-serializable value."""
+    raw = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def slot(text: str) -> str:
+    """Filename-safe key for a project path or site."""
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()[:16]
+
+
+def load(state_path: str, name: str) -> Dict[str, Any]:
+    path = cache_dir(state_path) / name
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def save(state_path: str, name: str, data: Dict[str, Any]) -> None:
+    """Best-effort atomic write, readable only by the owner; cache failures never break a sync."""
+    path = cache_dir(state_path) / name
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        tmp.replace(path)
+    except Exception:
+        pass
+
+
+def clear(state_path: str, name: str) -> None:
+    try:
+        (cache_dir(state_path) / name).unlink()
+    except Exception:
+        pass
@@ -0,0 +1,233 @@
+"""Persisted catalogs of WakaTime branches and projects.
+
+Each catalog holds cumulative seconds and first/last-seen dates per name. Settled
+days are folded in once and never re-read; each refresh only fetches the days since
+the last one, plus yesterday and today as a live overlay. Listing and searching
+thousands of historical names then needs at most one small request.
+
+- `BranchCatalog`: branches of one WakaTime project (`skuld branches --list`).
+- `ProjectCatalog`: all WakaTime projects of the account, with a normalized-name
+  index for matching repos to projects (`skuld add`).
+"""
+import datetime as dt
+import fnmatch
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import load as cache_load, save as cache_save, slot as cache_slot
+from .wakatime import fetch_day_branches, fetch_day_projects, fetch_project_names
+
+
+class _DayCatalog(ABC):
+    """{name: [seconds, first seen, last seen]} folded from per-day totals.
+
+    Subclasses implement `_fetch`, which returns ({day: {name: seconds}}, requests made, ok).
+    """
+
+    def __init__(self, state_path: str, name: str, owner: str, horizon_days: int):
+        self.state_path = state_path
+        self.name = name
+        self.owner = owner
+        self.horizon_days = max(1, int(horizon_days))
+        data = cache_load(state_path, name)
+        if data.get("owner") != owner:
+            data = {}
+        self.data = data
+        # Last settled day already folded into `entries`
+        self.through: Optional[str] = data.get("through")
+        self.entries: Dict[str, List[Any]] = dict(data.get("entries") or {})
+        self.live: Dict[str, List[Any]] = {}
+
+    @abstractmethod
+    def _fetch(self, api_key: str, first: dt.date, last: dt.date, day_cache: Optional[Dict[str, Any]],
+               timeout: int) -> Tuple[Dict[str, Dict[str, float]], int, bool]:
+        """Per-day totals for [first, last]."""
+
+    @staticmethod
+    def _fold(target: Dict[str, List[Any]], day: str, totals: Dict[str, float]) -> None:
+        for name, secs in totals.items():
+            if not name or secs <= 0:
+                continue
+            row = target.get(name)
+            if row is None:
+                target[name] = [float(secs), day, day]
+            else:
+                row[0] = float(row[0]) + float(secs)
+                row[1] = min(row[1], day)
+                row[2] = max(row[2], day)
+
+    def refresh(self, api_key: str, day_cache: Optional[Dict[str, Any]] = None, live: bool = True,
+                timeout: int = 10) -> Dict[str, Any]:
+        """Fold in newly settled days and reload the live overlay.
+
+        Returns {"requests", "days_added", "error"}. On a failed request nothing is
+        folded, so the next refresh retries the same days.
+        """
+        today = dt.date.today()
+        settled_before = today - dt.timedelta(days=1)
+        start = today - dt.timedelta(days=self.horizon_days)
+        if self.through:
+            try:
+                start = max(start, dt.date.fromisoformat(self.through) + dt.timedelta(days=1))
+            except ValueError:
+                self.through, self.entries = None, {}
+        last_settled = settled_before - dt.timedelta(days=1)
+        result: Dict[str, Any] = {"requests": 0, "days_added": 0, "error": None}
+        if start <= last_settled:
+            days, n, complete = self._fetch(api_key, start, last_settled, day_cache, timeout)
+            result["requests"] += n
+            if complete:
+                for day in sorted(days):
+                    self._fold(self.entries, day, days[day])
+                self.through = last_settled.isoformat()
+                result["days_added"] = (last_settled - start).days + 1
+            else:
+                result["error"] = "WakaTime request failed; catalog not updated"
+        if live:
+            days, n, complete = self._fetch(api_key, settled_before, today, None, timeout)
+            result["requests"] += n
+            self.live = {}
+            for day in sorted(days):
+                self._fold(self.live, day, days[day])
+            if not complete and not result["error"]:
+                result["error"] = "WakaTime request failed; recent days missing"
+        return result
+
+    def merged(self) -> Dict[str, List[Any]]:
+        """Catalog entries with the live overlay added."""
+        merged = {name: list(row) for name, row in self.entries.items()}
+        for name, (secs, first, last) in self.live.items():
+            row = merged.setdefault(name, [0.0, first, last])
+            row[0] = float(row[0]) + float(secs)
+            row[1], row[2] = min(row[1], first), max(row[2], last)
+        return merged
+
+    def save(self, **extra: Any) -> None:
+        cache_save(self.state_path, self.name, {
+            "owner": self.owner,
+            "through": self.through,
+            "entries": self.entries,
+            **extra,
+        })
+
+
+class BranchCatalog(_DayCatalog):
+    """Branches of one WakaTime project."""
+
+    def __init__(self, state_path: str, project: str, horizon_days: int = 365):
+        super().__init__(state_path, f"branches-{cache_slot(project)}.json", project, horizon_days)
+        self.project = project
+
+    def _fetch(self, api_key, first, last, day_cache, timeout):
+        return fetch_day_branches(api_key, first, last, project=self.project, timeout=timeout, day_cache=day_cache)
+
+    @property
+    def branches(self) -> Dict[str, List[Any]]:
+        return self.entries
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Branch rows (catalog plus live overlay), unsorted."""
+        return [{"branch": name, "seconds": secs, "first_seen": first, "last_seen": last}
+                for name, (secs, first, last) in self.merged().items()]
+
+
+def normalize(name: str) -> str:
+    """Lowercase alphanumerics only, so `My_Repo`, `my-repo` and `myrepo` compare equal."""
+    return "".join(ch for ch in name.lower() if ch.isalnum())
+
+
+class ProjectCatalog(_DayCatalog):
+    """All WakaTime projects of one account, with a normalized-name index.
+
+    Project names without tracked time in the horizon are added from the projects list
+    (refreshed at most daily) with zero seconds.
+    """
+
+    def __init__(self, state_path: str, api_key: str, horizon_days: int = 365):
+        super().__init__(state_path, f"projects-{cache_slot(api_key)}.json", cache_slot(api_key), horizon_days)
+        self.names: List[str] = list(self.data.get("names") or [])
+        self.names_at: Optional[str] = self.data.get("names_at")
+        self._index: Optional[Dict[str, List[str]]] = None
+
+    def _fetch(self, api_key, first, last, day_cache, timeout):
+        return fetch_day_projects(api_key, first, last, timeout=timeout)
+
+    def refresh(self, api_key: str, day_cache: Optional[Dict[str, Any]] = None, live: bool = True,
+                timeout: int = 10) -> Dict[str, Any]:
+        result = super().refresh(api_key, day_cache=day_cache, live=live, timeout=timeout)
+        today = dt.date.today().isoformat()
+        if self.names_at != today:
+            names = fetch_project_names(api_key, timeout=timeout)
+            result["requests"] += 1
+            if names is not None:
+                self.names, self.names_at = names, today
+        self._index = None
+        return result
+
+    def totals(self) -> Dict[str, List[Any]]:
+        """{project: [seconds, first seen, last seen]} for every known project."""
+        merged = self.merged()
+        for name in self.names:
+            merged.setdefault(name, [0.0, None, None])
+        return merged
+
+    def index(self) -> Dict[str, List[str]]:
+        """{normalized name: [project names]}, built once per refresh."""
+        if self._index is None:
+            idx: Dict[str, List[str]] = {}
+            for name in self.totals():
+                idx.setdefault(normalize(name), []).append(name)
+            self._index = idx
+        return self._index
+
+    def rank(self, *hints: str, limit: int = 10) -> List[Tuple[float, float, str]]:
+        """Projects ordered by how well they match `hints` (repo folder, remote name), then time.
+
+        Returns (score, seconds, name): +2 per exact name match, +1 for a normalized match,
+        +0.5 when one normalized name contains the other.
+        """
+        totals = self.totals()
+        hints = tuple(h for h in hints if h)
+        norms = {normalize(h) for h in hints} - {""}
+        scores: Dict[str, float] = {}
+        for h in hints:
+            if h in totals:
+                scores[h] = scores.get(h, 0.0) + 2
+        idx = self.index()
+        for n in norms:
+            for name in idx.get(n, ()):
+                scores[name] = scores.get(name, 0.0) + 1
+        for key, names in idx.items():
+            if len(key) >= 3 and any(n != key and len(n) >= 3 and (n in key or key in n) for n in norms):
+                for name in names:
+                    scores[name] = scores.get(name, 0.0) + 0.5
+        ranked = [(scores.get(name, 0.0), float(row[0] or 0.0), name) for name, row in totals.items()]
+        ranked.sort(key=lambda t: (t[0], t[1]), reverse=True)
+        return ranked[:limit]
+
+    def save(self, **extra: Any) -> None:
+        super().save(names=self.names, names_at=self.names_at, **extra)
+
+
+def search(rows: List[Dict[str, Any]], text: Optional[str] = None, issue: Optional[str] = None,
+           unmapped: bool = False, active_days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Filter branch rows (with an "issue" field) by name, issue, mapping and recency.
+
+    `text` matches case-insensitively as a substring, or as a glob when it contains
+    `*`, `?` or `[`.
+    """
+    out = rows
+    if text:
+        needle = text.lower()
+        if any(ch in needle for ch in "*?["):
+            out = [r for r in out if fnmatch.fnmatchcase(r["branch"].lower(), needle)]
+        else:
+            out = [r for r in out if needle in r["branch"].lower()]
+    if issue:
+        out = [r for r in out if (r.get("issue") or "").upper() == issue.upper()]
+    if unmapped:
+        out = [r for r in out if not r.get("issue")]
+    if active_days:
+        cutoff = (dt.date.today() - dt.timedelta(days=int(active_days))).isoformat()
+        out = [r for r in out if r["last_seen"] >= cutoff]
+    return out
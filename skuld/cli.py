@@ -1,27 +1,49 @@
 import argparse
+import contextlib
+import contextvars
 import datetime as dt
 import json
 import os
 import pathlib
-from typing import Any, Dict, List, Tuple
+import shutil
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from . import __version__
 
-from .git import get_commits, group_commits_by_issue, get_commits_for_branches
+from .cache import cache_dir, load as cache_load, save as cache_save, clear as cache_clear, slot as cache_slot, fingerprint as cache_fingerprint
+from .git import Commit, GitLogFailed, extract_issue_keys, group_commits_by_issue, iter_commits, iter_commits_for_branches, list_refs
+from .gitgraph import open_reader as open_git_reader
 from .util import format_seconds, format_date, format_time
-from .wakatime import load_total_seconds_from_file, fetch_total_seconds, fetch_summary, fetch_durations_summary, discover_api_key
+from .wakatime import load_total_seconds_from_file, fetch_total_seconds, fetch_branch_totals, discover_api_key
 from .jira import (
     search_issues,
     search_issues_debug,
     get_myself,
     search_issues_noassignee,
-    get_my_worklog_seconds,
+    get_worklogs,
+    sum_my_worklog_seconds,
     add_worklog,
+    get_worklog,
+    update_worklog,
+    merge_adf,
     add_comment,
     ensure_in_progress,
     get_issue_status,
+    WorklogBackend,
+    JiraWorklogs,
+    TempoWorklogs,
+    TEMPO_API,
 )
-from .state import seen as state_seen, record as state_record, get_last_sync as state_get_last_sync, set_last_sync as state_set_last_sync
+from .ledger import WorklogLedger
+from .catalog import BranchCatalog, ProjectCatalog, search as catalog_search
+from .scheduler import Debouncer, Backoff, ref_fingerprint, pid_path, write_pid, clear_pid
+from . import team
+from . import http
+from .state import reserve as state_reserve, release as state_release, record as state_record, find_day_worklog as state_find_day_worklog, get_last_sync as state_get_last_sync, set_last_sync as state_set_last_sync
 
 
 def _default_config_path() -> pathlib.Path:
@@ -36,9 +58,68 @@ def _default_config_path() -> pathlib.Path:
     return pathlib.Path("~/.time-time.yaml").expanduser()
 
 
+# The compiled copy lives next to the configured state file. Its location is itself
+# config, so the default cache dir only holds a pointer to it (no config values).
+_DEFAULT_STATE = "~/.local/share/skuld/state.json"
+
+
+def _compiled_config_name(path: pathlib.Path) -> str:
+    return f"config-{cache_slot(str(path.expanduser().resolve()))}.json"
+
+
+def _compiled_config_locator(path: pathlib.Path) -> str:
+    return f"config-{cache_slot(str(path.expanduser().resolve()))}.where.json"
+
+
+def _clear_compiled_config(path: pathlib.Path) -> None:
+    where = cache_load(_DEFAULT_STATE, _compiled_config_locator(path))
+    cache_clear(str(where.get("state") or _DEFAULT_STATE), _compiled_config_name(path))
+    cache_clear(_DEFAULT_STATE, _compiled_config_locator(path))
+
+
 def load_config(path: pathlib.Path) -> Dict[str, Any]:
+    """Load ~/.skuld.yaml, reusing a compiled JSON copy while the file's mtime and size match.
+
+    The compiled copy also carries the resolved project index, so hook invocations skip
+    both YAML parsing and path resolution. It holds the API tokens, so it is written
+    owner-only into the configured state directory. Disabled by `cache.enabled: false`.
+    """
     if not path.exists():
         return {}
+    try:
+        st = path.stat()
+    except Exception:
+        return {}
+    name = _compiled_config_name(path)
+    where = cache_load(_DEFAULT_STATE, _compiled_config_locator(path))
+    if where.get("mtime_ns") == st.st_mtime_ns and where.get("size") == st.st_size and where.get("state"):
+        rec = cache_load(str(where["state"]), name)
+        cfg = rec.get("config")
+        if (rec.get("mtime_ns") == st.st_mtime_ns and rec.get("size") == st.st_size and isinstance(cfg, dict)
+                and _cfg_flag(cfg, "cache", "enabled", True)):
+            _project_index(cfg, rec.get("index") if isinstance(rec.get("index"), dict) else None)
+            return cfg
+    cfg = _parse_config(path)
+    if not (cfg and isinstance(cfg, dict)):
+        return cfg
+    if not _cfg_flag(cfg, "cache", "enabled", True):
+        # Don't leave an earlier copy (with tokens) behind once caching is off
+        if where:
+            _clear_compiled_config(path)
+        return cfg
+    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or _DEFAULT_STATE
+    projs = cfg.get("projects")
+    resolved = _resolve_project_keys(projs) if isinstance(projs, dict) else {}
+    _project_index(cfg, resolved)
+    if where.get("state") and where["state"] != state_path:
+        cache_clear(str(where["state"]), name)
+    cache_save(state_path, name, {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "config": cfg, "index": resolved})
+    cache_save(_DEFAULT_STATE, _compiled_config_locator(path), {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                                                              "state": state_path})
+    return cfg
+
+
+def _parse_config(path: pathlib.Path) -> Dict[str, Any]:
     text = ""
     try:
         text = path.read_text(encoding="utf-8")
@@ -89,6 +170,7 @@ def _save_config_prefer_skuld(data: Dict[str, Any]) -> pathlib.Path:
     """Write config to ~/.skuld.yaml, using PyYAML if available, otherwise a simple dumper."""
     cfg_path = pathlib.Path("~/.skuld.yaml").expanduser()
     cfg_path.parent.mkdir(parents=True, exist_ok=True)
+    _clear_compiled_config(cfg_path)
     # Backup existing file once per write
     if cfg_path.exists():
         try:
@@ -202,6 +284,7 @@ def handle_root(args: argparse.Namespace) -> int:
     print("  • Map this repo:          skuld add")
     print("  • Sync since last sync:   skuld sync # or add --test for a dry-run")
     print("  • Explicit periods:       skuld sync today | yesterday | week")
+    print("  • Background auto-sync:   skuld watch")
     print("")
     print(f"Config: {str(cfg_path)}    State: {os.path.expanduser(state_path)}")
     print("")
@@ -211,36 +294,77 @@ def handle_root(args: argparse.Namespace) -> int:
     return 0
 
 
-def _project_mapping(cfg: Dict[str, Any], project_path: str) -> str | None:
-    # Config shape: projects: { "/path/to/repo": { wakatimeProject: "name", jiraProjectKey: "SOT" } }
-    projs = cfg.get("projects")
-    if not isinstance(projs, dict):
-        return None
-    # Only exact path match (normalized). No basename fallback to avoid cross‑repo bleed.
-    pp = os.path.realpath(os.path.abspath(os.path.expanduser(project_path)))
-    # Also check normalized keys in config
+# (projects dict, its keys, resolved index) for the most recently indexed config
+_PROJECT_INDEX: Dict[str, Tuple[Dict[str, Any], Tuple[str, ...], Dict[str, Dict[str, Any]]]] = {}
+
+
+def _resolve_project_keys(projs: Dict[str, Any]) -> Dict[str, str]:
+    """Map each configured repo's absolute and real path to its key in `projects`."""
+    out: Dict[str, str] = {}
     for k, v in projs.items():
         if not isinstance(v, dict):
             continue
-        kk = os.path.realpath(os.path.abspath(os.path.expanduser(k)))
-        if kk == pp:
-            return v.get("wakatimeProject")
-    return None
+        absk = os.path.abspath(os.path.expanduser(k))
+        out.setdefault(absk, k)
+        out.setdefault(os.path.realpath(absk), k)
+    return out
 
 
-def _project_entry(cfg: Dict[str, Any], project_path: str) -> Dict[str, Any] | None:
-    """Return the projects[repo] entry dict for this repo path, if configured."""
+def _project_index(cfg: Dict[str, Any], resolved: Dict[str, str] | None = None) -> Dict[str, Dict[str, Any]]:
+    """Map resolved repo paths to their projects[...] entry.
+
+    Built once per loaded config (reused while the same `projects` dict keeps the same
+    keys), so lookups never resolve every configured path again. `resolved` primes it
+    from a precomputed path → key map (the compiled config).
+    """
     projs = cfg.get("projects")
     if not isinstance(projs, dict):
-        return None
-    pp = os.path.realpath(os.path.abspath(os.path.expanduser(project_path)))
-    for k, v in projs.items():
-        if not isinstance(v, dict):
-            continue
-        kk = os.path.realpath(os.path.abspath(os.path.expanduser(k)))
-        if kk == pp:
-            return v
-    return None
+        return {}
+    keys = tuple(projs)
+    cached = _PROJECT_INDEX.get("current")
+    if resolved is None and cached and cached[0] is projs and cached[1] == keys:
+        return cached[2]
+    if resolved is None:
+        resolved = _resolve_project_keys(projs)
+    index = {p: projs[k] for p, k in resolved.items() if isinstance(projs.get(k), dict)}
+    _PROJECT_INDEX["current"] = (projs, keys, index)
+    return index
+
+
+def _project_lookup(cfg: Dict[str, Any], project_path: str) -> Tuple[str | None, Dict[str, Any] | None]:
+    """Return (repo path, projects[repo] entry) for the configured repo containing project_path.
+
+    Exact matches win, then the nearest configured parent directory, so running from a
+    subdirectory maps to its repo. Only whole path components match (no basename
+    fallback, to avoid cross-repo bleed); symlinks are resolved only when the plain
+    path is not found.
+    """
+    index = _project_index(cfg)
+    if not index:
+        return None, None
+    p = os.path.abspath(os.path.expanduser(project_path))
+    for start in (p, None):
+        cur = start if start is not None else os.path.realpath(p)
+        while True:
+            entry = index.get(cur)
+            if entry is not None:
+                return cur, entry
+            parent = os.path.dirname(cur)
+            if parent == cur:
+                break
+            cur = parent
+    return None, None
+
+
+def _project_mapping(cfg: Dict[str, Any], project_path: str) -> str | None:
+    # Config shape: projects: { "/path/to/repo": { wakatimeProject: "name", jiraProjectKey: "SOT" } }
+    _root, entry = _project_lookup(cfg, project_path)
+    return entry.get("wakatimeProject") if entry else None
+
+
+def _project_entry(cfg: Dict[str, Any], project_path: str) -> Dict[str, Any] | None:
+    """Return the projects[repo] entry dict for this repo path, if configured."""
+    return _project_lookup(cfg, project_path)[1]
 
 
 def _git_remote_repo_name(project_path: str) -> str | None:
@@ -291,28 +415,19 @@ def handle_add(args: argparse.Namespace) -> int:
             wk["apiKey"] = api_key
             cfg["wakatime"] = wk
 
-    # Collect candidate projects from WakaTime (last 14 days)
+    if getattr(args, "scan", None):
+        return _add_scan(cfg, args.scan, api_key)
+
+    # Rank candidate WakaTime projects from the cached project catalog
     chosen_project = None
     base = os.path.basename(repo)
     remote = _git_remote_repo_name(repo) or ""
     if api_key:
-        since = (dt.datetime.now() - dt.timedelta(days=14)).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-        until = dt.datetime.now().isoformat()
-        summary_all = fetch_summary(api_key, since, until, project=None)
-        projects = summary_all.get("projects", {}) or {}
-        candidates: List[tuple[int, float, str]] = []
-        def norm(s: str) -> str:
-            return "".join(ch.lower() for ch in s if ch.isalnum())
-        for pname, psecs in projects.items():
-            score = 0
-            if pname == base: score += 2
-            if remote and pname == remote: score += 2
-            if norm(pname) == norm(base) or (remote and norm(pname) == norm(remote)): score += 1
-            candidates.append((score, float(psecs or 0.0), pname))
-        candidates.sort(key=lambda t: (t[0], t[1]), reverse=True)
-        top = candidates[:10]
+        catalog = _project_catalog(cfg, api_key)
+        candidates = catalog.rank(base, remote)
+        top = [c for c in candidates if c[0] > 0 or c[1] > 0]
         if top:
-            print("Detected WakaTime projects (by similarity and recent time):")
+            print("Detected WakaTime projects (by similarity and tracked time):")
             for idx, (_sc, secs, pname) in enumerate(top, start=1):
                 print(f"  {idx}. {pname}  ({format_seconds(secs)})")
             choice = _prompt("Choose a project number or enter a name", default=str(1))
@@ -342,8 +457,260 @@ def handle_add(args: argparse.Namespace) -> int:
     return 0
 
 
+def _project_catalog(cfg: Dict[str, Any], api_key: str) -> ProjectCatalog:
+    """Load the WakaTime project catalog and fold in days since its last refresh."""
+    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
+    catalog = ProjectCatalog(state_path, api_key)
+    res = catalog.refresh(api_key)
+    if res.get("error"):
+        print(f"Note: {res['error']}", file=sys.stderr)
+    catalog.save()
+    return catalog
+
+
+def _add_scan(cfg: Dict[str, Any], root: str, api_key: str) -> int:
+    """`skuld add --scan DIR`: map every unmapped git repo directly under DIR in one pass.
+
+    A repo is mapped without asking when one project clearly matches its folder or
+    remote name; otherwise the top candidates are offered (blank skips the repo).
+    """
+    root = os.path.abspath(os.path.expanduser(root))
+    if not os.path.isdir(root):
+        print(f"Not a directory: {root}")
+        return 2
+    if not api_key:
+        print("WakaTime API key not found. Run `skuld start` or add wakatime.apiKey to ~/.skuld.yaml.")
+        return 2
+    repos = sorted(e.path for e in os.scandir(root) if e.is_dir() and os.path.exists(os.path.join(e.path, ".git")))
+    catalog = _project_catalog(cfg, api_key)
+    projects_map = cfg.get("projects") if isinstance(cfg.get("projects"), dict) else None
+    if not isinstance(projects_map, dict):
+        projects_map = {}
+        cfg["projects"] = projects_map
+    added: List[Tuple[str, str]] = []
+    skipped = already = 0
+    for repo in repos:
+        mapped_root, entry = _project_lookup(cfg, repo)
+        if entry and mapped_root == repo:
+            already += 1
+            continue
+        ranked = catalog.rank(os.path.basename(repo), _git_remote_repo_name(repo) or "", limit=5)
+        chosen = None
+        if ranked and ranked[0][0] >= 1 and (len(ranked) == 1 or ranked[1][0] < ranked[0][0]):
+            chosen = ranked[0][2]
+        else:
+            top = [c for c in ranked if c[0] > 0 or c[1] > 0]
+            print(f"\n{repo}")
+            for idx, (_sc, secs, pname) in enumerate(top, start=1):
+                print(f"  {idx}. {pname}  ({format_seconds(secs)})")
+            choice = _prompt("Choose a project number, enter a name, or leave blank to skip")
+            if choice.isdigit() and 1 <= int(choice) <= len(top):
+                chosen = top[int(choice) - 1][2]
+            elif choice and not choice.isdigit():
+                chosen = choice
+        if not chosen:
+            skipped += 1
+            continue
+        projects_map[repo] = {"wakatimeProject": chosen}
+        added.append((repo, chosen))
+    if added:
+        path = _save_config_prefer_skuld(cfg)
+        print(f"\nMapped {len(added)} repo(s) (saved to {path}):")
+        for repo, pname in added:
+            print(f"  {repo} → {pname}")
+    print(f"{len(repos)} repo(s) found under {root}: {len(added)} mapped, {already} already mapped, {skipped} skipped.")
+    return 0
+
+
+def _cfg_flag(cfg: Dict[str, Any], section: str, key: str, default: bool) -> bool:
+    """Read a boolean flag from `section.key` (nested or dotted); accepts YAML-ish strings."""
+    sect = cfg.get(section)
+    val = sect.get(key) if isinstance(sect, dict) else None
+    if val is None:
+        val = cfg.get(f"{section}.{key}")
+    if val is None:
+        return default
+    if isinstance(val, str):
+        return val.strip().lower() not in ("false", "no", "off", "0", "")
+    return bool(val)
+
+
+def _git_reader(cfg: Dict[str, Any], project: str) -> Any:
+    """In-process git reader (refs, commit-graph, objects) when `git.commitGraph` is on, else None.
+
+    Callers pass it to the `skuld.git` helpers, which fall back to spawning git
+    whenever the reader cannot answer.
+    """
+    return open_git_reader(project) if _cfg_flag(cfg, "git", "commitGraph", False) else None
+
+
+def _to_utc(iso: str | None) -> dt.datetime | None:
+    """Parse an ISO timestamp (naive = local time) into an aware UTC datetime."""
+    if not iso:
+        return None
+    try:
+        d = dt.datetime.fromisoformat(iso)
+    except Exception:
+        return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=dt.datetime.now().astimezone().tzinfo)
+    return d.astimezone(dt.timezone.utc)
+
+
+def _cached_commits(entry: Any, refs_fp: str | None, since: str, until: str) -> List[Commit] | None:
+    """Reuse commits from a previous scan when the refs are unchanged and it covered `since`."""
+    if not isinstance(entry, dict) or not refs_fp or entry.get("refs") != refs_fp:
+        return None
+    since_utc, until_utc, prev_since = _to_utc(since), _to_utc(until), _to_utc(entry.get("since"))
+    if not (since_utc and until_utc and prev_since) or since_utc < prev_since:
+        return None
+    out: List[Commit] = []
+    for sha, date, subject in entry.get("commits") or []:
+        cd = _to_utc(date)
+        # Keep unparsable dates, mirroring the per-issue commit filter
+        if cd is None or since_utc <= cd <= until_utc:
+            out.append(Commit(sha=sha, date=date, subject=subject))
+    return out
+
+
+def _team_server(cfg: Dict[str, Any]) -> str | None:
+    """URL of the optional team aggregation server (`team.server`), if configured."""
+    team_cfg = cfg.get("team") if isinstance(cfg.get("team"), dict) else {}
+    url = (team_cfg.get("server") if isinstance(team_cfg, dict) else None) or cfg.get("team.server")
+    return str(url).strip() if url else None
+
+
+def _worklog_backend_name(cfg: Dict[str, Any]) -> str:
+    """`jira.worklogBackend`: "jira" (default) or "tempo"."""
+    jira_cfg = cfg.get("jira") if isinstance(cfg.get("jira"), dict) else {}
+    name = (jira_cfg.get("worklogBackend") if isinstance(jira_cfg, dict) else None) or cfg.get("jira.worklogBackend") or "jira"
+    return str(name).strip().lower()
+
+
+def _worklog_backend(cfg: Dict[str, Any], account_id: str | None) -> Tuple[WorklogBackend | None, str | None]:
+    """The configured worklog backend, or (None, error) when it cannot be used.
+
+    Tempo needs `tempo.apiToken` (optionally `tempo.baseUrl`, e.g. the EU endpoint)
+    and the Jira account id the worklogs are created for.
+    """
+    name = _worklog_backend_name(cfg)
+    if name == "tempo":
+        tempo_cfg = cfg.get("tempo") if isinstance(cfg.get("tempo"), dict) else {}
+        token = (tempo_cfg.get("apiToken") if isinstance(tempo_cfg, dict) else None) or cfg.get("tempo.apiToken")
+        base_url = (tempo_cfg.get("baseUrl") if isinstance(tempo_cfg, dict) else None) or cfg.get("tempo.baseUrl") or TEMPO_API
+        if not token:
+            return None, "tempo.apiToken is not configured"
+        if not account_id:
+            return None, "Jira account id unknown (needed for Tempo worklogs)"
+        return TempoWorklogs(str(token), account_id, str(base_url)), None
+    if name != "jira":
+        return None, f"unknown jira.worklogBackend: {name}"
+    jira_cfg = cfg.get("jira") if isinstance(cfg.get("jira"), dict) else {}
+    site = jira_cfg.get("site") or cfg.get("jira.site")
+    email = jira_cfg.get("email") or cfg.get("jira.email")
+    token = jira_cfg.get("apiToken") or cfg.get("jira.apiToken")
+    # Team mode: worklog posts go through the shared server and its site-wide rate budget
+    team_server = _team_server(cfg)
+    post = (lambda **kw: team.add_worklog(team_server, **kw)) if team_server else add_worklog
+    return JiraWorklogs(site, email, token, post=post), None
+
+
+def _configure_http(cfg: Dict[str, Any], state_path: str) -> None:
+    """Enable the per-host circuit breaker (`http.circuitBreaker`, default on).
+
+    Its state is shared by every skuld process (e.g. backgrounded hook runs) through
+    `cache/breaker.json`; `http.persistBreaker: false` keeps it per process instead.
+    """
+    if not _cfg_flag(cfg, "http", "circuitBreaker", True):
+        http.use_breaker(None)
+        return
+    hcfg = cfg.get("http") if isinstance(cfg.get("http"), dict) else {}
+    try:
+        threshold = int(hcfg.get("breakerThreshold") or cfg.get("http.breakerThreshold") or 3)
+        cooldown = float(hcfg.get("breakerCooldown") or cfg.get("http.breakerCooldown") or 300)
+    except Exception:
+        threshold, cooldown = 3, 300.0
+    current = http.breaker()
+    path = cache_dir(state_path) / "breaker.json" if _cfg_flag(cfg, "http", "persistBreaker", True) else None
+    if current is None or current.path != path:
+        http.use_breaker(http.CircuitBreaker(path, threshold=threshold, cooldown=cooldown))
+
+
+def _wakatime_day_cache(state_path: str, project: str, use_cache: bool) -> Tuple[Dict[str, Any], Dict[str, Any] | None]:
+    """Load the settled-day WakaTime cache; returns (whole file, this project's days)."""
+    if not use_cache:
+        return {}, None
+    wcache = cache_load(state_path, "wakatime-days.json")
+    day_cache = wcache.setdefault(project, {})
+    return wcache, day_cache if isinstance(day_cache, dict) else None
+
+
+def _save_wakatime_day_cache(state_path: str, wcache: Dict[str, Any], day_cache: Dict[str, Any] | None) -> None:
+    if not isinstance(day_cache, dict):
+        return
+    # Keep roughly a year of settled days per project
+    for old in sorted(day_cache.keys())[:-400]:
+        day_cache.pop(old, None)
+    cache_save(state_path, "wakatime-days.json", wcache)
+
+
+class _ContextPool(ThreadPoolExecutor):
+    """Thread pool whose tasks run in a copy of the submitter's context, so they keep its HTTP deadline."""
+
+    def submit(self, fn, /, *args, **kwargs):  # type: ignore[override]
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _timed(fn: Callable[..., Any], *a: Any) -> Tuple[Any, int]:
+    """Run fn(*a) and return (result, elapsed_ms)."""
+    t0 = time.perf_counter()
+    res = fn(*a)
+    return res, int((time.perf_counter() - t0) * 1000)
+
+
+def _allocate_branches(branch_seconds: Dict[str, float], issue_rx: str,
+                       bmap: Any = None) -> Tuple[Dict[str, float], Dict[str, List[str]]]:
+    """Attribute WakaTime branch seconds to issue keys.
+
+    Keys embedded in a branch name win; otherwise the branch's explicit mapping is used.
+    Returns ({key: seconds}, {key: [branches]}).
+    """
+    import re as _re
+    rx = _re.compile(issue_rx)
+    alloc_by_key: Dict[str, float] = {}
+    branches_by_key: Dict[str, List[str]] = {}
+    for bname, secs in branch_seconds.items():
+        matches = rx.findall(bname or "")
+        if not matches:
+            # If the branch name has no embedded issue key, allow explicit mapping
+            mapped_key = bmap.get(bname) if isinstance(bmap, dict) else None
+            if mapped_key:
+                k = str(mapped_key)
+                alloc_by_key[k] = alloc_by_key.get(k, 0.0) + float(secs or 0.0)
+                branches_by_key.setdefault(k, []).append(bname)
+            continue
+        for m in matches:
+            alloc_by_key[m] = alloc_by_key.get(m, 0.0) + float(secs or 0.0)
+            branches_by_key.setdefault(m, []).append(bname)
+    return alloc_by_key, branches_by_key
+
+
 def _build_preview(period: str | None, project: str, wakatime_file: str | None, cfg: Dict[str, Any],
-                   since_override: str | None = None, until_override: str | None = None) -> Dict[str, Any]:
+                   since_override: str | None = None, until_override: str | None = None,
+                   on_issue: Callable[[Dict[str, Any]], None] | None = None,
+                   deadline: float | None = None) -> Dict[str, Any]:
+    """Compute the per-issue worklog preview for a repo and window.
+
+    `on_issue`, when given, is called with each issue dict as soon as it is complete
+    (in stable key order), so callers can stream results before the whole preview ends.
+
+    `deadline` (seconds) starts a time budget for all HTTP calls; an outer budget set by
+    the caller (e.g. `sync --deadline`) applies too. Under a budget, status lookups are
+    skipped, cached worklog rows are used even if stale, and issues whose already-logged
+    time is uncertain are marked `partial`.
+    """
+    t_start = time.perf_counter()
+    timings: Dict[str, int] = {}
     if not isinstance(cfg, dict):
         cfg = {}
     jira = cfg.get("jira") or {}
@@ -366,36 +733,25 @@ def _build_preview(period: str | None, project: str, wakatime_file: str | None,
         # Back-compat: infer from named period (defaults validated by caller)
         since, until = _period_bounds(period or "today")
 
-    commits = get_commits(project, since, until)
-    groups = group_commits_by_issue(commits, issue_rx)
-
-    # Determine last recorded upload window per issue (from local state) to bound comment commits.
     state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
-    last_until_by_issue: Dict[str, str] = {}
-    try:
-        p = pathlib.Path(os.path.expanduser(state_path)).resolve()
-        if p.exists():
-            data = json.loads(p.read_text(encoding="utf-8"))
-            entries = data.get("entries") if isinstance(data, dict) else None
-            if isinstance(entries, list):
-                for e in entries:
-                    if not isinstance(e, dict):
-                        continue
-                    key = e.get("issue")
-                    u = e.get("until")
-                    if not key or not u:
-                        continue
-                    # Track the max until per issue
-                    prev = last_until_by_issue.get(key)
-                    if not prev or (str(u) > str(prev)):
-                        last_until_by_issue[key] = str(u)
-    except Exception:
-        # If state cannot be read, proceed without additional bounding
-        last_until_by_issue = {}
+    _configure_http(cfg, state_path)
+    deadline_token = http.set_deadline(deadline) if deadline else None
+    budgeted = http.remaining() is not None
+    # Incremental preview: reuse intermediate results whose input fingerprints are unchanged
+    # (ref tips for git, settled-day hashes for WakaTime, `updated` stamps for Jira issues).
+    use_cache = _cfg_flag(cfg, "cache", "enabled", True)
+    pcache_name = f"preview-{cache_slot(project)}.json"
+    pcache: Dict[str, Any] = cache_load(state_path, pcache_name) if use_cache else {}
+    cache_stats: Dict[str, Any] = {"enabled": use_cache, "git": "miss", "branch_logs_reused": 0,
+                                   "worklogs_reused": 0, "worklogs_fetched": 0}
 
     # If Jira credentials exist, fetch summaries and filter to current user's assignments.
     jira_email = (jira.get("email") if isinstance(jira, dict) else cfg.get("jira.email")) or ""
     jira_token = (jira.get("apiToken") if isinstance(jira, dict) else cfg.get("jira.apiToken")) or ""
+    has_jira = bool(jira_site and jira_email and jira_token)
+    team_server = _team_server(cfg)
+    jcache_name = f"jira-{cache_slot(jira_site)}.json"
+    jcache: Dict[str, Any] = cache_load(state_path, jcache_name) if (use_cache and jira_site) else {}
     jira_info: Dict[str, Dict[str, str]] = {}
     ownership_verified = False
     debug_info: Dict[str, Any] = {
@@ -409,8 +765,8 @@ def _build_preview(period: str | None, project: str, wakatime_file: str | None,
             "repo": project,
             "since": since,
             "until": until,
-            "commits_scanned": len(commits),
-            "keys_from_commits": sorted(list(groups.keys())),
+            "commits_scanned": 0,
+            "keys_from_commits": [],
         },
         "wakatime": {
             "api_key_source": None,
@@ -427,246 +783,382 @@ def _build_preview(period: str | None, project: str, wakatime_file: str | None,
             "normalized": issue_rx,
         },
         "jira_filtered_keys": [],
+        "cache": cache_stats,
         "policy": {
             "require_ownership": require_ownership,
         },
     }
-    # Candidate keys from commits so far; will union with WakaTime keys below
-    candidate_keys: set[str] = set(groups.keys())
-    if jira_site and jira_email and jira_token and candidate_keys:
-        keys = sorted(candidate_keys)
-        # First, resolve current user to get accountId and validate token
+
+    # The preview is a small dependency graph of I/O calls. Independent calls (git log,
+    # Jira /myself, WakaTime) run concurrently; the ownership search waits for the keys
+    # from git + WakaTime; per-issue branch logs, worklogs and statuses then fan out.
+    preview_cfg = cfg.get("preview") if isinstance(cfg.get("preview"), dict) else {}
+    try:
+        workers = max(1, int((preview_cfg.get("maxWorkers") if isinstance(preview_cfg, dict) else None) or cfg.get("preview.maxWorkers") or 8))
+    except Exception:
+        workers = 8
+
+    git_reader = _git_reader(cfg, project)
+    debug_info["git"]["reader"] = "in-process" if git_reader is not None else "subprocess"
+
+    def _scan_commits() -> Tuple[List[Commit], int, Dict[str, str], str | None, bool]:
+        refs = list_refs(project, git_reader) if use_cache else {}
+        refs_fp = cache_fingerprint(refs) if refs else None
+        cached = _cached_commits(pcache.get("git"), refs_fp, since, until)
+        if cached is not None:
+            return cached, int((pcache.get("git") or {}).get("scanned") or len(cached)), refs, refs_fp, True
+        # Consume the log as it streams and keep only commits that name an issue;
+        # git's --since ends the walk at the window start.
+        walked = git_reader.log("HEAD", since, until) if git_reader is not None else None
+        keyed: List[Commit] = []
+        scanned = 0
+        try:
+            for c in walked if walked is not None else iter_commits(project, since, until):
+                scanned += 1
+                if extract_issue_keys(c.subject, issue_rx):
+                    keyed.append(c)
+        except GitLogFailed:
+            # Same as a failed `git log` always was: no commits, and nothing cached
+            return [], 0, refs, None, False
+        return keyed, scanned, refs, refs_fp, False
+
+    def _whoami() -> Tuple[Dict[str, Any] | None, str | None, bool]:
+        # Resolve current user to get accountId and validate token (cached per email)
+        cached_acct = (jcache.get("myself") or {}).get(jira_email)
+        if cached_acct:
+            return {"accountId": cached_acct}, None, True
         me, me_err = get_myself(jira_site, jira_email, jira_token)
-        debug_info["jira"]["whoami_error"] = me_err
-        debug_info["jira"]["whoami_accountId"] = me.get("accountId") if me else None
-        # Fetch issues without assignee filter; filter locally by accountId if available
-        jira_all, meta = search_issues_noassignee(jira_site, jira_email, jira_token, keys)
-        debug_info["jira"]["meta"] = meta
-        jira_info = {}
-        if jira_all and me and me.get("accountId"):
-            acct = me["accountId"]
-            for k, v in jira_all.items():
-                if v.get("assigneeAccountId") == acct:
-                    jira_info[k] = {"summary": v.get("summary"), "url": v.get("url")}
-        elif jira_all and jira_email:
-            # Fallback to email match if accountId not available
-            for k, v in jira_all.items():
-                if v.get("assigneeEmail") == jira_email:
-                    jira_info[k] = {"summary": v.get("summary"), "url": v.get("url")}
-        if jira_info:
-            ownership_verified = True
-            groups = {k: v for k, v in groups.items() if k in jira_info}
-            debug_info["jira_filtered_keys"] = sorted(list(jira_info.keys()))
-    debug_info["jira"]["ownership_verified"] = ownership_verified
-    # Pull WakaTime: prefer explicit JSON file; else try API if key configured
-    total_seconds = 0.0
-    branch_seconds: Dict[str, float] = {}
-    branches_by_key: Dict[str, List[str]] = {}
-    if wakatime_file:
-        total_seconds = load_total_seconds_from_file(wakatime_file)
-    else:
+        return me, me_err, False
+
+    def _wakatime() -> Tuple[float, Dict[str, float], Dict[str, Any]]:
+        # Pull WakaTime: prefer explicit JSON file; else try API if key configured
+        wdebug: Dict[str, Any] = {}
+        if wakatime_file:
+            return load_total_seconds_from_file(wakatime_file), {}, wdebug
         wk = cfg.get("wakatime") or {}
         api_key = wk.get("apiKey") if isinstance(wk, dict) else cfg.get("wakatime.apiKey")
         if not api_key:
             api_key = discover_api_key() or api_key
-        if api_key:
-            debug_info["wakatime"]["api_key_source"] = "config" if (wk.get("apiKey") if isinstance(wk, dict) else cfg.get("wakatime.apiKey")) else "wakatime.cfg"
-            mapped_project = _project_mapping(cfg, project)
-            if mapped_project:
-                # For short windows, use WakaTime Durations for precise slicing; else Summaries.
-                # If explicit overrides are provided, pick durations for <= 48h windows.
-                if since_override and until_override:
-                    try:
-                        _s = dt.datetime.fromisoformat(since)
-                        _u = dt.datetime.fromisoformat(until)
-                        use_durations = (_u - _s) <= dt.timedelta(hours=48)
-                    except Exception:
-                        use_durations = False
-                else:
-                    use_durations = (period or "").lower() in ("today", "yesterday", "24h", "24hours", "24", "day")
-                if use_durations:
-                    summary = fetch_durations_summary(api_key, since, until, project=mapped_project)
-                    debug_info["wakatime"]["api"] = "durations"
-                else:
-                    summary = fetch_summary(api_key, since, until, project=mapped_project)
-                    debug_info["wakatime"]["api"] = "summaries"
-                debug_info["wakatime"]["chosen_project"] = mapped_project
-                total_seconds = float(summary.get("total_seconds", 0.0))
-                branch_seconds = dict(summary.get("branches", {}))
-                debug_info["wakatime"]["branches"] = branch_seconds
-            else:
-                # No auto-detection: require an explicit per-repo mapping via `skuld add`.
-                debug_info["wakatime"]["chosen_project"] = None
-                debug_info["wakatime"]["note"] = "No repo mapping found; run `skuld add` in this repo."
-    # Build allocation strictly from WakaTime branches → issue keys. No fabricated splits.
-    import re as _re
-    rx = _re.compile(issue_rx)
-    alloc_by_key: Dict[str, float] = {}
-    for bname, secs in (branch_seconds or {}).items():
-        matches = rx.findall(bname or "")
-        if not matches:
-            # If the branch name has no embedded issue key, allow explicit mapping
-            proj_entry = _project_entry(cfg, project)
-            mapped_key = None
-            if isinstance(proj_entry, dict):
-                # Support either "branchIssues" (preferred) or legacy "branchMapping"
-                bmap = proj_entry.get("branchIssues") or proj_entry.get("branchMapping") or {}
-                if isinstance(bmap, dict):
-                    mapped_key = bmap.get(bname)
-            if mapped_key:
-                k = str(mapped_key)
-                alloc_by_key[k] = alloc_by_key.get(k, 0.0) + float(secs or 0.0)
-                branches_by_key.setdefault(k, []).append(bname)
-                candidate_keys.add(k)
-            continue
-        for m in matches:
-            alloc_by_key[m] = alloc_by_key.get(m, 0.0) + float(secs or 0.0)
-            branches_by_key.setdefault(m, []).append(bname)
-            candidate_keys.add(m)
-    debug_info["keys"]["candidate"] = sorted(list(candidate_keys))
-    debug_info["keys"]["from_branches"] = sorted(list(alloc_by_key.keys()))
-
-    # If ownership was verified earlier using only commit-derived keys, we may have
-    # missed keys that appeared solely via WakaTime branch names. Expand the Jira
-    # ownership check to include any newly discovered keys so WakaTime-only issues
-    # (with no commits in the window) are not filtered out.
-    if jira_site and jira_email and jira_token and candidate_keys:
+        if not api_key:
+            return 0.0, {}, wdebug
+        wdebug["api_key_source"] = "config" if (wk.get("apiKey") if isinstance(wk, dict) else cfg.get("wakatime.apiKey")) else "wakatime.cfg"
+        mapped_project = _project_mapping(cfg, project)
+        if not mapped_project:
+            # No auto-detection: require an explicit per-repo mapping via `skuld add`.
+            wdebug["chosen_project"] = None
+            wdebug["note"] = "No repo mapping found; run `skuld add` in this repo."
+            return 0.0, {}, wdebug
+        # The planner mixes cached settled days, ranged Summaries for whole days and
+        # Durations only for edge days the window cuts through.
+        wcache, day_cache = _wakatime_day_cache(state_path, mapped_project, use_cache)
+        summary = fetch_branch_totals(api_key, since, until, project=mapped_project, day_cache=day_cache)
+        _save_wakatime_day_cache(state_path, wcache, day_cache)
+        wdebug["api"] = "planner"
+        wdebug["plan"] = summary.get("plan", [])
+        wdebug["requests"] = summary.get("requests", 0)
+        wdebug["day_hashes"] = summary.get("day_hashes", {})
+        wdebug["complete"] = summary.get("complete", True)
+        wdebug["error"] = summary.get("error")
+        wdebug["chosen_project"] = mapped_project
+        branch_seconds = dict(summary.get("branches", {}))
+        wdebug["branches"] = branch_seconds
+        return float(summary.get("total_seconds", 0.0)), branch_seconds, wdebug
+
+    pool = _ContextPool(max_workers=workers, thread_name_prefix="skuld-preview")
+    try:
+        f_commits = pool.submit(_timed, _scan_commits)
+        f_me = pool.submit(_timed, _whoami) if has_jira else None
+        f_waka = pool.submit(_timed, _wakatime)
+
+        # Determine last recorded upload window per issue (from local state) to bound comment commits.
+        last_until_by_issue: Dict[str, str] = {}
         try:
-            missing_keys = sorted([k for k in candidate_keys if k not in (jira_info or {})])
-            if missing_keys:
-                # Resolve current user (accountId) if not already captured
-                acct_id = debug_info.get("jira", {}).get("whoami_accountId")
-                if not acct_id:
-                    me2, _me2err = get_myself(jira_site, jira_email, jira_token)
-                    acct_id = (me2 or {}).get("accountId") if me2 else None
-                    debug_info["jira"]["whoami_accountId"] = acct_id
-                jira_all2, meta_expand = search_issues_noassignee(jira_site, jira_email, jira_token, missing_keys)
-                if meta_expand:
-                    debug_info["jira"]["meta_expand"] = meta_expand
-                if jira_all2:
-                    # Merge into jira_info using same ownership rules
-                    if acct_id:
-                        for k, v in jira_all2.items():
-                            if v.get("assigneeAccountId") == acct_id:
-                                jira_info[k] = {"summary": v.get("summary"), "url": v.get("url")}
-                    elif jira_email:
-                        for k, v in jira_all2.items():
-                            if v.get("assigneeEmail") == jira_email:
-                                jira_info[k] = {"summary": v.get("summary"), "url": v.get("url")}
-                    # If we picked up any new keys, mark ownership verified and refresh debug list
-                    if jira_info:
-                        ownership_verified = True
-                        debug_info["jira_filtered_keys"] = sorted(list(jira_info.keys()))
+            p = pathlib.Path(os.path.expanduser(state_path)).resolve()
+            if p.exists():
+                data = json.loads(p.read_text(encoding="utf-8"))
+                entries = data.get("entries") if isinstance(data, dict) else None
+                if isinstance(entries, list):
+                    for e in entries:
+                        if not isinstance(e, dict):
+                            continue
+                        key = e.get("issue")
+                        u = e.get("until")
+                        if not key or not u:
+                            continue
+                        # Track the max until per issue
+                        prev = last_until_by_issue.get(key)
+                        if not prev or (str(u) > str(prev)):
+                            last_until_by_issue[key] = str(u)
         except Exception:
-            # Non-fatal: proceed without the expansion
-            pass
+            # If state cannot be read, proceed without additional bounding
+            last_until_by_issue = {}
+
+        (commits, scanned, refs, refs_fp, git_hit), timings["git_ms"] = f_commits.result()
+        if git_hit:
+            cache_stats["git"] = "hit"
+        elif refs_fp:
+            pcache["git"] = {"refs": refs_fp, "since": since, "scanned": scanned,
+                             "commits": [[c.sha, c.date, c.subject] for c in commits]}
+        groups = group_commits_by_issue(commits, issue_rx)
+        debug_info["git"]["commits_scanned"] = scanned
+        debug_info["git"]["keys_from_commits"] = sorted(list(groups.keys()))
+
+        (total_seconds, branch_seconds, wdebug), timings["wakatime_ms"] = f_waka.result()
+        debug_info["wakatime"].update(wdebug)
+
+        # Build allocation strictly from WakaTime branches → issue keys. No fabricated splits.
+        proj_entry = _project_entry(cfg, project)
+        # Support either "branchIssues" (preferred) or legacy "branchMapping"
+        bmap = (proj_entry.get("branchIssues") or proj_entry.get("branchMapping") or {}) if isinstance(proj_entry, dict) else {}
+        alloc_by_key, branches_by_key = _allocate_branches(branch_seconds or {}, issue_rx, bmap)
+        # Candidate keys: union of commit keys and WakaTime keys
+        candidate_keys: set[str] = set(groups.keys()) | set(alloc_by_key)
+        debug_info["keys"]["candidate"] = sorted(list(candidate_keys))
+        debug_info["keys"]["from_branches"] = sorted(list(alloc_by_key.keys()))
+
+        # Raw issue fields (assignee, status, updated) from the ownership search
+        jira_meta: Dict[str, Dict[str, Any]] = {}
+        if f_me is not None:
+            (me, me_err, me_cached), timings["whoami_ms"] = f_me.result()
+            if me_cached:
+                debug_info["jira"]["whoami_cached"] = True
+            elif me and me.get("accountId") and use_cache:
+                jcache.setdefault("myself", {})[jira_email] = me["accountId"]
+            debug_info["jira"]["whoami_error"] = me_err
+            debug_info["jira"]["whoami_accountId"] = me.get("accountId") if me else None
+        # Opt-in local worklog mirror: one delta request instead of a worklog list per issue
+        ledger: WorklogLedger | None = None
+        f_ledger = None
+        me_acct = debug_info["jira"].get("whoami_accountId")
+        backend_name = _worklog_backend_name(cfg)
+        since_utc = _to_utc(since)
+        if (has_jira and me_acct and backend_name == "jira" and since_utc is not None
+                and _cfg_flag(cfg, "jira", "worklogLedger", False)):
+            # A new mirror starts at this window: the change feeds cover the whole site
+            ledger = WorklogLedger(state_path, jira_site, me_acct, since_ms=int(since_utc.timestamp() * 1000))
+            f_ledger = pool.submit(_timed, ledger.refresh, jira_email, jira_token)
+        # Tempo backend: the user's worklogs for the whole window in one search
+        f_tempo = None
+        if has_jira and me_acct and backend_name == "tempo":
+            tempo, tempo_err = _worklog_backend(cfg, me_acct)
+            if tempo is not None:
+                f_tempo = pool.submit(_timed, tempo.read, me_acct, since, until)
+            else:
+                debug_info["jira"]["tempo"] = {"error": tempo_err}
+        if has_jira and candidate_keys:
+            # One ownership search over commit- and WakaTime-derived keys together, so
+            # WakaTime-only issues (no commits in the window) are verified as well.
+            # Fetch issues without assignee filter; filter locally by accountId if available.
+            if team_server:
+                # Team mode: the server dedupes metadata lookups across users
+                (jira_all, meta), timings["ownership_ms"] = _timed(team.search_issues, team_server, jira_site, jira_email, jira_token, sorted(candidate_keys))
+            else:
+                # Negative cache of keys Jira rejected (deleted/inaccessible), retried after a day
+                now_ts = time.time()
+                bad_stamps = {k: t for k, t in (jcache.get("bad_keys") or {}).items() if now_ts - float(t or 0) < 86400}
+                bad_keys = set(bad_stamps)
+                (jira_all, meta), timings["ownership_ms"] = _timed(search_issues_noassignee, jira_site, jira_email, jira_token,
+                                                                   sorted(candidate_keys), 10, bad_keys)
+                if use_cache:
+                    jcache["bad_keys"] = {**bad_stamps, **{k: now_ts for k in bad_keys if k not in bad_stamps}}
+            jira_meta.update(jira_all or {})
+            debug_info["jira"]["meta"] = meta
+            acct_id = debug_info["jira"].get("whoami_accountId")
+            if jira_all and acct_id:
+                for k, v in jira_all.items():
+                    if v.get("assigneeAccountId") == acct_id:
+                        jira_info[k] = {"summary": v.get("summary"), "url": v.get("url")}
+            elif jira_all and jira_email:
+                # Fallback to email match if accountId not available
+                for k, v in jira_all.items():
+                    if v.get("assigneeEmail") == jira_email:
+                        jira_info[k] = {"summary": v.get("summary"), "url": v.get("url")}
+            if jira_info:
+                ownership_verified = True
+                groups = {k: v for k, v in groups.items() if k in jira_info}
+                debug_info["jira_filtered_keys"] = sorted(list(jira_info.keys()))
+
+        # If we have candidate keys but have not yet verified ownership, try now
+        if has_jira and candidate_keys and not ownership_verified:
+            # As a last resort, try the previous filtered search (may fail 410 in some setups)
+            keys = sorted(candidate_keys)
+            jira_info2, meta2 = search_issues_debug(jira_site, jira_email, jira_token, keys)
+            if jira_info2:
+                ownership_verified = True
+                groups = {k: v for k, v in groups.items() if k in jira_info2}
+                debug_info["jira_filtered_keys"] = sorted(list(jira_info2.keys()))
+            debug_info["jira"]["meta_fallback"] = meta2
+        debug_info["jira"]["ownership_verified"] = ownership_verified
+
+        final_keys = []
+        for key in sorted(candidate_keys):
+            # Enforce ownership if verified and required by policy
+            if require_ownership and ownership_verified and key not in jira_info:
+                continue
+            if alloc_by_key.get(key, 0.0) <= 0:
+                continue  # Skip keys without WakaTime-backed time
+            final_keys.append(key)
 
-    # If we have WakaTime-derived candidate keys but have not yet verified ownership, try now
-    if jira_site and jira_email and jira_token and candidate_keys and not ownership_verified:
-        # As a last resort, try the previous filtered search (may fail 410 in some setups)
-        keys = sorted(candidate_keys)
-        jira_info2, meta2 = search_issues_debug(jira_site, jira_email, jira_token, keys)
-        if jira_info2:
-            ownership_verified = True
-            groups = {k: v for k, v in groups.items() if k in jira_info2}
-            debug_info["jira_filtered_keys"] = sorted(list(jira_info2.keys()))
-        debug_info["jira"]["meta_fallback"] = meta2
-
-    issues: List[Dict[str, Any]] = []
-    # Build final key set: union of commit keys and WakaTime keys
-    final_keys = sorted(candidate_keys)
-    for key in final_keys:
-        # Enforce ownership if verified and required by policy
-        if require_ownership and ownership_verified and key not in jira_info:
-            continue
-        items = groups.get(key, [])
-        # Also pull commits that are on any WakaTime-observed branches matching this key
-        branch_list = branches_by_key.get(key, [])
-        if branch_list:
-            try:
-                bcommits = get_commits_for_branches(project, branch_list, since, until)
-                if bcommits:
+        acct = debug_info.get("jira", {}).get("whoami_accountId")
+
+        def _branch_commits(key: str) -> Tuple[List[Commit], Dict[str, Any] | None, bool]:
+            # Commits on any WakaTime-observed branches matching this key
+            branch_list = branches_by_key.get(key, [])
+            tips_fp = cache_fingerprint({b: refs.get(f"refs/heads/{b}") for b in branch_list}) if refs_fp else None
+            blog_key = "|".join(sorted(set(branch_list)))
+            cached = _cached_commits((pcache.get("branches") or {}).get(blog_key), tips_fp, since, until)
+            if cached is not None:
+                return cached, None, True
+            bcommits = list(iter_commits_for_branches(project, branch_list, since, until, git_reader))
+            entry = {"refs": tips_fp, "since": since, "commits": [[c.sha, c.date, c.subject] for c in bcommits]} if tips_fp else None
+            return bcommits, entry, False
+
+        def _worklog_rows(key: str) -> Tuple[list, bool, bool, bool]:
+            # Returns (rows, reused, cacheable, exact). Worklogs only change when the
+            # issue's `updated` stamp does; under a time budget stale rows beat a request.
+            updated = (jira_meta.get(key) or {}).get("updated")
+            cached_wl = (jcache.get("issues") or {}).get(key)
+            if isinstance(cached_wl, dict) and ((updated and cached_wl.get("updated") == updated) or budgeted):
+                return cached_wl.get("worklogs") or [], True, True, bool(updated) and cached_wl.get("updated") == updated
+            rows, err = get_worklogs(jira_site, jira_email, jira_token, key)
+            return rows, False, not err, not err
+
+        ledger_ok = False
+        if ledger is not None and f_ledger is not None:
+            ledger_err, timings["ledger_ms"] = f_ledger.result()
+            since_utc = _to_utc(since)
+            ledger_ok = not ledger_err and since_utc is not None and ledger.covers(int(since_utc.timestamp() * 1000))
+            if not ledger_err:
+                ledger.save()
+            debug_info["jira"]["ledger"] = {"error": ledger_err, "worklogs": len(ledger.worklogs), "used": ledger_ok}
+
+        tempo_rows: Dict[str, list] | None = None
+        if f_tempo is not None:
+            (tempo_rows, tempo_err), timings["tempo_ms"] = f_tempo.result()
+            debug_info["jira"]["tempo"] = {"error": tempo_err, "issues": len(tempo_rows or {})}
+
+        def _bulk_issue_id(key: str) -> str | None:
+            # Issue id under which the ledger or Tempo holds this issue's worklogs
+            return (jira_meta.get(key) or {}).get("id") if (ledger_ok or tempo_rows is not None) else None
+
+        f_branches = {k: pool.submit(_timed, _branch_commits, k) for k in final_keys if branches_by_key.get(k)}
+        f_worklogs = {k: pool.submit(_timed, _worklog_rows, k) for k in final_keys
+                      if not _bulk_issue_id(k)} if (acct and has_jira) else {}
+        # Status comes with the ownership search; only fall back to per-issue GETs when missing
+        # (and never under a time budget: status is informational)
+        f_status = {k: pool.submit(_timed, get_issue_status, jira_site, jira_email, jira_token, k)
+                    for k in final_keys if has_jira and not budgeted and not (jira_meta.get(k) or {}).get("status")}
+        timings["prepare_ms"] = int((time.perf_counter() - t_start) * 1000)
+
+        issues: List[Dict[str, Any]] = []
+        for key in final_keys:
+            issue_timings: Dict[str, int] = {}
+            items = list(groups.get(key, []))
+            if key in f_branches:
+                try:
+                    (bcommits, entry, reused), issue_timings["branch_log_ms"] = f_branches[key].result()
+                    if reused:
+                        cache_stats["branch_logs_reused"] += 1
+                    elif entry:
+                        pcache.setdefault("branches", {})["|".join(sorted(set(branches_by_key[key])))] = entry
                     # Merge with items (dedupe by sha)
                     have = {c.sha for c in items}
                     for c in bcommits:
                         if c.sha not in have:
                             items.append(c)
                             have.add(c.sha)
-            except Exception:
-                pass
-        # Filter commit items to only those after the last recorded upload for this issue (if any)
-        last_u = last_until_by_issue.get(key)
-        if last_u:
-            try:
-                # Normalize to timezone-aware UTC for robust comparison
-                last_dt = dt.datetime.fromisoformat(last_u)
-                if last_dt.tzinfo is None:
-                    last_dt = last_dt.replace(tzinfo=dt.datetime.now().astimezone().tzinfo)
-                last_utc = last_dt.astimezone(dt.timezone.utc)
+                except Exception:
+                    pass
+            # Filter commit items to only those after the last recorded upload for this issue (if any)
+            last_utc = _to_utc(last_until_by_issue.get(key))
+            if last_utc:
                 filt: List[Any] = []
                 for c in items:
-                    try:
-                        cd = dt.datetime.fromisoformat(c.date)
-                        if cd.tzinfo is None:
-                            cd = cd.replace(tzinfo=dt.datetime.now().astimezone().tzinfo)
-                        cd_utc = cd.astimezone(dt.timezone.utc)
-                        if cd_utc > last_utc:
-                            filt.append(c)
-                    except Exception:
-                        # If parsing fails, keep the commit (avoid hiding data)
+                    cd_utc = _to_utc(c.date)
+                    # If parsing fails, keep the commit (avoid hiding data)
+                    if cd_utc is None or cd_utc > last_utc:
                         filt.append(c)
                 items = filt
-            except Exception:
-                pass
-        seconds = alloc_by_key.get(key, 0.0)
-        if seconds <= 0:
-            continue  # Skip keys without WakaTime-backed time
-        url = jira_info.get(key, {}).get("url") if jira_info else (f"{jira_site.rstrip('/')}/browse/{key}" if jira_site else None)
-        summary = jira_info.get(key, {}).get("summary") if jira_info else None
-        # Determine already logged seconds for current user in period
-        already = 0
-        acct = debug_info.get("jira", {}).get("whoami_accountId")
-        if acct and jira_site and jira_email and jira_token:
-            logged, _err = get_my_worklog_seconds(jira_site, jira_email, jira_token, key, acct, since, until)
-            already = int(logged or 0)
-        delta = max(0, int(round(seconds)) - already)
-        comment_lines: List[str] = []
-        seen: set[str] = set()
-        for c in items:
-            subj = c.subject.strip()
-            if subj and subj not in seen:
-                comment_lines.append(subj)
-                seen.add(subj)
-            if len(comment_lines) >= 5:
-                break
-        # Fetch current status (best-effort) for preview/debug
-        status_name = None
-        if jira_site and jira_email and jira_token:
-            try:
-                status_name, _se = get_issue_status(jira_site, jira_email, jira_token, key)
-            except Exception:
-                status_name = None
-        # Track last commit time for startedPolicy=lastCommit
-        last_commit_iso = None
-        for c in items:
-            try:
-                if last_commit_iso is None or c.date > last_commit_iso:
-                    last_commit_iso = c.date
-            except Exception:
-                pass
-
-        issues.append({
-            "key": key,
-            "url": url,
-            "summary": summary,
-            "seconds": int(round(seconds)),
-            "already_logged": already,
-            "delta": delta,
-            "comment": comment_lines,
-            "commits": [c.sha for c in items],
-            "status": status_name,
-            "last_commit": last_commit_iso,
-        })
+            seconds = alloc_by_key.get(key, 0.0)
+            url = jira_info.get(key, {}).get("url") if jira_info else (f"{jira_site.rstrip('/')}/browse/{key}" if jira_site else None)
+            summary = jira_info.get(key, {}).get("summary") if jira_info else None
+            # Determine already logged seconds for current user in period
+            already = 0
+            partial = False
+            if key in f_worklogs:
+                (rows, reused, cacheable, exact), issue_timings["worklogs_ms"] = f_worklogs[key].result()
+                partial = not exact
+                updated = (jira_meta.get(key) or {}).get("updated")
+                if reused:
+                    cache_stats["worklogs_reused"] += 1
+                else:
+                    cache_stats["worklogs_fetched"] += 1
+                    if updated and cacheable and use_cache:
+                        jcache.setdefault("issues", {})[key] = {"updated": updated, "worklogs": rows}
+                already = int(sum_my_worklog_seconds(rows, acct, since, until) or 0)
+            elif tempo_rows is not None and acct and _bulk_issue_id(key):
+                cache_stats["worklogs_tempo"] = cache_stats.get("worklogs_tempo", 0) + 1
+                already = int(sum_my_worklog_seconds(tempo_rows.get(str(_bulk_issue_id(key)), []), acct, since, until) or 0)
+            elif ledger is not None and acct and _bulk_issue_id(key):
+                cache_stats["worklogs_ledger"] = cache_stats.get("worklogs_ledger", 0) + 1
+                already = int(sum_my_worklog_seconds(ledger.rows_for_issue(_bulk_issue_id(key)), acct, since, until) or 0)
+            elif has_jira and budgeted:
+                partial = True  # account lookup did not finish within the budget
+            delta = max(0, int(round(seconds)) - already)
+            comment_lines: List[str] = []
+            seen: set[str] = set()
+            for c in items:
+                subj = c.subject.strip()
+                if subj and subj not in seen:
+                    comment_lines.append(subj)
+                    seen.add(subj)
+                if len(comment_lines) >= 5:
+                    break
+            # Current status (best-effort) for preview/debug
+            status_name = (jira_meta.get(key) or {}).get("status")
+            if key in f_status:
+                try:
+                    (status_name, _se), issue_timings["status_ms"] = f_status[key].result()
+                except Exception:
+                    status_name = None
+            # Track last commit time for startedPolicy=lastCommit
+            last_commit_iso = None
+            for c in items:
+                try:
+                    if last_commit_iso is None or c.date > last_commit_iso:
+                        last_commit_iso = c.date
+                except Exception:
+                    pass
+
+            issue_obj = {
+                "key": key,
+                "issue_id": (jira_meta.get(key) or {}).get("id"),
+                "url": url,
+                "summary": summary,
+                "seconds": int(round(seconds)),
+                "already_logged": already,
+                "delta": delta,
+                "comment": comment_lines,
+                "commits": [c.sha for c in items],
+                "status": status_name,
+                "last_commit": last_commit_iso,
+                "timings": issue_timings,
+            }
+            if partial:
+                issue_obj["partial"] = True
+            issues.append(issue_obj)
+            if on_issue is not None:
+                on_issue(issue_obj)
+    finally:
+        pool.shutdown(wait=True)
+        out_of_time = budgeted and (http.remaining() or 0.0) <= 0
+        if deadline_token is not None:
+            http.reset_deadline(deadline_token)
+
+    if use_cache:
+        cache_save(state_path, pcache_name, pcache)
+        if jira_site:
+            cache_save(state_path, jcache_name, jcache)
 
     notes: List[str] = []
     if require_ownership and not ownership_verified:
@@ -676,8 +1168,29 @@ def _build_preview(period: str | None, project: str, wakatime_file: str | None,
             if errs:
                 msg += f" Error: {errs[0]['error']}"
         notes.append(msg)
+    # Failed WakaTime requests leave time out of the totals: upload what was found, but the
+    # window must be synced again, so last_sync is not advanced (`_may_advance_last_sync`)
+    wakatime_error = None if debug_info["wakatime"].get("complete", True) else (debug_info["wakatime"].get("error") or "WakaTime fetch incomplete")
+    if wakatime_error:
+        notes.append(f"{wakatime_error}; tracked time may be missing, so this window will be synced again.")
     if not alloc_by_key:
         notes.append("No WakaTime branch matches found for issue keys; no time allocated.")
+    partial_keys = [i["key"] for i in issues if i.get("partial")]
+    if out_of_time:
+        notes.append("Time budget exhausted; some lookups were skipped.")
+    if partial_keys:
+        notes.append(f"Partial results: already-logged time is uncertain for {', '.join(partial_keys)}; these are not uploaded.")
+    if http.breaker() is not None:
+        open_hosts = [h for h, v in http.breaker().state().items() if float(v.get("open_until") or 0) > time.time()]
+        if open_hosts:
+            reset_hint = f"; delete {http.breaker().path} to retry sooner" if http.breaker().path else ""
+            notes.append(f"Circuit open (repeated failures), not contacting: {', '.join(sorted(open_hosts))}{reset_hint}")
+        debug_info["http"] = {"breaker": http.breaker().state()}
+    timings["total_ms"] = int((time.perf_counter() - t_start) * 1000)
+
+    if team_server and issues:
+        shared = {"since": since, "until": until, "issues": [{k: v for k, v in i.items() if k != "comment"} for i in issues]}
+        debug_info["team"] = {"server": team_server, "submit_error": team.submit_preview(team_server, jira_site, jira_email, jira_token, project, shared)}
 
     return {
         "period": period,
@@ -688,12 +1201,21 @@ def _build_preview(period: str | None, project: str, wakatime_file: str | None,
         "issues": issues,
         "notes": notes,
         "ownership_verified": ownership_verified,
+        "account_id": debug_info["jira"].get("whoami_accountId"),
         "candidate_keys": debug_info["keys"]["candidate"],
         "allocation": {k: int(round(v)) for k, v in alloc_by_key.items()},
+        "timings": timings,
+        "partial": bool(partial_keys) or out_of_time,
+        "wakatime_error": wakatime_error,
         "debug": debug_info,
     }
 
 
+def _may_advance_last_sync(preview: Dict[str, Any], result: Dict[str, Any] | None) -> bool:
+    """Whether a sync covered its window: uploads succeeded and WakaTime returned every day."""
+    return not (result or {}).get("errors") and not preview.get("wakatime_error")
+
+
 def handle_start(args: argparse.Namespace) -> int:
     cfg_path = _default_config_path()
     existing = load_config(cfg_path)
@@ -742,104 +1264,79 @@ def handle_start(args: argparse.Namespace) -> int:
     return 0
 
 
-def handle_sync(args: argparse.Namespace) -> int:
-    cfg = load_config(_default_config_path())
-    if not isinstance(cfg, dict):
-        cfg = {}
-    # Safely access args attributes (top-level default to sync may omit subparser args)
-    period = getattr(args, "period", None)
-    is_test = bool(getattr(args, "test", False))
-    debug = bool(getattr(args, "debug", False))
-    # Require per-repo mapping for all syncs; no auto-detect or fallback.
-    project_path = os.path.abspath(os.path.expanduser(getattr(args, "project", None) or os.getcwd()))
-    mapped = _project_mapping(cfg, project_path)
-    if not mapped:
-        print("This repo is not configured for Skuld.\nRun `skuld add` in this repo to map it to a WakaTime project (and optional Jira key).")
-        return 2
-    # Determine window: if no period provided, sync since last sync
-    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
-    since_override = None
-    until_override = None
-    if not period:
-        now = dt.datetime.now()
-        last = state_get_last_sync(state_path, project_path)
-        if not last:
-            # First-run fallback: last 24h window
-            last = (now - dt.timedelta(hours=24)).replace(microsecond=0).isoformat()
-        since_override = last
-        until_override = now.replace(microsecond=0).isoformat()
-    preview = _build_preview(period, project_path, getattr(args, "wakatime_file", None), cfg, since_override, until_override)
+def _sync_window(state_path: str, project_path: str, period: str | None) -> Tuple[str | None, str | None]:
+    """Return (since, until) overrides for an incremental sync, or (None, None) for a named period."""
+    if period:
+        return None, None
+    now = dt.datetime.now()
+    last = state_get_last_sync(state_path, project_path)
+    if not last:
+        # First-run fallback: last 24h window
+        last = (now - dt.timedelta(hours=24)).replace(microsecond=0).isoformat()
+    return last, now.replace(microsecond=0).isoformat()
+
+
+def _plan_name(project_path: str) -> str:
+    return f"plan-{cache_slot(project_path)}.json"
 
+
+def _plan_fingerprint(cfg: Dict[str, Any], state_path: str, project_path: str, period: str | None,
+                      wakatime_file: str | None) -> str:
+    """Hash of the local inputs a dry-run plan depends on; Jira/WakaTime drift is bounded by the TTL."""
+    return cache_fingerprint({
+        "project": project_path,
+        "period": period,
+        "last_sync": state_get_last_sync(state_path, project_path),
+        "refs": ref_fingerprint(project_path, _git_reader(cfg, project_path)),
+        "config": cache_fingerprint(cfg),
+        "wakatime_file": wakatime_file,
+    })
+
+
+def _sync_preview(args: argparse.Namespace, cfg: Dict[str, Any], state_path: str, project_path: str,
+                  period: str | None, since_override: str | None, until_override: str | None,
+                  on_issue: Callable[[Dict[str, Any]], None] | None = None) -> Tuple[Dict[str, Any] | None, bool]:
+    """Build the preview for `sync`, or reuse the plan saved by a recent `sync --test`.
+
+    `--test` persists its preview with a fingerprint of its inputs. A following real sync
+    uploads from that plan when `--apply-plan` is given (or `sync.reusePlan: true`), the
+    fingerprint still matches and the plan is younger than `sync.planTtl` seconds (default 600).
+    Returns (preview, reused); preview is None when `--apply-plan` found no usable plan.
+    """
+    is_test = bool(getattr(args, "test", False))
+    apply_plan = bool(getattr(args, "apply_plan", False))
+    wakatime_file = getattr(args, "wakatime_file", None)
+    sync_cfg = cfg.get("sync") if isinstance(cfg.get("sync"), dict) else {}
+    ttl_raw = sync_cfg.get("planTtl") if isinstance(sync_cfg, dict) else None
+    try:
+        ttl = float(ttl_raw if ttl_raw is not None else (cfg.get("sync.planTtl") or 600))
+    except Exception:
+        ttl = 600.0
+    fp = _plan_fingerprint(cfg, state_path, project_path, period, wakatime_file)
+    if not is_test and (apply_plan or _cfg_flag(cfg, "sync", "reusePlan", False)):
+        plan = cache_load(state_path, _plan_name(project_path))
+        fresh = time.time() - float(plan.get("created") or 0) <= ttl
+        if plan.get("fingerprint") == fp and fresh and isinstance(plan.get("preview"), dict):
+            preview = plan["preview"]
+            if on_issue is not None:
+                for issue in preview.get("issues") or []:
+                    on_issue(issue)
+            return preview, True
+        if apply_plan:
+            return None, False
+    preview = _build_preview(period, project_path, wakatime_file, cfg, since_override, until_override, on_issue=on_issue)
     if is_test:
-        # Printer: follow docs/printer.md formatting
-        print("Worklog Preview (dry-run)")
-        print(f"Period: {preview['since']} → {preview['until']}")
-        total_all = preview.get("wakatime_seconds", 0)
-        for n in preview.get("notes", []) or []:
-            print(f"Note: {n}")
-        if not preview["issues"]:
-            if not preview.get("ownership_verified"):
-                print("No issues to show because Jira ownership verification failed.")
-            elif not preview.get("allocation"):
-                print("No WakaTime branch matches for any issue keys in this period.")
-            else:
-                print("No issue keys found in commit messages for this period.")
-            if total_all:
-                print(f"Unattributed WakaTime total: {format_seconds(total_all)}")
-            if debug:
-                print("\n[DEBUG] Details:")
-                print(json.dumps(preview.get("debug", {}), indent=2))
-            return 0
-        if debug:
-            print("\n[DEBUG] Issues in preview (key → seconds):")
-            print(json.dumps({i["key"]: i["seconds"] for i in preview["issues"]}, indent=2))
-            print("\n[DEBUG] Full details:")
-            print(json.dumps(preview.get("debug", {}), indent=2))
-        now = dt.datetime.now()
-        date_str = format_date(now)
-        time_str = format_time(now)
-        sep = "-" * 89
-        printed_any = False
-        for issue in preview["issues"]:
-            seconds = int(issue.get("seconds", 0))
-            already = int(issue.get("already_logged", 0))
-            delta = int(issue.get("delta", seconds))
-            if delta <= 0:
-                continue
-            # Use Jira summary when available (preferred)
-            name = issue.get("summary")
-            lines = issue.get("comment", []) or []
-            print(sep)
-            print(f"Issue: {issue['key']}")
-            print(f"Name:  {name or ''}")
-            status = (issue.get("status") or "Unknown").strip()
-            print(f"Status: {status}")
-            if status.lower() in ("to do", "todo"):
-                print("Next: Will transition to 'In Progress' on upload.")
-            print(f"Time to add:  {format_seconds(delta)}")
-            print(f"Total Time: {format_seconds(seconds)}")
-            if already:
-                print(f"Already Logged: {format_seconds(already)}")
-            print("Comment:")
-            print(f"  [SKULD] - Adding `{format_seconds(delta)}` on `{date_str}` at `{time_str}`  ")
-            for ln in lines[:5]:
-                print(f"  - {ln}")
-            printed_any = True
-        if not printed_any:
-            print("Nothing to add — all covered by existing Jira worklogs.")
-        print(sep)
-        return 0
+        cache_save(state_path, _plan_name(project_path), {"created": time.time(), "fingerprint": fp, "preview": preview})
+    return preview, False
 
-    # Apply mode: upload Jira worklogs for positive deltas only, idempotently.
-    # Respect ownership policy: if ownership is required but not verified, abort.
-    policy = (preview.get("debug", {}) or {}).get("policy", {}) if isinstance(preview, dict) else {}
-    require_ownership = bool(policy.get("require_ownership", True))
-    if require_ownership and not preview.get("ownership_verified"):
-        print("Aborting: Jira ownership verification failed; not uploading.")
-        return 2
 
-    # state_path already resolved above
+def _upload_preview(cfg: Dict[str, Any], preview: Dict[str, Any], state_path: str,
+                    log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Upload Jira worklogs for positive deltas in a preview, idempotently.
 
+    Returns {"uploaded": [...], "skipped": [...], "errors": [...], "issue_comments": bool}.
+    Progress notes (status transitions) go through `log`.
+    """
     # Resolve worklog start timestamp policy
     now = dt.datetime.now().astimezone()
     date_str = format_date(now)
@@ -885,24 +1382,99 @@ def handle_sync(args: argparse.Namespace) -> int:
     uploaded = []
     skipped = []
     errors = []
+    _configure_http(cfg, state_path)
+    # Posted worklogs go straight into the ledger: Jira's change feed lags by about a minute
+    ledger: WorklogLedger | None = None
     # Extract Jira auth once
     jira_site = (cfg.get("jira") or {}).get("site") if isinstance(cfg.get("jira"), dict) else cfg.get("jira.site")
     jira_email = (cfg.get("jira") or {}).get("email") if isinstance(cfg.get("jira"), dict) else cfg.get("jira.email")
     jira_token = (cfg.get("jira") or {}).get("apiToken") if isinstance(cfg.get("jira"), dict) else cfg.get("jira.apiToken")
 
+    # Where worklogs go (`jira.worklogBackend`); Tempo creates them for the previewed account
+    account_id = preview.get("account_id")
+    if not account_id and _worklog_backend_name(cfg) == "tempo" and jira_site:
+        me, _me_err = get_myself(jira_site, jira_email, jira_token)
+        account_id = (me or {}).get("accountId")
+    backend, backend_err = _worklog_backend(cfg, account_id)
+
+    # Consolidation: grow the worklog skuld already posted for the issue that day (PUT)
+    # instead of adding another one. Opt-in via `jira.consolidateWorklogs: true`; Jira only.
+    consolidate = _cfg_flag(cfg, "jira", "consolidateWorklogs", False) and backend is not None and backend.name == "jira"
+
+    def _merge_into_day_worklog(key: str, delta: int, started: dt.datetime, comment: str):
+        worklog_id = state_find_day_worklog(state_path, key, started.date().isoformat())
+        if not worklog_id:
+            return None
+        current, gerr = get_worklog(jira_site, jira_email, jira_token, key, worklog_id)
+        if gerr or not isinstance(current, dict):
+            return None  # deleted or unreadable: post a fresh worklog instead
+        total = int(current.get("timeSpentSeconds") or 0) + int(delta)
+        data, err = update_worklog(jira_site, jira_email, jira_token, key, worklog_id, total,
+                                   merge_adf(current.get("comment"), comment))
+        if err:
+            log(f"Note: could not update worklog {worklog_id} on {key}: {err}; posting a new one")
+            return None
+        return data
+
     # Whether to post separate Jira issue comments (configurable; default disabled)
     comment_cfg = cfg.get("comment") if isinstance(cfg.get("comment"), dict) else {}
     issue_comment_enabled = bool((comment_cfg.get("issueCommentsEnabled") if isinstance(comment_cfg, dict) else None) or (cfg.get("comment.issueCommentsEnabled") or False))
 
+    def _finish(item: Dict[str, Any], data: Any, err: str | None, merged: bool = False) -> None:
+        # Runs as soon as a worklog is confirmed, so state is recorded per worklog
+        nonlocal ledger
+        key = item["key"]
+        unfinished.pop(id(item), None)
+        if err:
+            errors.append({"key": key, "error": err})
+            state_release(state_path, key, preview["since"], preview["until"], item["seconds"])
+            return
+        worklog_id = (data or {}).get("id") if isinstance(data, dict) else None
+        author = ((data or {}).get("author") or {}).get("accountId") if isinstance(data, dict) else None
+        if author and jira_site and _cfg_flag(cfg, "jira", "worklogLedger", False):
+            if ledger is None:
+                ledger = WorklogLedger(state_path, jira_site, author)
+            # Only extend a mirror a preview already started; never create one here
+            if not ledger.fresh:
+                ledger.add(data)
+        state_record(state_path, key, preview["since"], preview["until"], item["seconds"],
+                     worklog_id=str(worklog_id) if worklog_id else None, started=item["started"].isoformat())
+        comment_id = None
+        if issue_comment_enabled:
+            # Optional: add an issue comment mirroring the worklog note
+            cdata, cerr = add_comment(
+                site=jira_site,
+                email=jira_email,
+                api_token=jira_token,
+                key=key,
+                comment_text=item["comment"],
+            )
+            if cerr:
+                errors.append({"key": key, "error": f"comment: {cerr}"})
+            comment_id = (cdata or {}).get("id") if isinstance(cdata, dict) else None
+        uploaded.append({"key": key, "seconds": item["seconds"], "worklog_id": worklog_id, "comment_id": comment_id,
+                         "merged": merged})
+
+    pending: List[Dict[str, Any]] = []
+    # Items reserved in state but not finished yet; released if the backend never reports them
+    unfinished: Dict[int, Dict[str, Any]] = {}
     for issue in preview["issues"]:
         seconds = int(issue.get("seconds", 0))
         delta = int(issue.get("delta", seconds))
         if delta <= 0:
             skipped.append({"key": issue["key"], "reason": "no_delta"})
             continue
+        if issue.get("partial"):
+            # Already-logged time was not confirmed (time budget or Jira failures); never guess
+            skipped.append({"key": issue["key"], "reason": "partial"})
+            continue
 
-        # Idempotency: if we already recorded this exact (issue, window, delta), skip
-        if state_seen(state_path, issue["key"], preview["since"], preview["until"], delta):
+        if backend is None:
+            errors.append({"key": issue["key"], "error": backend_err})
+            continue
+        # Idempotency: skip if this exact (issue, window, delta) was recorded, or another
+        # sync is uploading it right now; otherwise claim it in the same locked update
+        if not state_reserve(state_path, issue["key"], preview["since"], preview["until"], delta):
             skipped.append({"key": issue["key"], "reason": "already_recorded"})
             continue
 
@@ -924,9 +1496,9 @@ def handle_sync(args: argparse.Namespace) -> int:
                 key=issue["key"],
             )
             if terr:
-                print(f"Note: could not transition {issue['key']} to 'In Progress': {terr}")
+                log(f"Note: could not transition {issue['key']} to 'In Progress': {terr}")
             elif changed:
-                print(f"Transitioned {issue['key']} → {new_status or 'In Progress'}")
+                log(f"Transitioned {issue['key']} → {new_status or 'In Progress'}")
                 # Append explicit status update note to both worklog and issue comments
                 if prior_status:
                     ns = (new_status or 'In Progress')
@@ -936,43 +1508,370 @@ def handle_sync(args: argparse.Namespace) -> int:
             pass
 
         started_dt = _resolve_started(issue)
-        data, err = add_worklog(
-            site=jira_site,
-            email=jira_email,
-            api_token=jira_token,
-            key=issue["key"],
-            seconds=delta,
-            started=started_dt,
-            comment=comment,
-        )
-        if err:
-            errors.append({"key": issue["key"], "error": err})
-            continue
-        worklog_id = (data or {}).get("id") if isinstance(data, dict) else None
-        state_record(state_path, issue["key"], preview["since"], preview["until"], delta, worklog_id=str(worklog_id) if worklog_id else None)
-        comment_id = None
-        if issue_comment_enabled:
-            # Optional: add an issue comment mirroring the worklog note
-            cdata, cerr = add_comment(
-                site=jira_site,
-                email=jira_email,
-                api_token=jira_token,
-                key=issue["key"],
-                comment_text=comment,
-            )
-            if cerr:
-                errors.append({"key": issue["key"], "error": f"comment: {cerr}"})
-            comment_id = (cdata or {}).get("id") if isinstance(cdata, dict) else None
-        uploaded.append({"key": issue["key"], "seconds": delta, "worklog_id": worklog_id, "comment_id": comment_id})
+        item = {"key": issue["key"], "issue_id": issue.get("issue_id"), "seconds": delta, "started": started_dt,
+                "comment": comment}
+        unfinished[id(item)] = item
+        merged = _merge_into_day_worklog(issue["key"], delta, started_dt, comment) if consolidate else None
+        if merged is not None:
+            _finish(item, merged, None, merged=True)
+        else:
+            pending.append(item)
+
+    # Jira posts one worklog per request; Tempo bulk-creates them per issue
+    try:
+        if pending and backend is not None:
+            backend.submit(pending, _finish)
+    finally:
+        for item in unfinished.values():
+            state_release(state_path, item["key"], preview["since"], preview["until"], item["seconds"])
+
+    if ledger is not None and not ledger.fresh:
+        ledger.save()
+    return {"uploaded": uploaded, "skipped": skipped, "errors": errors, "issue_comments": issue_comment_enabled}
+
+
+def _emit(obj: Dict[str, Any]) -> None:
+    """Write one JSON document on its own line and flush (NDJSON streaming)."""
+    print(json.dumps(obj, default=str), flush=True)
+
+
+def _sync_machine_output(args: argparse.Namespace, cfg: Dict[str, Any], state_path: str, project_path: str,
+                         period: str | None, since_override: str | None, until_override: str | None,
+                         out_format: str) -> int:
+    """`sync --format json|ndjson`: stream per-issue results, then a summary (and upload result)."""
+    is_test = bool(getattr(args, "test", False))
+    debug = bool(getattr(args, "debug", False))
+    streaming = out_format == "ndjson"
+
+    def _on_issue(issue: Dict[str, Any]) -> None:
+        if streaming:
+            _emit({"type": "issue", "project": project_path, **issue})
+
+    preview, reused = _sync_preview(args, cfg, state_path, project_path, period, since_override, until_override,
+                                    on_issue=_on_issue)
+    if preview is None:
+        err = {"type": "error", "project": project_path, "error": "no_reusable_plan"}
+        if streaming:
+            _emit(err)
+        else:
+            err.pop("type")
+            print(json.dumps(err, indent=2))
+        return 2
+    summary = {
+        "type": "summary",
+        "project": project_path,
+        "since": preview["since"],
+        "until": preview["until"],
+        "dry_run": is_test,
+        "wakatime_seconds": preview.get("wakatime_seconds", 0),
+        "ownership_verified": preview.get("ownership_verified"),
+        "allocation": preview.get("allocation", {}),
+        "notes": preview.get("notes", []),
+        "timings": preview.get("timings", {}),
+        "plan_reused": reused,
+    }
+    if debug:
+        summary["debug"] = preview.get("debug", {})
+    result: Dict[str, Any] | None = None
+    exit_code = 0
+    if not is_test:
+        policy = (preview.get("debug", {}) or {}).get("policy", {})
+        if bool(policy.get("require_ownership", True)) and not preview.get("ownership_verified"):
+            summary["aborted"] = "ownership_verification_failed"
+            exit_code = 2
+        else:
+            t0 = time.perf_counter()
+            result = _upload_preview(cfg, preview, state_path, log=lambda m: print(m, file=sys.stderr))
+            cache_clear(state_path, _plan_name(project_path))
+            result.pop("issue_comments", None)
+            summary["timings"]["upload_ms"] = int((time.perf_counter() - t0) * 1000)
+            exit_code = 1 if result["errors"] else 0
+            if _may_advance_last_sync(preview, result):
+                try:
+                    state_set_last_sync(state_path, project_path, preview.get("until"))
+                except Exception:
+                    pass
+    if streaming:
+        if result is not None:
+            _emit({"type": "upload", "project": project_path, **result})
+        _emit(summary)
+    else:
+        summary.pop("type", None)
+        summary["issues"] = preview.get("issues", [])
+        if result is not None:
+            summary["upload"] = result
+        print(json.dumps(summary, indent=2, default=str))
+    return exit_code
+
+
+def _cfg_override(cfg: Dict[str, Any], section: str, key: str, value: Any) -> None:
+    """Set `section.key` in whichever shape (nested or dotted) the config uses."""
+    if isinstance(cfg.get(section), dict):
+        cfg[section] = {**cfg[section], key: value}
+    else:
+        cfg[f"{section}.{key}"] = value
+
+
+def _sync_with_cassette(args: argparse.Namespace, cfg: Dict[str, Any]) -> int:
+    """`sync --record FILE` / `sync --replay FILE`: capture or re-serve all Jira/WakaTime traffic.
+
+    Caches, the worklog ledger and plan reuse are off for both, so the same requests
+    are made every time. Replays are always dry-runs over the recorded window.
+    """
+    record, replay = getattr(args, "record", None), getattr(args, "replay", None)
+    if record and replay:
+        print("Use either --record or --replay, not both.")
+        return 2
+    cfg = dict(cfg)
+    _cfg_override(cfg, "cache", "enabled", False)
+    _cfg_override(cfg, "jira", "worklogLedger", False)
+    _cfg_override(cfg, "sync", "reusePlan", False)
+    project_path = os.path.abspath(os.path.expanduser(getattr(args, "project", None) or os.getcwd()))
+    project_path = _project_lookup(cfg, project_path)[0] or project_path
+    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
+    jira = cfg.get("jira") if isinstance(cfg.get("jira"), dict) else {}
+    wk = cfg.get("wakatime") if isinstance(cfg.get("wakatime"), dict) else {}
+    tempo_cfg = cfg.get("tempo") if isinstance(cfg.get("tempo"), dict) else {}
+    secrets = [str(v) for v in (jira.get("apiToken"), cfg.get("jira.apiToken"), wk.get("apiKey"),
+                                cfg.get("wakatime.apiKey"), discover_api_key(), tempo_cfg.get("apiToken"),
+                                cfg.get("tempo.apiToken")) if v]
+    if replay:
+        try:
+            tape = http.Cassette.load(pathlib.Path(os.path.expanduser(replay)), secrets=secrets,
+                                      speed=float(1.0 if getattr(args, "replay_speed", None) is None else args.replay_speed))
+        except Exception as e:
+            print(f"Cannot read cassette {replay}: {e}")
+            return 2
+        args.test = True
+        args.apply_plan = False
+        window = (tape.meta.get("since"), tape.meta.get("until"))
+        window = window if all(window) else _sync_window(state_path, project_path, getattr(args, "period", None))
+    else:
+        window = _sync_window(state_path, project_path, getattr(args, "period", None))
+        tape = http.Cassette(pathlib.Path(os.path.expanduser(record)), secrets=secrets,
+                             meta={"project": project_path, "since": window[0], "until": window[1],
+                                   "period": getattr(args, "period", None), "version": __version__})
+    http.use_cassette(tape)
+    try:
+        rc = handle_sync(args, cfg=cfg, window=window)
+    finally:
+        http.use_cassette(None)
+    if replay:
+        st = tape.stats
+        print(f"Replayed {st['served']} of {len(tape.interactions)} recorded request(s)"
+              f" ({st['fallback']} matched by path only, {st['missing']} unmatched) at speed {tape.speed:g}.", file=sys.stderr)
+    else:
+        tape.save()
+        print(f"Recorded {len(tape.interactions)} request(s) to {tape.path}", file=sys.stderr)
+    return rc
+
+
+class _ProgressLine:
+    """Live status line on stderr while a preview runs (TTY only).
+
+    Shows how many issues are ready and which hosts have requests in flight. Output
+    printed inside `hold()` clears the line first, so it never interleaves with it.
+    """
+
+    SPIN = "|/-\\"
+
+    def __init__(self, stream: Any = None, interval: float = 0.1):
+        self.stream = stream or sys.stderr
+        self.enabled = bool(getattr(self.stream, "isatty", lambda: False)())
+        self.interval = interval
+        self.ready = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._tick = 0
+
+    def __enter__(self) -> "_ProgressLine":
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        if self.enabled:
+            self.stream.write("\r\x1b[2K")
+            self.stream.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            hosts = http.in_flight()
+            waiting = sum(hosts.values())
+            busy = ", ".join(f"{h} ×{n}" if n > 1 else h for h, n in sorted(hosts.items()))
+            self._tick += 1
+            text = (f"{self.SPIN[self._tick % len(self.SPIN)]} {self.ready} issue(s) ready · "
+                    + (f"{waiting} request(s) in flight: {busy}" if waiting else "working locally")
+                    + f" · {time.monotonic() - self._started:.1f}s")
+            width = shutil.get_terminal_size((100, 20)).columns - 1
+            with self._lock:
+                self._clear()
+                self.stream.write(text[:width])
+                self.stream.flush()
+
+    @contextlib.contextmanager
+    def hold(self) -> Iterator[None]:
+        with self._lock:
+            self._clear()
+            yield
+            sys.stdout.flush()
+
+
+def _print_issue_block(issue: Dict[str, Any], date_str: str, time_str: str, sep: str) -> bool:
+    """Print one preview issue per docs/printer.md; False when it has nothing to add."""
+    seconds = int(issue.get("seconds", 0))
+    already = int(issue.get("already_logged", 0))
+    delta = int(issue.get("delta", seconds))
+    if delta <= 0:
+        return False
+    # Use Jira summary when available (preferred)
+    name = issue.get("summary")
+    lines = issue.get("comment", []) or []
+    print(sep)
+    print(f"Issue: {issue['key']}")
+    print(f"Name:  {name or ''}")
+    status = (issue.get("status") or "Unknown").strip()
+    print(f"Status: {status}")
+    if status.lower() in ("to do", "todo"):
+        print("Next: Will transition to 'In Progress' on upload.")
+    print(f"Time to add:  {format_seconds(delta)}")
+    print(f"Total Time: {format_seconds(seconds)}")
+    if issue.get("partial"):
+        print("Already Logged: unconfirmed (partial result; will not be uploaded)")
+    elif already:
+        print(f"Already Logged: {format_seconds(already)}")
+    print("Comment:")
+    print(f"  [SKULD] - Adding `{format_seconds(delta)}` on `{date_str}` at `{time_str}`  ")
+    for ln in lines[:5]:
+        print(f"  - {ln}")
+    return True
+
+
+def _sync_test_output(args: argparse.Namespace, cfg: Dict[str, Any], state_path: str, project_path: str,
+                      period: str | None, since_override: str | None, until_override: str | None) -> int:
+    """`sync --test` printer: issues are printed as soon as each one is computed.
+
+    `_build_preview` resolves issues concurrently and hands them over in key order, so
+    the first block appears after one issue rather than the whole run. Notes and debug
+    output follow the issues because they depend on the complete result.
+    """
+    debug = bool(getattr(args, "debug", False))
+    since, until = (since_override, until_override) if since_override and until_override else _period_bounds(period or "today")
+    # Printer: follow docs/printer.md formatting
+    print("Worklog Preview (dry-run)")
+    print(f"Period: {since} → {until}", flush=True)
+    now = dt.datetime.now()
+    date_str = format_date(now)
+    time_str = format_time(now)
+    sep = "-" * 89
+    printed: List[str] = []
+
+    with _ProgressLine() as progress:
+        def _on_issue(issue: Dict[str, Any]) -> None:
+            progress.ready += 1
+            with progress.hold():
+                if _print_issue_block(issue, date_str, time_str, sep):
+                    printed.append(issue["key"])
+
+        preview, _reused = _sync_preview(args, cfg, state_path, project_path, period, since_override, until_override,
+                                         on_issue=_on_issue)
+
+    total_all = preview.get("wakatime_seconds", 0)
+    for n in preview.get("notes", []) or []:
+        print(f"Note: {n}")
+    if not preview["issues"]:
+        if not preview.get("ownership_verified"):
+            print("No issues to show because Jira ownership verification failed.")
+        elif not preview.get("allocation"):
+            print("No WakaTime branch matches for any issue keys in this period.")
+        else:
+            print("No issue keys found in commit messages for this period.")
+        if total_all:
+            print(f"Unattributed WakaTime total: {format_seconds(total_all)}")
+        if debug:
+            print("\n[DEBUG] Details:")
+            print(json.dumps(preview.get("debug", {}), indent=2))
+        return 0
+    if not printed:
+        print("Nothing to add — all covered by existing Jira worklogs.")
+    print(sep)
+    if debug:
+        print("\n[DEBUG] Issues in preview (key → seconds):")
+        print(json.dumps({i["key"]: i["seconds"] for i in preview["issues"]}, indent=2))
+        print("\n[DEBUG] Full details:")
+        print(json.dumps(preview.get("debug", {}), indent=2))
+    return 0
+
+
+def handle_sync(args: argparse.Namespace, cfg: Dict[str, Any] | None = None,
+                window: Tuple[str, str] | None = None) -> int:
+    if cfg is None:
+        cfg = load_config(_default_config_path())
+        if not isinstance(cfg, dict):
+            cfg = {}
+        if getattr(args, "record", None) or getattr(args, "replay", None):
+            return _sync_with_cassette(args, cfg)
+    # Safely access args attributes (top-level default to sync may omit subparser args)
+    period = getattr(args, "period", None)
+    is_test = bool(getattr(args, "test", False))
+    debug = bool(getattr(args, "debug", False))
+    # Require per-repo mapping for all syncs; no auto-detect or fallback.
+    project_path = os.path.abspath(os.path.expanduser(getattr(args, "project", None) or os.getcwd()))
+    repo_root, proj_entry = _project_lookup(cfg, project_path)
+    mapped = proj_entry.get("wakatimeProject") if proj_entry else None
+    if not mapped:
+        print("This repo is not configured for Skuld.\nRun `skuld add` in this repo to map it to a WakaTime project (and optional Jira key).")
+        return 2
+    project_path = repo_root or project_path
+    # Determine window: if no period provided, sync since last sync
+    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
+    since_override, until_override = window or _sync_window(state_path, project_path, period)
+    # One time budget for preview and upload together (e.g. from the post-commit hook)
+    if getattr(args, "deadline", None):
+        http.set_deadline(float(args.deadline))
+    out_format = (getattr(args, "format", None) or "text").lower()
+    if out_format != "text":
+        return _sync_machine_output(args, cfg, state_path, project_path, period, since_override, until_override, out_format)
+    if is_test:
+        return _sync_test_output(args, cfg, state_path, project_path, period, since_override, until_override)
+    preview, reused = _sync_preview(args, cfg, state_path, project_path, period, since_override, until_override)
+    if preview is None:
+        print("No reusable plan: run `skuld sync --test` first (plans expire after `sync.planTtl` seconds, or when commits, config or the last sync change).")
+        return 2
+    if reused:
+        print(f"Applying plan from the last dry-run ({preview['since']} → {preview['until']}).")
+
+    # Apply mode: upload Jira worklogs for positive deltas only, idempotently.
+    # Respect ownership policy: if ownership is required but not verified, abort.
+    policy = (preview.get("debug", {}) or {}).get("policy", {}) if isinstance(preview, dict) else {}
+    require_ownership = bool(policy.get("require_ownership", True))
+    if require_ownership and not preview.get("ownership_verified"):
+        print("Aborting: Jira ownership verification failed; not uploading.")
+        return 2
+
+    result = _upload_preview(cfg, preview, state_path)
+    cache_clear(state_path, _plan_name(project_path))
+    uploaded, skipped, errors = result["uploaded"], result["skipped"], result["errors"]
+    issue_comment_enabled = result["issue_comments"]
 
     # Summary
     print("Upload summary:")
     if uploaded:
         for u in uploaded:
             if issue_comment_enabled:
-                print(f"  + {u['key']}: {format_seconds(u['seconds'])} (worklog {u.get('worklog_id') or '-'}, comment {u.get('comment_id') or '-'})")
+                print(f"  + {u['key']}: {format_seconds(u['seconds'])} ({'merged into ' if u.get('merged') else ''}worklog {u.get('worklog_id') or '-'}, comment {u.get('comment_id') or '-'})")
             else:
-                print(f"  + {u['key']}: {format_seconds(u['seconds'])} (worklog {u.get('worklog_id') or '-'})")
+                print(f"  + {u['key']}: {format_seconds(u['seconds'])} ({'merged into ' if u.get('merged') else ''}worklog {u.get('worklog_id') or '-'})")
     else:
         print("  + No uploads (nothing to add)")
     if skipped:
@@ -984,7 +1883,7 @@ def handle_sync(args: argparse.Namespace) -> int:
             print(f"  ! {e['key']}: {e['error']}")
     exit_code = 0 if uploaded and not errors else (1 if errors else 0)
     # Persist last sync upper bound if not a dry-run and no errors
-    if not is_test and not errors:
+    if not is_test and _may_advance_last_sync(preview, {"errors": errors}):
         try:
             state_set_last_sync(state_path, project_path, preview.get("until"))
         except Exception:
@@ -992,16 +1891,202 @@ def handle_sync(args: argparse.Namespace) -> int:
     return exit_code
 
 
+def _watch_sync(cfg: Dict[str, Any], state_path: str, repo: str, min_delta: int, max_hold: float,
+                held_since: Dict[str, float], now: float) -> bool:
+    """Run one coalescing sync for a repo on behalf of `skuld watch`. Returns False on errors."""
+    project_path = os.path.abspath(os.path.expanduser(repo))
+    stamp = dt.datetime.now().strftime("%H:%M:%S")
+    since_override, until_override = _sync_window(state_path, project_path, None)
+    preview = _build_preview(None, project_path, None, cfg, since_override, until_override)
+    policy = (preview.get("debug", {}) or {}).get("policy", {})
+    if bool(policy.get("require_ownership", True)) and not preview.get("ownership_verified") and preview.get("issues"):
+        print(f"[{stamp}] {project_path}: Jira ownership verification failed; will retry.")
+        return False
+    pending = sum(max(0, int(i.get("delta", 0))) for i in preview.get("issues", []))
+    # Hold small deltas: last_sync is not advanced, so the next window grows and
+    # the pending time is coalesced into a single worklog per issue.
+    if 0 < pending < min_delta:
+        first = held_since.setdefault(project_path, now)
+        if now - first < max_hold:
+            print(f"[{stamp}] {project_path}: holding {format_seconds(pending)} (below {format_seconds(min_delta)})")
+            return True
+    result = _upload_preview(cfg, preview, state_path)
+    held_since.pop(project_path, None)
+    for u in result["uploaded"]:
+        print(f"[{stamp}] {project_path}: + {u['key']} {format_seconds(u['seconds'])} (worklog {u.get('worklog_id') or '-'})")
+    for e in result["errors"]:
+        print(f"[{stamp}] {project_path}: ! {e['key']}: {e['error']}")
+    if result["errors"]:
+        return False
+    if not _may_advance_last_sync(preview, result):
+        print(f"[{stamp}] {project_path}: {preview.get('wakatime_error')}; will retry the window.")
+        return False
+    try:
+        state_set_last_sync(state_path, project_path, preview.get("until"))
+    except Exception:
+        pass
+    return True
+
+
+def handle_watch(args: argparse.Namespace) -> int:
+    """Periodically sync all mapped repos, debouncing commit bursts and coalescing small deltas."""
+    cfg = load_config(_default_config_path())
+    if not isinstance(cfg, dict):
+        cfg = {}
+    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
+    if getattr(args, "pid_path", False):
+        # For hooks: where a running watcher's pid file lives under the configured state.path
+        print(pid_path(state_path))
+        return 0
+    watch_cfg = cfg.get("watch") if isinstance(cfg.get("watch"), dict) else {}
+
+    def _opt(name: str, key: str, default: float) -> float:
+        val = getattr(args, name, None)
+        if val is None:
+            val = watch_cfg.get(key) if isinstance(watch_cfg, dict) else None
+        try:
+            return float(val) if val is not None else default
+        except Exception:
+            return default
+
+    interval = _opt("interval", "intervalMinutes", 30.0) * 60
+    quiet = _opt("quiet", "quietSeconds", 120.0)
+    min_delta = int(_opt("min_delta", "minDeltaMinutes", 5.0) * 60)
+    max_hold = _opt("max_hold", "maxHoldMinutes", 240.0) * 60
+    poll = max(5.0, _opt("poll", "pollSeconds", 30.0))
+
+    projs = cfg.get("projects") if isinstance(cfg.get("projects"), dict) else {}
+    repos = [k for k, v in projs.items()
+             if isinstance(v, dict) and v.get("wakatimeProject") and os.path.isdir(os.path.expanduser(k))]
+    if not repos:
+        print("No mapped repos found. Run `skuld add` in each repo you want to watch.")
+        return 2
+
+    debouncer = Debouncer(quiet=quiet, interval=interval)
+    backoff = Backoff(base=poll, maximum=3600.0, slow_after=60.0)
+    held_since: Dict[str, float] = {}
+    once = bool(getattr(args, "once", False))
+    if not once:
+        write_pid(state_path)
+        print(f"Watching {len(repos)} repo(s); sync every {format_seconds(interval)}, quiet period {format_seconds(quiet)}.")
+    exit_code = 0
+    try:
+        while True:
+            now = time.monotonic()
+            for repo in repos:
+                repo_path = os.path.expanduser(repo)
+                debouncer.observe(repo, ref_fingerprint(repo_path, _git_reader(cfg, repo_path)), now)
+            for repo in repos:
+                if not debouncer.due(repo, now):
+                    continue
+                started = time.monotonic()
+                try:
+                    ok = _watch_sync(cfg, state_path, repo, min_delta, max_hold, held_since, now)
+                except Exception as e:
+                    print(f"{repo}: sync failed: {e}")
+                    ok = False
+                debouncer.mark_run(repo, time.monotonic())
+                delay = backoff.record(time.monotonic() - started, ok)
+                if not ok:
+                    exit_code = 1
+                if delay:
+                    print(f"Jira/WakaTime slow or failing; backing off {format_seconds(delay)}.")
+                    break
+            if once:
+                break
+            time.sleep(poll + backoff.delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if not once:
+            clear_pid(state_path)
+    return exit_code
+
+
+def _list_branch_catalog(args: argparse.Namespace, cfg: Dict[str, Any], state_path: str, project_path: str,
+                         proj_entry: Dict[str, Any], api_key: str, out_format: str) -> int:
+    """`branches --list`: search the persisted branch catalog, refreshing it incrementally."""
+    mapped_project = proj_entry.get("wakatimeProject")
+    br_cfg = cfg.get("branches") if isinstance(cfg.get("branches"), dict) else {}
+    try:
+        horizon = int((br_cfg.get("catalogDays") if isinstance(br_cfg, dict) else None) or cfg.get("branches.catalogDays") or 365)
+    except Exception:
+        horizon = 365
+    t0 = time.perf_counter()
+    catalog = BranchCatalog(state_path, mapped_project, horizon_days=horizon)
+    refresh: Dict[str, Any] = {"requests": 0, "days_added": 0, "error": None}
+    if not getattr(args, "offline", False):
+        wcache, day_cache = _wakatime_day_cache(state_path, mapped_project, _cfg_flag(cfg, "cache", "enabled", True))
+        refresh = catalog.refresh(api_key, day_cache=day_cache)
+        _save_wakatime_day_cache(state_path, wcache, day_cache)
+        catalog.save()
+    fetch_ms = int((time.perf_counter() - t0) * 1000)
+
+    # Issue: explicit branch mapping first, else a key in the branch name (as sync allocates)
+    mapping = proj_entry.get("branchIssues") or proj_entry.get("branchMapping") or {}
+    issue_rx_raw = ((cfg.get("regex") or {}).get("issueKey") if isinstance(cfg.get("regex"), dict) else cfg.get("regex.issueKey")) or r"[A-Z][A-Z0-9]+-\d+"
+    import re as _re
+    key_rx = _re.compile(issue_rx_raw.replace("\\\\", "\\"))
+    rows = catalog.rows()
+    for name in mapping:
+        if name not in catalog.branches and name not in catalog.live:
+            rows.append({"branch": name, "seconds": 0.0, "first_seen": None, "last_seen": None})
+    for row in rows:
+        m = key_rx.search(row["branch"])
+        row["issue"] = mapping.get(row["branch"]) or (m.group(0) if m else None)
+        row["mapped"] = row["branch"] in mapping
+        row["seconds"] = int(round(float(row["seconds"] or 0.0)))
+    rows = catalog_search(rows, text=getattr(args, "search", None), issue=getattr(args, "issue", None),
+                          unmapped=bool(getattr(args, "unmapped", False)), active_days=getattr(args, "days", None))
+    sort = getattr(args, "sort", None) or "seconds"
+    if sort == "name":
+        rows.sort(key=lambda r: r["branch"])
+    elif sort == "last":
+        rows.sort(key=lambda r: (r["last_seen"] or "", r["seconds"]), reverse=True)
+    else:
+        rows.sort(key=lambda r: (r["seconds"], r["branch"]), reverse=True)
+    total = len(rows)
+    limit = getattr(args, "limit", None)
+    if limit:
+        rows = rows[: max(0, int(limit))]
+
+    if refresh.get("error"):
+        print(f"Note: {refresh['error']}", file=sys.stderr)
+    if out_format != "text":
+        timings = {"wakatime_ms": fetch_ms, "wakatime_requests": refresh.get("requests", 0)}
+        if out_format == "ndjson":
+            for row in rows:
+                _emit({"type": "branch", "project": project_path, **row})
+            _emit({"type": "summary", "project": project_path, "through": catalog.through, "count": total, "timings": timings})
+        else:
+            print(json.dumps({"project": project_path, "through": catalog.through, "count": total, "branches": rows,
+                              "timings": timings}, indent=2))
+        return 0
+    if not rows:
+        print("No branches found.")
+        return 0
+    print(f"Branches ({len(rows)} of {total}):" if len(rows) < total else "Branches:")
+    for row in rows:
+        secf = format_seconds(float(row["seconds"])) if row["seconds"] else "0s"
+        seen = f"  [{row['first_seen']} … {row['last_seen']}]" if row["last_seen"] else ""
+        if row["mapped"]:
+            print(f"  - {row['branch']}: {secf}{seen}  → {row['issue']}")
+        else:
+            print(f"  - {row['branch']}: {secf}{seen}")
+    return 0
+
+
 def handle_branches(args: argparse.Namespace) -> int:
     """List recent WakaTime branches for this repo and assign/remove Jira keys."""
     cfg = load_config(_default_config_path())
     if not isinstance(cfg, dict):
         cfg = {}
     project_path = os.path.abspath(os.path.expanduser(getattr(args, "project", None) or os.getcwd()))
-    proj_entry = _project_entry(cfg, project_path)
+    repo_root, proj_entry = _project_lookup(cfg, project_path)
     if not proj_entry or not proj_entry.get("wakatimeProject"):
         print("This repo is not configured for Skuld.\nRun `skuld add` in this repo to map it to a WakaTime project.")
         return 2
+    project_path = repo_root or project_path
     wk_cfg = cfg.get("wakatime") if isinstance(cfg.get("wakatime"), dict) else {}
     api_key = (wk_cfg.get("apiKey") if isinstance(wk_cfg, dict) else None) or cfg.get("wakatime.apiKey") or discover_api_key()
     if not api_key:
@@ -1010,17 +2095,32 @@ def handle_branches(args: argparse.Namespace) -> int:
 
     # Determine time window internally (long recent range by default) but do not expose as a concept
     now = dt.datetime.now()
-    days = int(getattr(args, "days", 365) or 365)
+    days = int(getattr(args, "days", None) or 7)
     try:
         days = max(1, min(days, 3650))
     except Exception:
-        days = 365
+        days = 7
     since_iso = (now - dt.timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
     until_iso = now.isoformat()
 
+    out_format = (getattr(args, "format", None) or "text").lower()
+    # In machine formats keep stdout clean for the branch list
+    say = print if out_format == "text" else (lambda m: print(m, file=sys.stderr))
+
     mapped_project = proj_entry.get("wakatimeProject")
-    # Prefer durations for reliable branch data across the chosen range
-    summary = fetch_durations_summary(api_key, since_iso, until_iso, project=mapped_project)
+    state_path = (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
+    # `--list` answers from the persisted branch catalog instead of a fresh window
+    use_catalog = bool(getattr(args, "list", False)) and not getattr(args, "interactive", False)
+    t0 = time.perf_counter()
+    summary: Dict[str, Any] = {}
+    if not use_catalog:
+        # Whole-day branch totals: ranged Summaries plus cached settled days, no per-day Durations
+        wcache, day_cache = _wakatime_day_cache(state_path, mapped_project, _cfg_flag(cfg, "cache", "enabled", True))
+        summary = fetch_branch_totals(api_key, since_iso, until_iso, project=mapped_project, day_cache=day_cache, precise=False)
+        _save_wakatime_day_cache(state_path, wcache, day_cache)
+    fetch_ms = int((time.perf_counter() - t0) * 1000)
+    if summary.get("error"):
+        print(f"Warning: {summary['error']}; totals below are incomplete.", file=sys.stderr)
     branches = summary.get("branches") or {}
     # Current mapping dict (create on first write)
     current_map = {}
@@ -1040,13 +2140,13 @@ def handle_branches(args: argparse.Namespace) -> int:
                 proj_entry["branchIssues"] = {}
             proj_entry["branchIssues"][b] = key
             changed = True
-            print(f"Mapped branch → issue: '{b}' → {key}")
+            say(f"Mapped branch → issue: '{b}' → {key}")
     if unset_arg:
         b = unset_arg
         if isinstance(proj_entry.get("branchIssues"), dict) and b in proj_entry["branchIssues"]:
             proj_entry["branchIssues"].pop(b, None)
             changed = True
-            print(f"Removed mapping for branch: '{b}'")
+            say(f"Removed mapping for branch: '{b}'")
 
     # Build combined list (union of WakaTime and existing mappings)
     combined_names = set(branches.keys()) | set(current_map.keys())
@@ -1081,18 +2181,24 @@ def handle_branches(args: argparse.Namespace) -> int:
 
     # Save config if changed
     if changed:
-        # Merge updated project entry back into cfg and write
-        # Find exact key used for this repo to ensure write
-        projs = cfg.get("projects") if isinstance(cfg.get("projects"), dict) else {}
-        pp = os.path.realpath(os.path.abspath(os.path.expanduser(project_path)))
-        for k in list(projs.keys()):
-            kk = os.path.realpath(os.path.abspath(os.path.expanduser(k)))
-            if kk == pp:
-                projs[k] = proj_entry
-                break
-        cfg["projects"] = projs
+        # proj_entry is the live projects[repo] dict from the index, so cfg already has the change
         out = _save_config_prefer_skuld(cfg)
-        print(f"Saved mapping to {out}")
+        say(f"Saved mapping to {out}")
+
+    if use_catalog:
+        return _list_branch_catalog(args, cfg, state_path, project_path, proj_entry, api_key, out_format)
+
+    if out_format != "text":
+        mapping = proj_entry.get("branchIssues", {}) or {}
+        rows = [{"branch": bn, "seconds": int(round(float(secs or 0.0))), "issue": mapping.get(bn)} for bn, secs in items]
+        timings = {"wakatime_ms": fetch_ms, "wakatime_requests": summary.get("requests", 0)}
+        if out_format == "ndjson":
+            for row in rows:
+                _emit({"type": "branch", "project": project_path, **row})
+            _emit({"type": "summary", "project": project_path, "days": days, "count": len(rows), "timings": timings})
+        else:
+            print(json.dumps({"project": project_path, "days": days, "branches": rows, "timings": timings}, indent=2))
+        return 0
 
     # Print list if requested or when no interactive/set/unset was used
     if getattr(args, "list", False) or (not getattr(args, "interactive", False) and not set_args and not unset_arg):
@@ -1110,6 +2216,58 @@ def handle_branches(args: argparse.Namespace) -> int:
     return 0
 
 
+def handle_serve(args: argparse.Namespace) -> int:
+    """Run the team aggregation server shared by many skuld clients."""
+    cfg = load_config(_default_config_path())
+    if not isinstance(cfg, dict):
+        cfg = {}
+    team_cfg = cfg.get("team") if isinstance(cfg.get("team"), dict) else {}
+    svc = team_cfg.get("jira") if isinstance(team_cfg.get("jira"), dict) else {}
+    # Only these sites are searched or relayed to; callers naming any other site are refused
+    sites = list(getattr(args, "site", None) or [])
+    if not sites:
+        conf_sites = team_cfg.get("sites") or cfg.get("team.sites") or []
+        sites = [conf_sites] if isinstance(conf_sites, str) else [s for s in conf_sites if isinstance(s, str)]
+    if not sites:
+        own = (cfg.get("jira") or {}).get("site") if isinstance(cfg.get("jira"), dict) else cfg.get("jira.site")
+        sites = [own] if own else []
+    if not sites:
+        print("No Jira site to serve: pass --site URL or set team.sites (or jira.site) in the config.", file=sys.stderr)
+        return 2
+    hub = team.TeamHub(
+        rate=float(getattr(args, "rate", 5.0)),
+        burst=int(getattr(args, "burst", 10)),
+        ttl=float(getattr(args, "ttl", 60.0)),
+        service_email=svc.get("email") if isinstance(svc, dict) else None,
+        service_token=svc.get("apiToken") if isinstance(svc, dict) else None,
+        sites=sites,
+    )
+    bind = getattr(args, "host", "127.0.0.1")
+    certfile = getattr(args, "certfile", None)
+    try:
+        server = team.make_server(hub, host=bind, port=int(getattr(args, "port", 8787)),
+                                  certfile=certfile, keyfile=getattr(args, "keyfile", None))
+    except Exception as e:
+        print(f"Cannot start team server: {e}", file=sys.stderr)
+        return 1
+    # Every outbound Jira request (searches, pages, retries, worklog posts) waits for its host's budget
+    http.use_throttle(hub.throttle)
+    host, port = server.server_address[:2]
+    scheme = "https" if certfile else "http"
+    print(f"Skuld team server listening on {scheme}://{host}:{port} for {', '.join(sorted(hub.sites))}"
+          f" (rate {hub.rate}/s, burst {hub.burst}, cache TTL {hub.ttl:g}s)")
+    if not certfile and bind not in ("127.0.0.1", "localhost", "::1"):
+        print("Warning: clients send their Jira API tokens to this server; without --certfile they travel in"
+              " plain text. Use TLS (--certfile/--keyfile or a reverse proxy) off localhost.", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="skuld", description="Skuld: WakaTime + Git → Jira worklogs")
     p.add_argument("--version", action="store_true", help="Print version and exit")
@@ -1121,6 +2279,7 @@ def build_parser() -> argparse.ArgumentParser:
 
     ap = sub.add_parser("add", help="Add per-repo mapping for faster syncs")
     ap.add_argument("--project", default=None, help="Project/repo path (defaults to CWD)")
+    ap.add_argument("--scan", metavar="DIR", default=None, help="Map every unmapped git repo directly under DIR in one pass")
     ap.set_defaults(func=handle_add)
 
     sy = sub.add_parser("sync", help="Sync worklogs for a period or since last sync (default)")
@@ -1129,6 +2288,12 @@ def build_parser() -> argparse.ArgumentParser:
     sy.add_argument("--project", default=None, help="Project/repo path (optional)")
     sy.add_argument("--wakatime-file", default=None, help="Path to a WakaTime summaries JSON file for the period")
     sy.add_argument("--debug", action="store_true", default=False, help="Print debug info about allocation")
+    sy.add_argument("--format", choices=["text", "json", "ndjson"], default="text", help="Output format (json/ndjson for machines; ndjson streams per issue)")
+    sy.add_argument("--deadline", type=float, default=None, metavar="SECONDS", help="Overall time budget; degrade to partial results instead of waiting on slow services")
+    sy.add_argument("--apply-plan", action="store_true", default=False, help="Upload the plan saved by the last `sync --test` instead of recomputing")
+    sy.add_argument("--record", metavar="FILE", default=None, help="Record all Jira/WakaTime requests and responses (credentials scrubbed) to a cassette file")
+    sy.add_argument("--replay", metavar="FILE", default=None, help="Dry-run against a recorded cassette instead of the network")
+    sy.add_argument("--replay-speed", type=float, default=1.0, metavar="FACTOR", help="Scale recorded latencies when replaying (0 = no delay; default 1)")
     sy.set_defaults(func=handle_sync)
 
     br = sub.add_parser("branches", help="List WakaTime branches and map to Jira keys")
@@ -1136,10 +2301,38 @@ def build_parser() -> argparse.ArgumentParser:
     br.add_argument("--interactive", action="store_true", default=False, help="Interactively assign a Jira key to a branch")
     br.add_argument("--set", nargs=2, metavar=("BRANCH", "KEY"), help="Map a branch to a Jira key")
     br.add_argument("--unset", metavar="BRANCH", help="Remove branch mapping")
-    br.add_argument("--list", action="store_true", default=False, help="List branches and existing mappings")
-    br.add_argument("--days", type=int, default=7, help="How many recent days to fetch from WakaTime (default: 7)")
+    br.add_argument("--list", action="store_true", default=False, help="List all known branches and mappings from the branch catalog")
+    br.add_argument("--days", type=int, default=None, help="How many recent days to fetch from WakaTime (default: 7); with --list, only branches seen in that many days")
+    br.add_argument("--search", metavar="TEXT", default=None, help="With --list: branches whose name contains TEXT (or matches a glob)")
+    br.add_argument("--issue", metavar="KEY", default=None, help="With --list: branches attributed to this Jira key")
+    br.add_argument("--unmapped", action="store_true", default=False, help="With --list: only branches without a Jira key")
+    br.add_argument("--sort", choices=["seconds", "last", "name"], default="seconds", help="With --list: sort order (default: seconds)")
+    br.add_argument("--limit", type=int, default=None, help="With --list: show at most N branches")
+    br.add_argument("--offline", action="store_true", default=False, help="With --list: answer from the catalog without contacting WakaTime")
+    br.add_argument("--format", choices=["text", "json", "ndjson"], default="text", help="Output format for the branch list")
     br.set_defaults(func=handle_branches)
 
+    wa = sub.add_parser("watch", help="Run periodic, debounced syncs for all mapped repos")
+    wa.add_argument("--interval", type=float, default=None, help="Minutes between periodic syncs per repo (default: 30)")
+    wa.add_argument("--quiet", type=float, default=None, help="Seconds without new commits before syncing a burst (default: 120)")
+    wa.add_argument("--min-delta", type=float, default=None, help="Hold uploads until at least this many minutes are pending (default: 5)")
+    wa.add_argument("--max-hold", type=float, default=None, help="Upload held time anyway after this many minutes (default: 240)")
+    wa.add_argument("--poll", type=float, default=None, help="Seconds between repo change checks (default: 30)")
+    wa.add_argument("--once", action="store_true", default=False, help="Run a single pass over all repos and exit")
+    wa.add_argument("--pid-path", action="store_true", default=False, help="Print the watcher's pid file path and exit (for hooks)")
+    wa.set_defaults(func=handle_watch)
+
+    se = sub.add_parser("serve", help="Run the team aggregation server (shared Jira lookups and rate budget)")
+    se.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    se.add_argument("--port", type=int, default=8787, help="Port to listen on (default: 8787)")
+    se.add_argument("--rate", type=float, default=5.0, help="Outbound Jira requests per second per host (default: 5)")
+    se.add_argument("--burst", type=int, default=10, help="Burst size for the rate budget (default: 10)")
+    se.add_argument("--ttl", type=float, default=60.0, help="Seconds to reuse issue metadata across users (default: 60)")
+    se.add_argument("--site", action="append", default=None, help="Jira site clients may use (repeatable; default: team.sites, else jira.site)")
+    se.add_argument("--certfile", default=None, help="Serve HTTPS with this PEM certificate (chain)")
+    se.add_argument("--keyfile", default=None, help="Private key for --certfile, if not in the same file")
+    se.set_defaults(func=handle_serve)
+
     # If no subcommand is provided, show a concise how-to message
     p.set_defaults(func=handle_root, cmd=None)
     return p
@@ -0,0 +1,144 @@
+"""Embeddable Python API.
+
+`Client` exposes what `skuld sync` does as methods that return structured
+dicts instead of printing, so services can run many previews in one process
+without shelling out. Config is parsed once per client; the on-disk caches
+(git scans, WakaTime days, Jira worklogs, breaker state) are shared with the CLI.
+
+    from skuld import Client
+
+    client = Client()
+    preview = client.preview("/path/to/repo", period="today")
+    result = client.sync("/path/to/repo")
+"""
+import os
+import pathlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from . import http
+from .cli import (
+    _build_preview,
+    _may_advance_last_sync,
+    _default_config_path,
+    _project_lookup,
+    _project_mapping,
+    _period_bounds,
+    _sync_window,
+    _upload_preview,
+    load_config,
+)
+from .state import set_last_sync as state_set_last_sync
+
+
+class Client:
+    """Long-lived skuld session bound to one configuration.
+
+    Pass `config` (a dict shaped like `~/.skuld.yaml`) or `config_path`; by default the
+    same file as the CLI is used (`SKULD_CONFIG`, then `~/.skuld.yaml`).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, config_path: Optional[str] = None):
+        self._config_path = pathlib.Path(config_path).expanduser() if config_path else None
+        self._explicit = config is not None
+        self._lock = threading.Lock()
+        self.config: Dict[str, Any] = dict(config) if isinstance(config, dict) else {}
+        if not self._explicit:
+            self.reload()
+
+    def reload(self) -> Dict[str, Any]:
+        """Re-read the config file (no-op for clients built from a dict)."""
+        if not self._explicit:
+            cfg = load_config(self._config_path or _default_config_path())
+            with self._lock:
+                self.config = cfg if isinstance(cfg, dict) else {}
+        return self.config
+
+    @property
+    def state_path(self) -> str:
+        cfg = self.config
+        return (cfg.get("state", {}).get("path") if isinstance(cfg.get("state"), dict) else cfg.get("state.path")) or "~/.local/share/skuld/state.json"
+
+    def projects(self) -> List[str]:
+        """Repo paths mapped in the config."""
+        projs = self.config.get("projects")
+        return [os.path.abspath(os.path.expanduser(p)) for p, v in projs.items() if isinstance(v, dict)] if isinstance(projs, dict) else []
+
+    def is_mapped(self, project: str) -> bool:
+        return bool(_project_mapping(self.config, self._normalize(project)))
+
+    def preview(self, project: str, period: Optional[str] = None, since: Optional[str] = None,
+                until: Optional[str] = None, deadline: Optional[float] = None,
+                wakatime_file: Optional[str] = None,
+                on_issue: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Compute the worklog preview for a mapped repo (no writes to Jira).
+
+        The window is `since`/`until` when both are given, else the named `period`
+        ("today", "yesterday", "week"), else everything since the repo's last sync.
+        Raises ValueError for repos that are not mapped in the config.
+        """
+        project_path = self._require_mapped(project)
+        since, until = self._window(project_path, period, since, until)
+        return _build_preview(period, project_path, wakatime_file, self.config, since, until,
+                              on_issue=on_issue, deadline=deadline)
+
+    def upload(self, preview: Dict[str, Any], log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Upload the positive deltas of a preview; returns {"uploaded", "skipped", "errors", "notes"}.
+
+        Idempotent per (issue, window, delta) like `skuld sync`. Does not move the last-sync
+        marker; `sync` does that.
+        """
+        notes: List[str] = []
+        result = _upload_preview(self.config, preview, self.state_path, log=log or notes.append)
+        result.pop("issue_comments", None)
+        result["notes"] = notes
+        return result
+
+    def sync(self, project: str, period: Optional[str] = None, dry_run: bool = False,
+             deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Preview and upload like `skuld sync`; returns {"preview", "upload", "aborted"}.
+
+        Uploads are refused (`aborted`) when ownership is required but not verified. When
+        every upload succeeds and WakaTime returned every day, the repo's last-sync marker
+        advances to the window end.
+        """
+        project_path = self._require_mapped(project)
+        # Per call: concurrent syncs in one process each keep their own budget
+        token = http.set_deadline(deadline) if deadline else None
+        try:
+            preview = self.preview(project_path, period=period)
+            out: Dict[str, Any] = {"preview": preview, "upload": None, "aborted": None}
+            if dry_run:
+                return out
+            policy = (preview.get("debug", {}) or {}).get("policy", {})
+            if bool(policy.get("require_ownership", True)) and not preview.get("ownership_verified"):
+                out["aborted"] = "ownership_verification_failed"
+                return out
+            out["upload"] = self.upload(preview)
+            if _may_advance_last_sync(preview, out["upload"]):
+                try:
+                    state_set_last_sync(self.state_path, project_path, preview.get("until"))
+                except Exception:
+                    pass
+            return out
+        finally:
+            if token is not None:
+                http.reset_deadline(token)
+
+    def _normalize(self, project: str) -> str:
+        return os.path.abspath(os.path.expanduser(project))
+
+    def _require_mapped(self, project: str) -> str:
+        project_path = self._normalize(project)
+        root, entry = _project_lookup(self.config, project_path)
+        if not entry or not entry.get("wakatimeProject"):
+            raise ValueError(f"{project_path} is not configured for skuld (run `skuld add` there)")
+        return root or project_path
+
+    def _window(self, project_path: str, period: Optional[str], since: Optional[str],
+                until: Optional[str]) -> tuple:
+        if since and until:
+            return since, until
+        if period:
+            return _period_bounds(period)
+        return _sync_window(self.state_path, project_path, None)
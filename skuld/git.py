@@ -1,10 +1,14 @@
 import re
 import subprocess
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
 
 
-@dataclass
+class GitLogFailed(RuntimeError):
+    """`git log` exited non-zero after its output was streamed (bad rev, corrupt repo)."""
+
+
+@dataclass(slots=True)
 class Commit:
     sha: str
     date: str  # ISO string
@@ -19,76 +23,130 @@ def extract_issue_keys(text: str, pattern: str) -> List[str]:
     return rx.findall(text or "")
 
 
-def get_commits(repo: str, since_iso: str, until_iso: str) -> List[Commit]:
-    # Use %aI (author date, strict ISO 8601 with timezone offset like +00:00)
-    fmt = "%H\x1f%aI\x1f%s\x1e"
-    cmd = [
-        "git",
-        "-C",
-        repo,
-        "log",
-        f"--since={since_iso}",
-        f"--until={until_iso}",
-        f"--pretty=format:{fmt}",
-    ]
-    out = subprocess.run(cmd, capture_output=True, text=True, check=False)
+def list_refs(repo: str, reader: Any = None) -> Dict[str, str]:
+    """Return local branch tips and HEAD as {refname: sha}; empty on failure.
+
+    With a `gitgraph.GitReader` the refs are read in-process when possible.
+    """
+    if reader is not None:
+        refs = reader.refs()
+        if refs is not None:
+            return refs
+    cmd = ["git", "-C", repo, "for-each-ref", "--format=%(refname) %(objectname)", "refs/heads"]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        head = subprocess.run(["git", "-C", repo, "rev-parse", "HEAD"], capture_output=True, text=True, check=False)
+    except Exception:
+        return {}
     if out.returncode != 0:
-        return []
-    records = out.stdout.strip("\n\x1e").split("\x1e") if out.stdout else []
-    commits: List[Commit] = []
-    for rec in records:
-        if not rec:
-            continue
-        parts = rec.split("\x1f")
-        if len(parts) != 3:
-            continue
-        sha, date, subject = parts
-        commits.append(Commit(sha=sha, date=date, subject=subject))
-    return commits
+        return {}
+    refs: Dict[str, str] = {}
+    for line in (out.stdout or "").splitlines():
+        name, _, sha = line.partition(" ")
+        if name and sha:
+            refs[name] = sha
+    if head.returncode == 0 and head.stdout.strip():
+        refs["HEAD"] = head.stdout.strip()
+    return refs
+
 
+# Use %aI (author date, strict ISO 8601 with timezone offset like +00:00)
+_LOG_FORMAT = "%H\x1f%aI\x1f%s\x1e"
 
-def get_commits_for_branches(repo: str, branches: List[str], since_iso: str, until_iso: str) -> List[Commit]:
-    """Return commits reachable from any of the given local branches within the window.
 
-    Runs one log per branch to tolerate missing refs. Dedupe by SHA.
+def iter_commits(repo: str, since_iso: str, until_iso: str, rev: Optional[str] = None,
+                 chunk_size: int = 65536) -> Iterator[Commit]:
+    """Stream commits from `git log` as they are printed, newest first.
+
+    Records are parsed chunk by chunk instead of buffering the whole output. Closing the
+    iterator early (e.g. `break` in a for loop) stops git. When git exits non-zero the
+    iterator raises `GitLogFailed` after the last record, so callers can discard what it
+    yielded; it yields nothing when git cannot be started.
     """
-    if not branches:
+    cmd = ["git", "-C", repo, "log"]
+    if rev:
+        cmd.append(rev)
+    cmd += [f"--since={since_iso}", f"--until={until_iso}", f"--pretty=format:{_LOG_FORMAT}"]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                                encoding="utf-8", errors="replace")
+    except Exception:
+        return
+    try:
+        buf = ""
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            buf += chunk
+            records = buf.split("\x1e")
+            buf = records.pop()
+            for rec in records:
+                commit = _parse_record(rec)
+                if commit is not None:
+                    yield commit
+        commit = _parse_record(buf)
+        if commit is not None:
+            yield commit
+        if proc.wait() != 0:
+            raise GitLogFailed(f"git log exited with {proc.returncode}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+def _parse_record(rec: str) -> Optional[Commit]:
+    # git separates records with a newline after each \x1e terminator
+    parts = rec.strip("\n").split("\x1f")
+    if len(parts) != 3:
+        return None
+    return Commit(*parts)
+
+
+def get_commits(repo: str, since_iso: str, until_iso: str, reader: Any = None) -> List[Commit]:
+    if reader is not None:
+        commits = reader.log("HEAD", since_iso, until_iso)
+        if commits is not None:
+            return commits
+    try:
+        return list(iter_commits(repo, since_iso, until_iso))
+    except GitLogFailed:
         return []
-    # Use %aI for strict ISO timestamps
-    fmt = "%H\x1f%aI\x1f%s\x1e"
-    seen: Dict[str, bool] = {}
-    out_commits: List[Commit] = []
+
+
+def iter_commits_for_branches(repo: str, branches: List[str], since_iso: str, until_iso: str,
+                              reader: Any = None) -> Iterator[Commit]:
+    """Stream commits reachable from any of the given local branches within the window.
+
+    Runs one log per branch to tolerate missing refs: a branch whose log fails
+    contributes nothing. Dedupe by SHA. With a `gitgraph.GitReader`, branches it can
+    walk in-process do not spawn git.
+    """
+    seen: Set[str] = set()
     # Use unique branches to avoid redundant work
-    uniq = [b for i, b in enumerate(branches) if b and b not in branches[:i]]
-    for br in uniq:
-        cmd = [
-            "git",
-            "-C",
-            repo,
-            "log",
-            br,
-            f"--since={since_iso}",
-            f"--until={until_iso}",
-            f"--pretty=format:{fmt}",
-        ]
-        out = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if out.returncode != 0 or not out.stdout:
-            continue
-        records = out.stdout.strip("\n\x1e").split("\x1e") if out.stdout else []
-        for rec in records:
-            if not rec:
-                continue
-            parts = rec.split("\x1f")
-            if len(parts) != 3:
-                continue
-            sha, date, subject = parts
-            if sha in seen:
+    for br in dict.fromkeys(b for b in branches if b):
+        walked = reader.log(br, since_iso, until_iso) if reader is not None else None
+        if walked is None:
+            try:
+                # One branch's window at a time, so a failing log is dropped whole
+                walked = list(iter_commits(repo, since_iso, until_iso, rev=br))
+            except GitLogFailed:
                 continue
-            seen[sha] = True
-            out_commits.append(Commit(sha=sha, date=date, subject=subject))
-    return out_commits
+        for c in walked:
+            if c.sha not in seen:
+                seen.add(c.sha)
+                yield c
+
+
+def get_commits_for_branches(repo: str, branches: List[str], since_iso: str, until_iso: str,
+                             reader: Any = None) -> List[Commit]:
+    """Return commits reachable from any of the given local branches within the window."""
+    return list(iter_commits_for_branches(repo, branches, since_iso, until_iso, reader))
+
 
-def group_commits_by_issue(commits: List[Commit], pattern: str) -> Dict[str, List[Commit]]:
+def group_commits_by_issue(commits: Iterable[Commit], pattern: str) -> Dict[str, List[Commit]]:
     groups: Dict[str, List[Commit]] = {}
     for c in commits:
         keys = extract_issue_keys(c.subject, pattern)
@@ -0,0 +1,503 @@
+"""In-process git reader: refs, commit-graph and commit objects without spawning git.
+
+Reads loose and packed refs, walks history through `.git/objects/info/commit-graph`
+(single file or split chain) and decodes commit objects from loose files or packs.
+Anything outside that (reftable, SHA-256 repos, shallow clones, grafts, replace refs,
+alternates, unreadable objects) makes the reader return None so callers fall back to
+`git log`.
+
+    reader = open_reader("/path/to/repo")
+    commits = reader.log("HEAD", since_iso, until_iso) if reader else None
+"""
+import datetime as dt
+import heapq
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .git import Commit
+
+_HASH_LEN = 20
+_GRAPH_NO_PARENT = 0x70000000
+_OBJ_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+# Names `git log <name>` tries, in order (see gitrevisions(7))
+_DWIM = ("refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/{}", "refs/remotes/{}/HEAD")
+_PLAIN_REF = re.compile(r"^[\w./-]+$")
+# Past this many commits in a window, decoding objects in Python costs more than a git spawn
+MAX_WALK = 2000
+
+
+class Unsupported(Exception):
+    """The repository uses something this reader does not handle; use `git log`."""
+
+
+def _map(path: Path) -> Optional[mmap.mmap]:
+    try:
+        with open(path, "rb") as fh:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _u32(buf, off: int) -> int:
+    return struct.unpack_from(">I", buf, off)[0]
+
+
+def _bisect_oid(buf, table: int, lo: int, hi: int, oid: bytes) -> Optional[int]:
+    """Index of `oid` in a sorted table of 20-byte ids at `table`, searching [lo, hi)."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        cur = buf[table + mid * _HASH_LEN: table + (mid + 1) * _HASH_LEN]
+        if cur < oid:
+            lo = mid + 1
+        elif cur > oid:
+            hi = mid
+        else:
+            return mid
+    return None
+
+
+class _GraphLayer:
+    """One commit-graph file; positions are global across a split chain."""
+
+    def __init__(self, buf: mmap.mmap, base: int):
+        if buf[:4] != b"CGPH" or buf[4] != 1 or buf[5] != 1:
+            raise Unsupported("commit-graph version")
+        chunks: Dict[bytes, int] = {}
+        for i in range(buf[6]):
+            cid, off = struct.unpack_from(">4sQ", buf, 8 + 12 * i)
+            chunks[cid] = off
+        if not {b"OIDF", b"OIDL", b"CDAT"} <= set(chunks):
+            raise Unsupported("commit-graph chunks")
+        self.buf = buf
+        self.base = base
+        self.fanout = chunks[b"OIDF"]
+        self.oids = chunks[b"OIDL"]
+        self.cdat = chunks[b"CDAT"]
+        self.edges = chunks.get(b"EDGE")
+        self.count = _u32(buf, self.fanout + 255 * 4)
+
+    def find(self, oid: bytes) -> Optional[int]:
+        first = oid[0]
+        lo = _u32(self.buf, self.fanout + (first - 1) * 4) if first else 0
+        hi = _u32(self.buf, self.fanout + first * 4)
+        idx = _bisect_oid(self.buf, self.oids, lo, hi, oid)
+        return None if idx is None else self.base + idx
+
+
+class CommitGraph:
+    """Parents and committer times by object id, from a commit-graph file or chain."""
+
+    def __init__(self, layers: List[_GraphLayer]):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, objects: Path) -> Optional["CommitGraph"]:
+        info = objects / "info"
+        chain = info / "commit-graphs" / "commit-graph-chain"
+        paths: List[Path] = []
+        if chain.exists():
+            names = chain.read_text(encoding="ascii").split()
+            paths = [info / "commit-graphs" / f"graph-{n}.graph" for n in names]
+        elif (info / "commit-graph").exists():
+            paths = [info / "commit-graph"]
+        layers: List[_GraphLayer] = []
+        base = 0
+        for p in paths:
+            buf = _map(p)
+            if buf is None:
+                raise Unsupported(f"unreadable {p.name}")
+            layer = _GraphLayer(buf, base)
+            layers.append(layer)
+            base += layer.count
+        return cls(layers) if layers else None
+
+    def _layer(self, pos: int) -> _GraphLayer:
+        for layer in self.layers:
+            if pos < layer.base + layer.count:
+                return layer
+        raise Unsupported("commit-graph position out of range")
+
+    def find(self, oid: bytes) -> Optional[int]:
+        for layer in self.layers:
+            pos = layer.find(oid)
+            if pos is not None:
+                return pos
+        return None
+
+    def oid(self, pos: int) -> bytes:
+        layer = self._layer(pos)
+        off = layer.oids + (pos - layer.base) * _HASH_LEN
+        return bytes(layer.buf[off: off + _HASH_LEN])
+
+    def commit(self, pos: int) -> Tuple[int, List[int]]:
+        """(committer time, parent positions) of the commit at `pos`."""
+        layer = self._layer(pos)
+        off = layer.cdat + (pos - layer.base) * (_HASH_LEN + 16) + _HASH_LEN
+        p1, p2, gen_hi, time_lo = struct.unpack_from(">IIII", layer.buf, off)
+        parents = [p1] if p1 != _GRAPH_NO_PARENT else []
+        if p2 & 0x80000000:
+            if layer.edges is None:
+                raise Unsupported("commit-graph without EDGE chunk")
+            i = p2 & 0x7FFFFFFF
+            while True:
+                e = _u32(layer.buf, layer.edges + 4 * i)
+                parents.append(e & 0x7FFFFFFF)
+                if e & 0x80000000:
+                    break
+                i += 1
+        elif p2 != _GRAPH_NO_PARENT:
+            parents.append(p2)
+        return ((gen_hi & 0x3) << 32) | time_lo, parents
+
+
+class _Pack:
+    """A packfile and its v2 index."""
+
+    def __init__(self, idx_path: Path):
+        idx = _map(idx_path)
+        pack = _map(idx_path.with_suffix(".pack"))
+        if idx is None or pack is None or idx[:4] != b"\xfftOc" or _u32(idx, 4) != 2:
+            raise Unsupported(f"pack index {idx_path.name}")
+        self.idx = idx
+        self.pack = pack
+        self.count = _u32(idx, 8 + 255 * 4)
+        self.oids = 8 + 256 * 4
+        self.offsets = self.oids + self.count * (_HASH_LEN + 4)
+        self.large = self.offsets + self.count * 4
+
+    def find(self, oid: bytes) -> Optional[int]:
+        first = oid[0]
+        lo = _u32(self.idx, 8 + (first - 1) * 4) if first else 0
+        hi = _u32(self.idx, 8 + first * 4)
+        i = _bisect_oid(self.idx, self.oids, lo, hi, oid)
+        if i is None:
+            return None
+        off = _u32(self.idx, self.offsets + 4 * i)
+        if off & 0x80000000:
+            off = struct.unpack_from(">Q", self.idx, self.large + 8 * (off & 0x7FFFFFFF))[0]
+        return off
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        d = zlib.decompressobj()
+        out = b""
+        step = max(size, 64) + 64
+        while not d.eof and pos < len(self.pack):
+            out += d.decompress(self.pack[pos: pos + step])
+            pos += step
+        return out
+
+    def read(self, offset: int, reader: "GitReader") -> Tuple[str, bytes]:
+        pack = self.pack
+        pos = offset
+        c = pack[pos]
+        kind = (c >> 4) & 7
+        size = c & 15
+        shift = 4
+        while c & 0x80:
+            pos += 1
+            c = pack[pos]
+            size |= (c & 0x7F) << shift
+            shift += 7
+        pos += 1
+        if kind in _OBJ_TYPES:
+            return _OBJ_TYPES[kind], self._inflate(pos, size)
+        if kind == 6:  # OFS_DELTA
+            c = pack[pos]
+            pos += 1
+            back = c & 0x7F
+            while c & 0x80:
+                c = pack[pos]
+                pos += 1
+                back = ((back + 1) << 7) | (c & 0x7F)
+            base_type, base = self.read(offset - back, reader)
+        elif kind == 7:  # REF_DELTA
+            found = reader.read_object(bytes(pack[pos: pos + _HASH_LEN]))
+            pos += _HASH_LEN
+            if found is None:
+                raise Unsupported("missing delta base")
+            base_type, base = found
+        else:
+            raise Unsupported(f"pack object type {kind}")
+        return base_type, _apply_delta(base, self._inflate(pos, size))
+
+
+def _varint(buf: bytes, i: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        c = buf[i]
+        i += 1
+        value |= (c & 0x7F) << shift
+        shift += 7
+        if not c & 0x80:
+            return value, i
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    _src, i = _varint(delta, 0)
+    _dst, i = _varint(delta, i)
+    out = bytearray()
+    while i < len(delta):
+        op = delta[i]
+        i += 1
+        if op & 0x80:
+            off = size = 0
+            for b in range(4):
+                if op & (1 << b):
+                    off |= delta[i] << (8 * b)
+                    i += 1
+            for b in range(3):
+                if op & (0x10 << b):
+                    size |= delta[i] << (8 * b)
+                    i += 1
+            out += base[off: off + (size or 0x10000)]
+        elif op:
+            out += delta[i: i + op]
+            i += op
+        else:
+            raise Unsupported("bad delta opcode")
+    return bytes(out)
+
+
+def _parse_commit(raw: bytes) -> Tuple[int, List[bytes], Commit]:
+    """(committer time, parent ids, Commit) from a raw commit object body."""
+    head, _, message = raw.partition(b"\n\n")
+    parents: List[bytes] = []
+    ctime = 0
+    author = b""
+    encoding = "utf-8"
+    for line in head.split(b"\n"):
+        if line.startswith(b"parent "):
+            parents.append(bytes.fromhex(line[7:].decode("ascii")))
+        elif line.startswith(b"author "):
+            author = line[7:]
+        elif line.startswith(b"committer "):
+            ctime = int(line.rsplit(b" ", 2)[1])
+        elif line.startswith(b"encoding "):
+            encoding = line[9:].decode("ascii", "replace").strip() or "utf-8"
+    _, stamp, tz = author.rsplit(b" ", 2)
+    sign = -1 if tz[:1] == b"-" else 1
+    offset = dt.timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+    date = dt.datetime.fromtimestamp(int(stamp), dt.timezone(offset)).isoformat()
+    try:
+        text = message.decode(encoding, "replace")
+    except LookupError:
+        text = message.decode("utf-8", "replace")
+    # %s: the first paragraph of the message, lines joined by spaces
+    para: List[str] = []
+    for line in text.lstrip("\n").split("\n"):
+        if not line.strip():
+            break
+        para.append(line.strip())
+    return ctime, parents, Commit("", date, " ".join(para))  # sha is set by the caller
+
+
+def _find_git_dir(path: Path) -> Optional[Path]:
+    for d in (path, *path.parents):
+        dot = d / ".git"
+        if dot.is_dir():
+            return dot
+        if dot.is_file():
+            text = dot.read_text(encoding="utf-8").strip()
+            if text.startswith("gitdir:"):
+                target = Path(text[7:].strip())
+                return target if target.is_absolute() else (d / target).resolve()
+            return None
+    return None
+
+
+class GitReader:
+    """Reads refs and walks commits of one repository in-process.
+
+    Methods return None when the repository needs something unsupported, in which
+    case the caller should run git instead.
+    """
+
+    def __init__(self, git_dir: Path, common_dir: Path):
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        self.objects = common_dir / "objects"
+        self._lock = threading.Lock()
+        self._graph: Optional[CommitGraph] = None
+        self._packs: Optional[List[_Pack]] = None
+        self._refs: Optional[Dict[str, str]] = None
+        self._commits: Dict[bytes, Tuple[int, List[bytes], Commit]] = {}
+
+    # Objects
+    def _load(self) -> None:
+        with self._lock:
+            if self._packs is not None:
+                return
+            self._graph = CommitGraph.load(self.objects)
+            packs: List[_Pack] = []
+            for idx in sorted((self.objects / "pack").glob("*.idx")):
+                packs.append(_Pack(idx))
+            self._packs = packs
+
+    def read_object(self, oid: bytes) -> Optional[Tuple[str, bytes]]:
+        hexid = oid.hex()
+        loose = self.objects / hexid[:2] / hexid[2:]
+        try:
+            raw = zlib.decompress(loose.read_bytes())
+        except FileNotFoundError:
+            raw = None
+        if raw is not None:
+            header, _, body = raw.partition(b"\0")
+            return header.split(b" ", 1)[0].decode("ascii"), body
+        self._load()
+        for pack in self._packs or []:
+            off = pack.find(oid)
+            if off is not None:
+                return pack.read(off, self)
+        return None
+
+    def _commit(self, oid: bytes) -> Tuple[int, List[bytes], Commit]:
+        hit = self._commits.get(oid)
+        if hit is None:
+            obj = self.read_object(oid)
+            if obj is None or obj[0] != "commit":
+                raise Unsupported(f"cannot read commit {oid.hex()}")
+            ctime, parents, commit = _parse_commit(obj[1])
+            commit.sha = oid.hex()
+            hit = self._commits[oid] = (ctime, parents, commit)
+        return hit
+
+    def _meta(self, oid: bytes) -> Tuple[int, List[bytes]]:
+        """Committer time and parents, from the commit-graph when it has the commit."""
+        graph = self._graph
+        pos = graph.find(oid) if graph is not None and oid not in self._commits else None
+        if pos is not None:
+            ctime, parents = graph.commit(pos)
+            return ctime, [graph.oid(p) for p in parents]
+        ctime, parents, _c = self._commit(oid)
+        return ctime, parents
+
+    # Refs
+    def _ref_table(self) -> Dict[str, str]:
+        """All refs as {name: value}; values are hex ids or "ref: <target>"."""
+        if self._refs is not None:
+            return self._refs
+        refs: Dict[str, str] = {}
+        packed = self.common_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                if not line or line[0] in "#^":
+                    continue
+                sha, _, name = line.partition(" ")
+                refs[name.strip()] = sha
+        root = self.common_dir / "refs"
+        for dirpath, _dirs, files in os.walk(root):
+            for fname in files:
+                p = Path(dirpath) / fname
+                try:
+                    refs[p.relative_to(self.common_dir).as_posix()] = p.read_text(encoding="utf-8").strip()
+                except (OSError, UnicodeDecodeError):
+                    continue
+        head = self.git_dir / "HEAD"
+        refs["HEAD"] = head.read_text(encoding="utf-8").strip() if head.exists() else ""
+        self._refs = refs
+        return refs
+
+    def _peel(self, name: str, depth: int = 0) -> Optional[str]:
+        value = self._ref_table().get(name)
+        if value is None or depth > 5:
+            return None
+        if value.startswith("ref:"):
+            return self._peel(value[4:].strip(), depth + 1)
+        return value if len(value) == 2 * _HASH_LEN else None
+
+    def refs(self) -> Optional[Dict[str, str]]:
+        """Local branch tips and HEAD as {refname: sha}, like `git.list_refs`."""
+        try:
+            table = self._ref_table()
+            out = {n: sha for n in table if n.startswith("refs/heads/") for sha in [self._peel(n)] if sha}
+            head = self._peel("HEAD")
+        except (OSError, UnicodeDecodeError):
+            return None
+        if head:
+            out["HEAD"] = head
+        return out
+
+    def resolve(self, rev: str) -> Tuple[Optional[str], bool]:
+        """(sha, known): `known` is False when git might resolve `rev` some other way."""
+        if rev == "HEAD":
+            return self._peel("HEAD"), True
+        for pattern in _DWIM:
+            sha = self._peel(pattern.format(rev))
+            if sha:
+                return sha, True
+        # A plain name that is no ref: `git log` would fail and print nothing
+        is_hex = re.fullmatch(r"[0-9a-f]{4,40}", rev) is not None
+        return None, bool(_PLAIN_REF.match(rev)) and not is_hex
+
+    # History
+    def log(self, rev: str, since_iso: str, until_iso: str, limit: int = MAX_WALK) -> Optional[List[Commit]]:
+        """Commits reachable from `rev` within the window, newest first, like
+        `git log <rev> --since --until`; None when git has to be asked instead
+        (including windows of more than `limit` commits, where git is faster)."""
+        try:
+            since_ts, until_ts = _epoch(since_iso), _epoch(until_iso)
+            if any(n.startswith("refs/replace/") for n in self._ref_table()):
+                return None
+            sha, known = self.resolve(rev)
+            if not sha:
+                return [] if known else None
+            self._load()
+            return self._walk(bytes.fromhex(sha), since_ts, until_ts, limit)
+        except (Unsupported, OSError, ValueError, IndexError, struct.error, zlib.error):
+            return None
+
+    def _walk(self, tip: bytes, since_ts: float, until_ts: float, limit: int) -> List[Commit]:
+        # Date-ordered walk; like git, history is not followed past commits older than --since
+        out: List[Commit] = []
+        ctime, parents = self._meta(tip)
+        queue = [(-ctime, 0, tip, parents)]
+        seen = {tip}
+        n = 1
+        while queue:
+            neg, _i, oid, parents = heapq.heappop(queue)
+            if -neg < since_ts:
+                continue
+            if -neg <= until_ts:
+                if len(out) >= limit:
+                    raise Unsupported("window too large for the in-process walk")
+                out.append(self._commit(oid)[2])
+            for p in parents:
+                if p not in seen:
+                    seen.add(p)
+                    pt, pp = self._meta(p)
+                    heapq.heappush(queue, (-pt, n, p, pp))
+                    n += 1
+        return out
+
+
+def _epoch(iso: str) -> float:
+    d = dt.datetime.fromisoformat(iso)
+    if d.tzinfo is None:
+        d = d.astimezone()
+    return d.timestamp()
+
+
+def open_reader(repo: str) -> Optional[GitReader]:
+    """A reader for the repository containing `repo`, or None if its layout is unsupported."""
+    try:
+        git_dir = _find_git_dir(Path(repo).resolve())
+        if git_dir is None:
+            return None
+        common = git_dir
+        if (git_dir / "commondir").exists():
+            common = (git_dir / (git_dir / "commondir").read_text(encoding="utf-8").strip()).resolve()
+        config = (common / "config").read_text(encoding="utf-8", errors="replace").lower()
+        if re.search(r"objectformat\s*=\s*sha256|refstorage\s*=\s*reftable", config):
+            return None
+        for path in ("shallow", "info/grafts", "objects/info/alternates", "refs/replace"):
+            if (common / path).exists():
+                return None
+        return GitReader(git_dir, common)
+    except (OSError, UnicodeDecodeError):
+        return None
@@ -0,0 +1,381 @@
+"""Single seam for outbound HTTP.
+
+Every Jira/WakaTime/team-server request goes through `urlopen` here, which
+applies the caller's time budget (`set_deadline`, held in a context
+variable so concurrent calls each keep their own), the per-host circuit
+breaker (`use_breaker`), an optional per-host rate limit (`use_throttle`)
+and the record/replay cassette (`use_cassette`). All are inactive unless
+set up, in which case this is a plain pass-through to urllib.
+"""
+import base64
+import contextvars
+import datetime as dt
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from collections import deque
+from email.message import Message
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+from urllib.request import urlopen as _urlopen
+from urllib.response import addinfourl
+
+
+class DeadlineExceeded(URLError):
+    """Raised instead of sending a request once the time budget is spent."""
+
+
+class CircuitOpen(URLError):
+    """Raised instead of sending a request to a host whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Per-host consecutive-failure breaker, optionally persisted across processes.
+
+    After `threshold` failures in a row (timeouts, connection errors, 5xx, 429)
+    the host is skipped for `cooldown` seconds; the first call after that is a
+    trial that either closes the breaker or re-opens it. Failures are counted per
+    request wave: a failure only counts when its request started after the last
+    counted failure, so a burst of concurrent requests failing together (a thread
+    pool hitting one slow moment) is one failure, not one per worker. With `path`
+    the state is shared through that file; without it, it lives for this process.
+    """
+
+    def __init__(self, path: Optional[Path] = None, threshold: int = 3, cooldown: float = 300.0):
+        self.path = path
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, float]] = {}
+        if path is None:
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(data, dict):
+                self._hosts = {h: v for h, v in data.items() if isinstance(v, dict)}
+        except Exception:
+            pass
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            entry = self._hosts.get(host) or {}
+            return time.time() >= float(entry.get("open_until") or 0)
+
+    def record(self, host: str, ok: bool, started: Optional[float] = None) -> None:
+        """Record a request's outcome; `started` (time.time() when it was sent) groups concurrent failures."""
+        with self._lock:
+            entry = self._hosts.get(host) or {}
+            if ok:
+                if not entry:
+                    return
+                self._hosts.pop(host, None)
+            else:
+                now = time.time()
+                if started is not None and started < float(entry.get("failed_at") or 0):
+                    return  # same wave as a failure already counted
+                failures = int(entry.get("failures") or 0) + 1
+                entry = {"failures": failures, "open_until": entry.get("open_until") or 0, "failed_at": now}
+                if failures >= self.threshold:
+                    entry["open_until"] = now + self.cooldown
+                self._hosts[host] = entry
+            snapshot = dict(self._hosts)
+        self._save(snapshot)
+
+    def state(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {h: dict(v) for h, v in self._hosts.items()}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            tmp.replace(self.path)
+        except Exception:
+            pass
+
+
+# Query parameters that carry credentials; never written to a cassette
+_SECRET_PARAMS = {"api_key", "apikey", "token", "access_token", "password"}
+_SCRUBBED = "SCRUBBED"
+
+
+class Cassette:
+    """Recorded HTTP interactions for offline, deterministic re-runs.
+
+    In record mode (`Cassette(path)`) every request made through `urlopen` is sent
+    for real and its response, error and latency are kept; `save()` writes them as
+    JSON. Credentials are scrubbed: secret query parameters, request headers (not
+    stored at all) and any literal value passed as `secrets`.
+
+    In replay mode (`Cassette.load(path, speed)`) nothing goes on the wire. A
+    request is answered by the next unused interaction with the same method, URL
+    and body, else with the same method and path, after sleeping the recorded
+    latency times `speed` (0 = no delay). Unmatched requests raise URLError.
+    """
+
+    def __init__(self, path: Path, secrets: Iterable[str] = (), meta: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.replaying = False
+        self.speed = 1.0
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self.interactions: List[Dict[str, Any]] = []
+        self.secrets = sorted({s for s in secrets if s and len(s) >= 4}, key=len, reverse=True)
+        self.stats = {"served": 0, "fallback": 0, "missing": 0}
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[str, str, str], Deque[int]] = {}
+        self._loose: Dict[Tuple[str, str], Deque[int]] = {}
+        self._used: set = set()
+
+    @classmethod
+    def load(cls, path: Path, speed: float = 1.0, secrets: Iterable[str] = ()) -> "Cassette":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        tape = cls(path, secrets=secrets, meta=data.get("meta"))
+        tape.replaying = True
+        tape.speed = max(0.0, float(speed))
+        tape.interactions = [i for i in data.get("interactions") or [] if isinstance(i, dict)]
+        for n, item in enumerate(tape.interactions):
+            method, url = item.get("method", "GET"), item.get("url", "")
+            tape._exact.setdefault((method, url, item.get("body_sha", "")), deque()).append(n)
+            tape._loose.setdefault((method, urlparse(url).path), deque()).append(n)
+        return tape
+
+    # Scrubbing
+    def _scrub_text(self, text: str) -> str:
+        for secret in self.secrets:
+            text = text.replace(secret, _SCRUBBED)
+        return text
+
+    def _scrub_url(self, url: str) -> str:
+        parts = urlparse(url)
+        query = [(k, _SCRUBBED if k.lower() in _SECRET_PARAMS else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+        return self._scrub_text(urlunparse(parts._replace(query=urlencode(query))))
+
+    def _request_key(self, req: Any) -> Tuple[str, str, str, str]:
+        url = req.full_url if hasattr(req, "full_url") else str(req)
+        method = req.get_method() if hasattr(req, "get_method") else "GET"
+        data = getattr(req, "data", None)
+        body = self._scrub_text(data.decode("utf-8", errors="replace")) if isinstance(data, bytes) else ""
+        sha = hashlib.sha256(body.encode("utf-8")).hexdigest()[:16] if body else ""
+        return method, self._scrub_url(url), sha, body
+
+    @staticmethod
+    def _encode(body: bytes) -> Dict[str, str]:
+        try:
+            return {"response": body.decode("utf-8")}
+        except UnicodeDecodeError:
+            return {"response_b64": base64.b64encode(body).decode("ascii")}
+
+    # Recording
+    def record(self, req: Any, timeout: float, context: Any) -> Any:
+        method, url, sha, body = self._request_key(req)
+        item: Dict[str, Any] = {"method": method, "url": url, "body_sha": sha}
+        if body:
+            item["request"] = body
+        started = time.monotonic()
+        try:
+            resp = _urlopen(req, timeout=timeout, context=context) if context is not None else _urlopen(req, timeout=timeout)
+            with resp:
+                payload = resp.read()
+                status, headers, real_url = resp.status, resp.headers, resp.geturl()
+        except HTTPError as e:
+            payload = e.read() or b""
+            item.update(status=e.code, reason=str(e.reason), content_type=e.headers.get("Content-Type") if e.headers else None)
+            item.update(self._encode(self._scrub_text(payload.decode("utf-8", errors="replace")).encode("utf-8")))
+            self._keep(item, started)
+            raise HTTPError(e.url, e.code, e.msg, e.headers, io.BytesIO(payload)) from None
+        except Exception as e:
+            item["error"] = str(getattr(e, "reason", e))
+            self._keep(item, started)
+            raise
+        item.update(status=status, content_type=headers.get("Content-Type"))
+        item.update(self._encode(self._scrub_text(payload.decode("utf-8", errors="replace")).encode("utf-8")
+                                 if self.secrets else payload))
+        self._keep(item, started)
+        return addinfourl(io.BytesIO(payload), headers, real_url, status)
+
+    def _keep(self, item: Dict[str, Any], started: float) -> None:
+        item["latency_ms"] = int((time.monotonic() - started) * 1000)
+        with self._lock:
+            self.interactions.append(item)
+
+    def save(self) -> None:
+        self.meta.setdefault("recorded_at", dt.datetime.now().astimezone().isoformat())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+        with self._lock:
+            data = {"version": 1, "meta": self.meta, "interactions": list(self.interactions)}
+        tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+    # Replaying
+    def _take(self, queue: Optional[Deque[int]]) -> Optional[int]:
+        while queue:
+            n = queue.popleft()
+            if n not in self._used:
+                self._used.add(n)
+                return n
+        return None
+
+    def replay(self, req: Any, timeout: float) -> Any:
+        method, url, sha, _body = self._request_key(req)
+        with self._lock:
+            n = self._take(self._exact.get((method, url, sha)))
+            if n is None:
+                n = self._take(self._loose.get((method, urlparse(url).path)))
+                self.stats["fallback" if n is not None else "missing"] += 1
+            if n is not None:
+                self.stats["served"] += 1
+        if n is None:
+            raise URLError(f"no recorded response for {method} {url}")
+        item = self.interactions[n]
+        delay = item.get("latency_ms", 0) / 1000.0 * self.speed
+        if delay > float(timeout):
+            time.sleep(float(timeout))
+            raise URLError(TimeoutError("timed out (replayed latency)"))
+        if delay > 0:
+            time.sleep(delay)
+        if item.get("error"):
+            raise URLError(item["error"])
+        body = base64.b64decode(item["response_b64"]) if "response_b64" in item else str(item.get("response") or "").encode("utf-8")
+        headers = Message()
+        if item.get("content_type"):
+            headers["Content-Type"] = item["content_type"]
+        status = int(item.get("status") or 200)
+        full_url = req.full_url if hasattr(req, "full_url") else str(req)
+        if status >= 400:
+            raise HTTPError(full_url, status, item.get("reason") or "", headers, io.BytesIO(body))
+        return addinfourl(io.BytesIO(body), headers, full_url, status)
+
+
+_lock = threading.Lock()
+# Absolute monotonic deadline of the current call; threads and contexts do not share it
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("skuld_http_deadline", default=None)
+_breaker: Optional[CircuitBreaker] = None
+_cassette: Optional[Cassette] = None
+_throttle: Optional[Callable[[str], None]] = None
+
+
+def set_deadline(seconds: Optional[float]) -> "contextvars.Token[Optional[float]]":
+    """Start a time budget of `seconds` for requests made from the current context (None clears it).
+
+    Returns a token for `reset_deadline`, which restores whatever budget was active
+    before. Worker threads only see the budget when their task runs in a copy of
+    the caller's context (`contextvars.copy_context().run`).
+    """
+    return _deadline.set((time.monotonic() + float(seconds)) if seconds else None)
+
+
+def reset_deadline(token: "contextvars.Token[Optional[float]]") -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current context's budget, or None when no deadline is set."""
+    d = _deadline.get()
+    return None if d is None else d - time.monotonic()
+
+
+def use_breaker(breaker: Optional[CircuitBreaker]) -> None:
+    global _breaker
+    with _lock:
+        _breaker = breaker
+
+
+def breaker() -> Optional[CircuitBreaker]:
+    return _breaker
+
+
+def use_cassette(cassette: Optional[Cassette]) -> None:
+    """Record to or replay from `cassette` (None goes back to the network)."""
+    global _cassette
+    with _lock:
+        _cassette = cassette
+
+
+def use_throttle(throttle: Optional[Callable[[str], None]]) -> None:
+    """Call `throttle(host)` before each real request (blocking is how it slows us down)."""
+    global _throttle
+    with _lock:
+        _throttle = throttle
+
+
+def _failed(exc: BaseException) -> bool:
+    """Whether an error says the host is unhealthy (as opposed to rejecting this request)."""
+    if isinstance(exc, HTTPError):
+        return exc.code >= 500 or exc.code == 429
+    return isinstance(exc, (URLError, OSError))
+
+
+def _timed_out(exc: BaseException) -> bool:
+    reason = getattr(exc, "reason", exc)
+    return isinstance(reason, TimeoutError) or "timed out" in str(reason)
+
+
+_in_flight: Dict[str, int] = {}
+_in_flight_lock = threading.Lock()
+
+
+def in_flight() -> Dict[str, int]:
+    """{host: requests currently waiting for a response}, for progress displays."""
+    with _in_flight_lock:
+        return {h: n for h, n in _in_flight.items() if n > 0}
+
+
+@contextmanager
+def _flying(host: str) -> Iterator[None]:
+    with _in_flight_lock:
+        _in_flight[host] = _in_flight.get(host, 0) + 1
+    try:
+        yield
+    finally:
+        with _in_flight_lock:
+            _in_flight[host] -= 1
+
+
+def urlopen(req: Any, timeout: float = 10, context: Any = None):
+    """urllib's urlopen, bounded by the active deadline and circuit breaker."""
+    url = req.full_url if hasattr(req, "full_url") else str(req)
+    host = urlparse(url).netloc
+    tape = _cassette
+    if tape is not None and tape.replaying:
+        left = remaining()
+        if left is not None and left <= 0.05:
+            raise DeadlineExceeded("deadline exceeded")
+        with _flying(host):
+            return tape.replay(req, min(float(timeout), left) if left is not None else float(timeout))
+    cb = _breaker
+    if cb is not None and not cb.allow(host):
+        raise CircuitOpen(f"circuit open for {host}")
+    if _throttle is not None:
+        _throttle(host)
+    left = remaining()
+    clipped = False
+    if left is not None:
+        if left <= 0.05:
+            raise DeadlineExceeded("deadline exceeded")
+        clipped = left < float(timeout)
+        timeout = min(float(timeout), left)
+    started = time.time()
+    try:
+        with _flying(host):
+            if tape is not None:
+                resp = tape.record(req, timeout, context)
+            else:
+                resp = _urlopen(req, timeout=timeout, context=context) if context is not None else _urlopen(req, timeout=timeout)
+    except Exception as e:
+        # A timeout we shortened to fit the budget says nothing about the host
+        if cb is not None and not (clipped and _timed_out(e)):
+            cb.record(host, not _failed(e), started)
+        raise
+    if cb is not None:
+        cb.record(host, True)
+    return resp
@@ -0,0 +1,122 @@
+"""Exact time accounting for WakaTime durations.
+
+Durations are kept in compact array-backed columns. `branch_seconds` clips every
+duration to the window, merges overlapping intervals per branch and sums what is
+left, so consecutive windows partition time exactly: a duration straddling a
+boundary is split between the two windows instead of being counted whole by the
+one that contains its start. NumPy is used for large inputs when installed.
+"""
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+try:  # optional: vectorized path for large inputs
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+# Below this many rows the pure-Python sweep beats NumPy's call overhead
+NUMPY_MIN_ROWS = 512
+
+
+class Durations:
+    """Column store of (start, length, branch) rows with interned branch names."""
+
+    __slots__ = ("starts", "lengths", "branch_ids", "names", "_ids")
+
+    def __init__(self, rows: Iterable[Tuple[float, float, str]] = ()):
+        self.starts = array("d")
+        self.lengths = array("d")
+        self.branch_ids = array("l")
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.extend(rows)
+
+    def add(self, start: float, length: float, branch: str) -> None:
+        if length <= 0 or start <= 0:
+            return
+        bid = self._ids.get(branch)
+        if bid is None:
+            bid = self._ids[branch] = len(self.names)
+            self.names.append(branch)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.branch_ids.append(bid)
+
+    def extend(self, rows: Iterable[Tuple[float, float, str]]) -> None:
+        for start, length, branch in rows:
+            self.add(float(start or 0.0), float(length or 0.0), branch or "")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def _merged_length(spans: List[Tuple[float, float]]) -> float:
+    total = 0.0
+    cur_s = cur_e = None
+    for s, e in sorted(spans):
+        if cur_e is None or s > cur_e:
+            if cur_e is not None:
+                total += cur_e - cur_s
+            cur_s, cur_e = s, e
+        elif e > cur_e:
+            cur_e = e
+    if cur_e is not None:
+        total += cur_e - cur_s
+    return total
+
+
+def _branch_seconds_py(cols: Durations, lo: float, hi: float) -> Tuple[float, Dict[int, float]]:
+    by_branch: Dict[int, List[Tuple[float, float]]] = {}
+    every: List[Tuple[float, float]] = []
+    for s, n, b in zip(cols.starts, cols.lengths, cols.branch_ids):
+        cs, ce = max(s, lo), min(s + n, hi)
+        if ce > cs:
+            by_branch.setdefault(b, []).append((cs, ce))
+            every.append((cs, ce))
+    return _merged_length(every), {b: _merged_length(sp) for b, sp in by_branch.items()}
+
+
+def _merge_groups_np(starts, ends, groups):
+    """Union length per group id (int array) of [starts, ends) intervals, vectorized."""
+    order = np.lexsort((starts, groups))
+    s, e, g = starts[order], ends[order], groups[order]
+    # Running max of ends within each group: shift groups apart so one cumulative max works
+    span = float(max(e.max() - s.min(), 1.0)) * 2
+    shift = g.astype(np.float64) * span
+    ss, ee = s - s.min() + shift, e - s.min() + shift
+    run_max = np.maximum.accumulate(ee)
+    new_seg = np.ones(len(ss), dtype=bool)
+    new_seg[1:] = ss[1:] > run_max[:-1]
+    seg_idx = np.flatnonzero(new_seg)
+    seg_end = run_max[np.append(seg_idx[1:] - 1, len(ss) - 1)]
+    lengths = seg_end - ss[seg_idx]
+    return g[seg_idx], lengths
+
+
+def _branch_seconds_np(cols: Durations, lo: float, hi: float) -> Tuple[float, Dict[int, float]]:
+    starts = np.frombuffer(cols.starts, dtype=np.float64)
+    ends = starts + np.frombuffer(cols.lengths, dtype=np.float64)
+    bids = np.frombuffer(cols.branch_ids, dtype=np.dtype(f"i{cols.branch_ids.itemsize}")).astype(np.int64)
+    cs, ce = np.maximum(starts, lo), np.minimum(ends, hi)
+    keep = ce > cs
+    if not keep.any():
+        return 0.0, {}
+    cs, ce, bids = cs[keep], ce[keep], bids[keep]
+    seg_groups, seg_lengths = _merge_groups_np(cs, ce, bids)
+    per_branch = np.bincount(seg_groups, weights=seg_lengths, minlength=len(cols.names))
+    _g, total_lengths = _merge_groups_np(cs, ce, np.zeros(len(cs), dtype=np.int64))
+    return float(total_lengths.sum()), {b: float(v) for b, v in enumerate(per_branch) if v > 0}
+
+
+def branch_seconds(cols: Durations, lo: float = float("-inf"), hi: float = float("inf")) -> Tuple[float, Dict[str, float]]:
+    """Clip durations to [lo, hi), merge overlaps, and return (total seconds, {branch: seconds}).
+
+    The total is the union over all branches; rows without a branch count toward it only.
+    """
+    if not len(cols):
+        return 0.0, {}
+    if np is not None and len(cols) >= NUMPY_MIN_ROWS:
+        total, by_id = _branch_seconds_np(cols, lo, hi)
+    else:
+        total, by_id = _branch_seconds_py(cols, lo, hi)
+    return total, {cols.names[b]: secs for b, secs in by_id.items() if cols.names[b] and secs > 0}
@@ -1,62 +1,116 @@
 import base64
 import json
+from abc import ABC, abstractmethod
+import re
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from urllib.request import Request
 from urllib.error import HTTPError, URLError
 import ssl
 import datetime as dt
 
+from .http import urlopen
+
 
 def _auth_header(email: str, api_token: str) -> str:
     token = base64.b64encode(f"{email}:{api_token}".encode("utf-8")).decode("ascii")
     return f"Basic {token}"
 
 
-def search_issues(site: str, email: str, api_token: str, keys: List[str], timeout: int = 10) -> Dict[str, Dict[str, str]]:
-    """
-    Return mapping: key -> { 'summary': str, 'url': str }
-    Filters to issues assigned to the current user via JQL.
-    Swallows errors and returns empty mapping on failure.
+# Fields skuld reads from issues; search responses are projected to just these.
+ISSUE_FIELDS = ["summary", "assignee", "status", "updated"]
+# Byte budget for the `key in (...)` list of one JQL query; results are paginated
+# separately via nextPageToken, so this only bounds the query text.
+JQL_KEYS_BUDGET = 4000
+SEARCH_PAGE_SIZE = 100
+_ERROR_KEY_RX = re.compile(r"'([A-Z][A-Z0-9_]+-\d+)'")
+
+
+def _key_chunks(keys: List[str], budget: int = JQL_KEYS_BUDGET) -> List[List[str]]:
+    """Pack keys greedily into chunks whose comma-joined length stays within budget."""
+    chunks: List[List[str]] = []
+    cur: List[str] = []
+    size = 0
+    for k in keys:
+        add = len(k) + (1 if cur else 0)
+        if cur and size + add > budget:
+            chunks.append(cur)
+            cur, size, add = [], 0, len(k)
+        cur.append(k)
+        size += add
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _issue_fields(site: str, issue: dict) -> Dict[str, Optional[str]]:
+    """Flatten a Jira issue payload into the mapping skuld passes around."""
+    key = issue.get("key")
+    fields = issue.get("fields") or {}
+    assignee = fields.get("assignee") or {}
+    return {
+        "id": issue.get("id"),
+        "summary": fields.get("summary") or "",
+        "url": f"{site.rstrip('/')}/browse/{key}",
+        "assigneeAccountId": assignee.get("accountId"),
+        "assigneeEmail": assignee.get("emailAddress"),
+        "status": (fields.get("status") or {}).get("name"),
+        "updated": fields.get("updated"),
+    }
+
+
+def search_jql(site: str, email: str, api_token: str, jql: str, fields: Optional[List[str]] = None,
+               timeout: int = 10) -> Tuple[List[dict], Dict[str, any]]:
+    """Run a JQL query against the token-paginated /rest/api/3/search/jql endpoint.
+
+    Follows `nextPageToken` until the last page and returns (issues, entry) where
+    entry records the jql, pages fetched, last HTTP status and any error. On error
+    the issues gathered so far are returned alongside the error.
     """
-    if not (site and email and api_token and keys):
-        return {}
     ctx = ssl.create_default_context()
     headers = {
         "Authorization": _auth_header(email, api_token),
         "Content-Type": "application/json",
         "Accept": "application/json",
     }
-    results: Dict[str, Dict[str, str]] = {}
-
-    # Chunk keys to avoid JQL length limits
-    CHUNK = 50
-    for i in range(0, len(keys), CHUNK):
-        chunk = keys[i : i + CHUNK]
-        # JQL: key in (K1,K2,...) AND assignee=currentUser()
-        jql_keys = ",".join(chunk)
-        jql = f"key in ({jql_keys}) AND assignee = currentUser()"
-        body = {
-            "jql": jql,
-            "maxResults": len(chunk),
-            "fields": ["summary", "key"],
-        }
-        url = f"{site.rstrip('/')}/rest/api/3/search"
+    url = f"{site.rstrip('/')}/rest/api/3/search/jql"
+    entry: Dict[str, any] = {"jql": jql, "pages": 0, "status": None, "error": None}
+    issues: List[dict] = []
+    token: Optional[str] = None
+    while True:
+        body: Dict[str, any] = {"jql": jql, "maxResults": SEARCH_PAGE_SIZE, "fields": fields or ISSUE_FIELDS}
+        if token:
+            body["nextPageToken"] = token
         req = Request(url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST")
         try:
             with urlopen(req, timeout=timeout, context=ctx) as resp:
+                entry["status"] = getattr(resp, "status", None)
                 data = json.load(resp)
-        except Exception:
-            continue
-        for issue in (data.get("issues") or []):
-            key = issue.get("key")
-            fields = issue.get("fields") or {}
-            summary = fields.get("summary") or ""
-            if key:
-                results[key] = {
-                    "summary": summary,
-                    "url": f"{site.rstrip('/')}/browse/{key}",
-                }
+        except HTTPError as e:
+            entry["status"] = e.code
+            entry["error"] = str(e)
+            try:
+                entry["detail"] = e.read().decode("utf-8", errors="ignore")[:2000]
+            except Exception:
+                pass
+            return issues, entry
+        except Exception as e:
+            entry["error"] = str(e)
+            return issues, entry
+        entry["pages"] += 1
+        issues.extend(data.get("issues") or [])
+        token = data.get("nextPageToken")
+        if not token or data.get("isLast"):
+            return issues, entry
+
+
+def search_issues(site: str, email: str, api_token: str, keys: List[str], timeout: int = 10) -> Dict[str, Dict[str, str]]:
+    """
+    Return mapping: key -> { 'summary': str, 'url': str }
+    Filters to issues assigned to the current user via JQL.
+    Swallows errors and returns empty mapping on failure.
+    """
+    results, _meta = search_issues_debug(site, email, api_token, keys, timeout=timeout)
     return results
 
 
@@ -69,36 +123,17 @@ def search_issues_debug(site: str, email: str, api_token: str, keys: List[str],
     if not (site and email and api_token and keys):
         meta["error"] = "missing_params"
         return results, meta
-    ctx = ssl.create_default_context()
-    headers = {
-        "Authorization": _auth_header(email, api_token),
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
-    CHUNK = 50
-    for i in range(0, len(keys), CHUNK):
-        chunk = keys[i : i + CHUNK]
-        jql_keys = ",".join(chunk)
-        jql = f"key in ({jql_keys}) AND assignee = currentUser()"
-        body = {"jql": jql, "maxResults": len(chunk), "fields": ["summary", "key"]}
-        url = f"{site.rstrip('/')}/rest/api/3/search"
-        entry = {"jql": jql, "keys": chunk, "status": None, "error": None}
-        try:
-            req = Request(url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST")
-            with urlopen(req, timeout=timeout, context=ctx) as resp:
-                entry["status"] = getattr(resp, "status", None)
-                data = json.load(resp)
-        except Exception as e:
-            entry["error"] = str(e)
-            meta["chunks"].append(entry)
-            continue
-        for issue in (data.get("issues") or []):
+    # Chunk keys to avoid JQL length limits
+    for chunk in _key_chunks(keys):
+        # JQL: key in (K1,K2,...) AND assignee=currentUser()
+        jql = f"key in ({','.join(chunk)}) AND assignee = currentUser()"
+        issues, entry = search_jql(site, email, api_token, jql, fields=["summary"], timeout=timeout)
+        entry["keys"] = chunk
+        meta["chunks"].append(entry)
+        for issue in issues:
             key = issue.get("key")
-            fields = issue.get("fields") or {}
-            summary = fields.get("summary") or ""
             if key:
-                results[key] = {"summary": summary, "url": f"{site.rstrip('/')}/browse/{key}"}
-        meta["chunks"].append(entry)
+                results[key] = {"summary": (issue.get("fields") or {}).get("summary") or "", "url": f"{site.rstrip('/')}/browse/{key}"}
     return results, meta
 
 
@@ -122,55 +157,63 @@ def get_myself(site: str, email: str, api_token: str, timeout: int = 10):
         return None, str(e)
 
 
-def search_issues_noassignee(site: str, email: str, api_token: str, keys: List[str], timeout: int = 10):
+def search_issues_noassignee(site: str, email: str, api_token: str, keys: List[str], timeout: int = 10,
+                             bad_keys: Optional[set] = None):
     """Search issues by keys without assignee filter; return mapping key -> fields.
-    Falls back to per-issue GET if search fails.
+
+    A single deleted or inaccessible key makes Jira reject the whole `key in (...)`
+    query with a 400. Rejected chunks are retried without the keys named in the
+    error, or split in half recursively until the bad keys are isolated. Isolated
+    keys are added to `bad_keys` (a caller-owned negative cache) and keys already
+    in it are never sent. Falls back to per-issue GETs only when the search
+    endpoint itself is unavailable (404/410).
     """
-    ctx = ssl.create_default_context()
-    headers = {
-        "Authorization": _auth_header(email, api_token),
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
-    url = f"{site.rstrip('/')}/rest/api/3/search"
     results: Dict[str, Dict[str, str]] = {}
-    meta: Dict[str, any] = {"chunks": []}
-    CHUNK = 50
-    for i in range(0, len(keys), CHUNK):
-        chunk = keys[i : i + CHUNK]
-        jql_keys = ",".join(chunk)
-        jql = f"key in ({jql_keys})"
-        body = {"jql": jql, "maxResults": len(chunk), "fields": ["summary", "key", "assignee"]}
-        entry = {"jql": jql, "keys": chunk, "status": None, "error": None}
-        try:
-            req = Request(url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST")
-            with urlopen(req, timeout=timeout, context=ctx) as resp:
-                entry["status"] = getattr(resp, "status", None)
-                data = json.load(resp)
-        except Exception as e:
-            entry["error"] = str(e)
-            meta["chunks"].append(entry)
-            # Fallback to per-issue GETs for this chunk
+    meta: Dict[str, any] = {"chunks": [], "bad_keys": []}
+    bad = bad_keys if bad_keys is not None else set()
+    wanted = [k for k in keys if k not in bad]
+    meta["skipped_bad"] = [k for k in keys if k in bad]
+
+    def _mark_bad(key: str) -> None:
+        bad.add(key)
+        meta["bad_keys"].append(key)
+
+    def _search(chunk: List[str]) -> None:
+        if not chunk:
+            return
+        issues, entry = search_jql(site, email, api_token, f"key in ({','.join(chunk)})", timeout=timeout)
+        entry["keys"] = chunk
+        meta["chunks"].append(entry)
+        if not entry["error"]:
+            for issue in issues:
+                if issue.get("key"):
+                    results[issue["key"]] = _issue_fields(site, issue)
+            return
+        if entry["status"] in (404, 410):
+            # Search endpoint unavailable: fall back to per-issue GETs for this chunk
             for key in chunk:
                 info, err = get_issue(site, email, api_token, key, timeout=timeout)
                 if info:
                     results[key] = info
-            continue
-        for issue in (data.get("issues") or []):
-            key = issue.get("key")
-            fields = issue.get("fields") or {}
-            summary = fields.get("summary") or ""
-            assignee = fields.get("assignee") or {}
-            acct = assignee.get("accountId")
-            email_addr = assignee.get("emailAddress")
-            if key:
-                results[key] = {
-                    "summary": summary,
-                    "url": f"{site.rstrip('/')}/browse/{key}",
-                    "assigneeAccountId": acct,
-                    "assigneeEmail": email_addr,
-                }
-        meta["chunks"].append(entry)
+            return
+        if entry["status"] != 400:
+            # Auth, rate-limit, server or network errors are not caused by a key; don't amplify
+            return
+        if len(chunk) == 1:
+            _mark_bad(chunk[0])
+            return
+        named = [k for k in _ERROR_KEY_RX.findall(entry.get("detail") or "") if k in chunk]
+        if named:
+            for k in named:
+                _mark_bad(k)
+            _search([k for k in chunk if k not in named])
+            return
+        mid = len(chunk) // 2
+        _search(chunk[:mid])
+        _search(chunk[mid:])
+
+    for chunk in _key_chunks(wanted):
+        _search(chunk)
     return results, meta
 
 
@@ -180,22 +223,13 @@ def get_issue(site: str, email: str, api_token: str, key: str, timeout: int = 10
         "Authorization": _auth_header(email, api_token),
         "Accept": "application/json",
     }
-    url = f"{site.rstrip('/')}/rest/api/3/issue/{key}?fields=summary,assignee"
+    url = f"{site.rstrip('/')}/rest/api/3/issue/{key}?fields={','.join(ISSUE_FIELDS)}"
     req = Request(url, headers=headers, method="GET")
     try:
         with urlopen(req, timeout=timeout, context=ctx) as resp:
             data = json.load(resp)
-            fields = data.get("fields") or {}
-            summary = fields.get("summary") or ""
-            assignee = fields.get("assignee") or {}
-            acct = assignee.get("accountId")
-            email_addr = assignee.get("emailAddress")
-            return {
-                "summary": summary,
-                "url": f"{site.rstrip('/')}/browse/{key}",
-                "assigneeAccountId": acct,
-                "assigneeEmail": email_addr,
-            }, None
+            data.setdefault("key", key)
+            return _issue_fields(site, data), None
     except Exception as e:
         return None, str(e)
 
@@ -360,6 +394,63 @@ def add_worklog(site: str, email: str, api_token: str, key: str, seconds: int, s
         return None, str(e)
 
 
+def get_worklog(site: str, email: str, api_token: str, key: str, worklog_id: str,
+                timeout: int = 10) -> tuple[dict | None, str | None]:
+    ctx = ssl.create_default_context()
+    headers = {
+        "Authorization": _auth_header(email, api_token),
+        "Accept": "application/json",
+    }
+    url = f"{site.rstrip('/')}/rest/api/3/issue/{key}/worklog/{worklog_id}"
+    req = Request(url, headers=headers, method="GET")
+    try:
+        with urlopen(req, timeout=timeout, context=ctx) as resp:
+            return json.load(resp), None
+    except HTTPError as e:
+        return None, f"{e}"
+    except Exception as e:
+        return None, str(e)
+
+
+def update_worklog(site: str, email: str, api_token: str, key: str, worklog_id: str, seconds: int,
+                   comment_adf: dict | None = None, timeout: int = 10) -> tuple[dict | None, str | None]:
+    """PUT a new total duration (and optionally comment) on an existing worklog; `started` is left as is."""
+    if seconds <= 0:
+        return None, "non_positive_seconds"
+    ctx = ssl.create_default_context()
+    headers = {
+        "Authorization": _auth_header(email, api_token),
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+    body: dict = {"timeSpentSeconds": int(seconds)}
+    if comment_adf is not None:
+        body["comment"] = comment_adf
+    url = f"{site.rstrip('/')}/rest/api/3/issue/{key}/worklog/{worklog_id}?adjustEstimate=auto"
+    req = Request(url, data=json.dumps(body).encode("utf-8"), headers=headers, method="PUT")
+    try:
+        with urlopen(req, timeout=timeout, context=ctx) as resp:
+            return json.load(resp), None
+    except HTTPError as e:
+        try:
+            detail = e.read().decode("utf-8", errors="ignore")
+        except Exception:
+            detail = ""
+        return None, f"{e} {detail}".strip()
+    except URLError as e:
+        return None, f"{e}"
+    except Exception as e:
+        return None, str(e)
+
+
+def merge_adf(existing: dict | None, comment_text: str) -> dict:
+    """Append a plain-text comment's paragraphs to an existing ADF document."""
+    added = _to_adf(comment_text).get("content") or []
+    if not isinstance(existing, dict) or not isinstance(existing.get("content"), list):
+        return _to_adf(comment_text)
+    return {**existing, "content": list(existing["content"]) + added}
+
+
 def add_comment(site: str, email: str, api_token: str, key: str, comment_text: str,
                 timeout: int = 10) -> tuple[dict | None, str | None]:
     ctx = ssl.create_default_context()
@@ -397,9 +488,8 @@ def _parse_jira_datetime(s: str) -> dt.datetime | None:
     return None
 
 
-def get_my_worklog_seconds(site: str, email: str, api_token: str, key: str, account_id: str | None,
-                           since_iso: str, until_iso: str, timeout: int = 10) -> tuple[int, str | None]:
-    """Sum timeSpentSeconds for current user on issue within [since, until]."""
+def get_worklogs(site: str, email: str, api_token: str, key: str, timeout: int = 10) -> tuple[list, str | None]:
+    """Return compact worklogs for an issue as [started, timeSpentSeconds, authorAccountId] rows."""
     ctx = ssl.create_default_context()
     headers = {
         "Authorization": _auth_header(email, api_token),
@@ -411,8 +501,19 @@ def get_my_worklog_seconds(site: str, email: str, api_token: str, key: str, acco
         with urlopen(req, timeout=timeout, context=ctx) as resp:
             data = json.load(resp)
     except Exception as e:
-        return 0, str(e)
+        return [], str(e)
+    rows = []
+    for wl in (data.get("worklogs") or []):
+        try:
+            secs = int(wl.get("timeSpentSeconds") or 0)
+        except Exception:
+            secs = 0
+        rows.append([wl.get("started"), secs, (wl.get("author") or {}).get("accountId")])
+    return rows, None
+
 
+def sum_my_worklog_seconds(worklogs: list, account_id: str | None, since_iso: str, until_iso: str) -> int:
+    """Sum seconds of compact worklog rows (see get_worklogs) for the user within [since, until]."""
     # Normalize window to UTC-aware datetimes, assuming since/until are in local time
     try:
         _start = dt.datetime.fromisoformat(since_iso)
@@ -427,11 +528,9 @@ def get_my_worklog_seconds(site: str, email: str, api_token: str, key: str, acco
     end = _end.replace(tzinfo=local_tz).astimezone(dt.timezone.utc) if _end and local_tz else None
 
     total = 0
-    for wl in (data.get("worklogs") or []):
-        author = wl.get("author") or {}
-        if account_id and author.get("accountId") != account_id:
+    for started_str, secs, author in worklogs:
+        if account_id and author != account_id:
             continue
-        started_str = wl.get("started")
         d = _parse_jira_datetime(started_str) if started_str else None
         if d is None:
             continue
@@ -441,9 +540,262 @@ def get_my_worklog_seconds(site: str, email: str, api_token: str, key: str, acco
             continue
         if end and d_utc > end:
             continue
+        total += int(secs or 0)
+    return total
+
+
+def get_my_worklog_seconds(site: str, email: str, api_token: str, key: str, account_id: str | None,
+                           since_iso: str, until_iso: str, timeout: int = 10) -> tuple[int, str | None]:
+    """Sum timeSpentSeconds for current user on issue within [since, until]."""
+    rows, err = get_worklogs(site, email, api_token, key, timeout=timeout)
+    if err:
+        return 0, err
+    return sum_my_worklog_seconds(rows, account_id, since_iso, until_iso), None
+
+
+def _worklog_feed(site: str, email: str, api_token: str, kind: str, since_ms: int,
+                  timeout: int = 10) -> tuple[list, int | None, str | None]:
+    """Follow /worklog/{updated|deleted}?since= pages; return (worklog ids, until cursor ms, error)."""
+    ctx = ssl.create_default_context()
+    headers = {
+        "Authorization": _auth_header(email, api_token),
+        "Accept": "application/json",
+    }
+    url: str | None = f"{site.rstrip('/')}/rest/api/3/worklog/{kind}?since={int(since_ms)}"
+    ids: list = []
+    until: int | None = None
+    while url:
+        req = Request(url, headers=headers, method="GET")
         try:
-            secs = int(wl.get("timeSpentSeconds") or 0)
+            with urlopen(req, timeout=timeout, context=ctx) as resp:
+                data = json.load(resp)
+        except Exception as e:
+            return ids, None, str(e)
+        for v in (data.get("values") or []):
+            if v.get("worklogId") is not None:
+                ids.append(v["worklogId"])
+        if data.get("until") is not None:
+            until = int(data["until"])
+        url = None if data.get("lastPage", True) else data.get("nextPage")
+    return ids, until, None
+
+
+def get_updated_worklog_ids(site: str, email: str, api_token: str, since_ms: int, timeout: int = 10):
+    """Ids of worklogs created/updated since the cursor, plus the next cursor."""
+    return _worklog_feed(site, email, api_token, "updated", since_ms, timeout=timeout)
+
+
+def get_deleted_worklog_ids(site: str, email: str, api_token: str, since_ms: int, timeout: int = 10):
+    """Ids of worklogs deleted since the cursor, plus the next cursor."""
+    return _worklog_feed(site, email, api_token, "deleted", since_ms, timeout=timeout)
+
+
+def get_worklogs_by_ids(site: str, email: str, api_token: str, ids: list, timeout: int = 10) -> tuple[list, str | None]:
+    """Fetch full worklogs for ids via POST /worklog/list (1000 ids per request)."""
+    ctx = ssl.create_default_context()
+    headers = {
+        "Authorization": _auth_header(email, api_token),
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+    url = f"{site.rstrip('/')}/rest/api/3/worklog/list"
+    out: list = []
+    for i in range(0, len(ids), 1000):
+        body = {"ids": [int(x) for x in ids[i : i + 1000]]}
+        req = Request(url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST")
+        try:
+            with urlopen(req, timeout=timeout, context=ctx) as resp:
+                data = json.load(resp)
+        except Exception as e:
+            return out, str(e)
+        if isinstance(data, list):
+            out.extend(data)
+    return out, None
+
+
+# Worklog backends: where `sync` writes worklogs and, optionally, reads the user's
+# already-logged time in bulk. Selected with `jira.worklogBackend` (jira | tempo).
+
+TEMPO_API = "https://api.tempo.io/4"
+TEMPO_PAGE_SIZE = 1000
+
+
+class WorklogBackend(ABC):
+    """Interface for worklog storage.
+
+    `submit` receives every worklog a sync wants to create as dicts with `key`,
+    `issue_id`, `seconds`, `started` (aware datetime) and `comment`, and calls
+    `on_result(item, data, err)` as each one is confirmed, so callers can record
+    state per worklog. `data` follows Jira's worklog shape (`id`, optionally
+    `author.accountId`).
+    """
+
+    name = "jira"
+
+    def read(self, account_id: str, since_iso: str, until_iso: str,
+             timeout: int = 10) -> Tuple[Optional[Dict[str, list]], Optional[str]]:
+        """{issue id: compact worklog rows} for the account in the window.
+
+        (None, None) means this backend has no bulk read; use get_worklogs per issue.
+        """
+        return None, None
+
+    @abstractmethod
+    def submit(self, items: List[dict], on_result, timeout: int = 10) -> None:
+        """Create the worklogs, calling `on_result` once per item."""
+
+
+class JiraWorklogs(WorklogBackend):
+    """Jira's own worklogs: one POST per worklog (`post` defaults to add_worklog)."""
+
+    name = "jira"
+
+    def __init__(self, site: str, email: str, api_token: str, post=None):
+        self.site = site
+        self.email = email
+        self.api_token = api_token
+        self.post = post or add_worklog
+
+    def submit(self, items: List[dict], on_result, timeout: int = 10) -> None:
+        for item in items:
+            data, err = self.post(site=self.site, email=self.email, api_token=self.api_token, key=item["key"],
+                                  seconds=int(item["seconds"]), started=item["started"], comment=item["comment"])
+            on_result(item, data, err)
+
+
+def _tempo_call(url: str, api_token: str, method: str = "GET", body=None,
+                timeout: int = 10) -> tuple[object | None, str | None]:
+    headers = {"Authorization": f"Bearer {api_token}", "Accept": "application/json"}
+    data = None
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+        data = json.dumps(body).encode("utf-8")
+    req = Request(url, data=data, headers=headers, method=method)
+    try:
+        with urlopen(req, timeout=timeout, context=ssl.create_default_context()) as resp:
+            return json.load(resp), None
+    except HTTPError as e:
+        try:
+            detail = e.read().decode("utf-8", errors="ignore")
         except Exception:
-            secs = 0
-        total += secs
-    return total, None
+            detail = ""
+        return None, f"{e} {detail}".strip()
+    except URLError as e:
+        return None, f"{e}"
+    except Exception as e:
+        return None, str(e)
+
+
+class TempoWorklogs(WorklogBackend):
+    """Tempo Timesheets (REST API v4), which mirrors its worklogs into Jira.
+
+    Reads are one paginated `/worklogs/user/{accountId}` search for the whole window;
+    writes go through `/worklogs/issue/{issueId}/bulk`, one request per issue
+    however many worklogs it gets. Tempo addresses issues by numeric id.
+    """
+
+    name = "tempo"
+
+    def __init__(self, api_token: str, account_id: str, base_url: str = TEMPO_API):
+        self.api_token = api_token
+        self.account_id = account_id
+        self.base_url = (base_url or TEMPO_API).rstrip("/")
+
+    @staticmethod
+    def _started(w: dict) -> Optional[str]:
+        # Tempo keeps the worker's local date and time; rows use Jira's offset format
+        try:
+            local = dt.datetime.fromisoformat(f"{w['startDate']}T{w.get('startTime') or '00:00:00'}")
+        except Exception:
+            return None
+        return _fmt_started(local)
+
+    def _search(self, account_id: str, first: str, last: str, timeout: int) -> Tuple[Optional[List[dict]], Optional[str]]:
+        """Raw Tempo worklogs of the account for dates [first, last], all pages."""
+        params = {"from": first, "to": last, "limit": TEMPO_PAGE_SIZE, "offset": 0}
+        url: Optional[str] = f"{self.base_url}/worklogs/user/{account_id or self.account_id}?{urlencode(params)}"
+        out: List[dict] = []
+        while url:
+            data, err = _tempo_call(url, self.api_token, timeout=timeout)
+            if err or not isinstance(data, dict):
+                return None, err or "bad_response"
+            out.extend(w for w in (data.get("results") or []) if isinstance(w, dict))
+            url = (data.get("metadata") or {}).get("next")
+        return out, None
+
+    def read(self, account_id: str, since_iso: str, until_iso: str,
+             timeout: int = 10) -> Tuple[Optional[Dict[str, list]], Optional[str]]:
+        found, err = self._search(account_id, since_iso[:10], until_iso[:10], timeout)
+        if found is None:
+            return None, err
+        rows: Dict[str, list] = {}
+        for w in found:
+            issue_id = (w.get("issue") or {}).get("id")
+            started = self._started(w)
+            if issue_id is None or not started:
+                continue
+            author = (w.get("author") or {}).get("accountId") or account_id
+            rows.setdefault(str(issue_id), []).append([started, int(w.get("timeSpentSeconds") or 0), author])
+        return rows, None
+
+    def submit(self, items: List[dict], on_result, timeout: int = 10) -> None:
+        by_issue: Dict[str, List[dict]] = {}
+        for item in items:
+            if not item.get("issue_id"):
+                on_result(item, None, "tempo: unknown Jira issue id")
+                continue
+            by_issue.setdefault(str(item["issue_id"]), []).append(item)
+        unconfirmed: List[Tuple[dict, dict]] = []
+        for issue_id, group in by_issue.items():
+            body = []
+            for item in group:
+                local = item["started"].astimezone()
+                body.append({
+                    "authorAccountId": self.account_id,
+                    "startDate": local.strftime("%Y-%m-%d"),
+                    "startTime": local.strftime("%H:%M:%S"),
+                    "timeSpentSeconds": int(item["seconds"]),
+                    "description": item["comment"],
+                })
+            data, err = _tempo_call(f"{self.base_url}/worklogs/issue/{issue_id}/bulk", self.api_token, "POST",
+                                    body, timeout=timeout)
+            # Results come back in request order
+            created = data if isinstance(data, list) else []
+            for n, item in enumerate(group):
+                if err:
+                    on_result(item, None, err)
+                    continue
+                w = created[n] if n < len(created) and isinstance(created[n], dict) else {}
+                if w.get("tempoWorklogId"):
+                    on_result(item, {"id": str(w["tempoWorklogId"]), "tempo": w}, None)
+                else:
+                    unconfirmed.append((item, body[n]))
+        if unconfirmed:
+            self._confirm(unconfirmed, on_result, timeout)
+
+    def _confirm(self, pending: List[Tuple[dict, dict]], on_result, timeout: int) -> None:
+        """Look up worklogs the bulk response did not return an id for, by re-reading their dates.
+
+        A match is a worklog on the same issue with the same start, duration and
+        description that no other item claimed. Anything unmatched is reported as an
+        error, not recorded: the next preview reads Tempo again, so it cannot double-post.
+        """
+        dates = sorted(fields["startDate"] for _item, fields in pending)
+        found, err = self._search(self.account_id, dates[0], dates[-1], timeout)
+        claimed: set = set()
+        for item, fields in pending:
+            match = None
+            for w in found or []:
+                wid = w.get("tempoWorklogId")
+                if (wid and wid not in claimed and str((w.get("issue") or {}).get("id")) == str(item["issue_id"])
+                        and w.get("startDate") == fields["startDate"]
+                        and (w.get("startTime") or "00:00:00") == fields["startTime"]
+                        and int(w.get("timeSpentSeconds") or 0) == fields["timeSpentSeconds"]
+                        and (w.get("description") or "") == fields["description"]):
+                    match = w
+                    break
+            if match is None:
+                on_result(item, None, f"tempo: worklog not confirmed ({err or 'no id in response and not found on re-read'})")
+                continue
+            claimed.add(match["tempoWorklogId"])
+            on_result(item, {"id": str(match["tempoWorklogId"]), "tempo": match}, None)
@@ -0,0 +1,91 @@
+"""Local mirror of the current user's Jira worklogs.
+
+Kept in sync incrementally through Jira's `/worklog/updated` and
+`/worklog/deleted` feeds, so "already logged" sums for a preview are computed
+locally instead of by paging every issue's worklog list. The feeds are
+site-wide, so the mirror starts at the first preview window it serves rather
+than reaching further back, and keeps only this account's worklogs.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from .cache import load as cache_load, save as cache_save, slot as cache_slot
+from .jira import get_deleted_worklog_ids, get_updated_worklog_ids, get_worklogs_by_ids
+
+# Jira omits worklogs changed in the minute before a feed request; re-read that overlap.
+_FEED_LAG_MS = 60_000
+
+
+class WorklogLedger:
+    """Worklogs authored by one account on one site: {worklog id: [issue id, started, seconds]}."""
+
+    def __init__(self, state_path: str, site: str, account_id: str, since_ms: Optional[int] = None):
+        """Load the saved mirror; a new one starts at `since_ms` (the preview window start), else now."""
+        self.state_path = state_path
+        self.site = site
+        self.account_id = account_id
+        self.name = f"ledger-{cache_slot(site + '|' + account_id)}.json"
+        data = cache_load(state_path, self.name)
+        if data.get("account") != account_id:
+            data = {}
+        self.fresh = not data
+        self.horizon_ms = int(data.get("horizon") or since_ms or int(time.time() * 1000))
+        self.cursor = int(data.get("cursor") or self.horizon_ms)
+        self.deleted_cursor = int(data.get("deleted_cursor") or self.cursor)
+        self.worklogs: Dict[str, List[Any]] = dict(data.get("worklogs") or {})
+        self.synced = False
+
+    def refresh(self, email: str, api_token: str, timeout: int = 10) -> Optional[str]:
+        """Apply worklog changes since the last cursor; returns an error string on failure."""
+        ids, until, err = get_updated_worklog_ids(self.site, email, api_token, self.cursor, timeout=timeout)
+        if err:
+            return err
+        if ids:
+            wls, err = get_worklogs_by_ids(self.site, email, api_token, ids, timeout=timeout)
+            if err:
+                return err
+            for wl in wls:
+                self.add(wl)
+        gone, del_until, err = get_deleted_worklog_ids(self.site, email, api_token, self.deleted_cursor, timeout=timeout)
+        if err:
+            return err
+        for wid in gone:
+            self.worklogs.pop(str(wid), None)
+        if until:
+            self.cursor = max(self.horizon_ms, until - _FEED_LAG_MS)
+        if del_until:
+            self.deleted_cursor = max(self.horizon_ms, del_until - _FEED_LAG_MS)
+        self.synced = True
+        return None
+
+    def add(self, wl: Dict[str, Any]) -> None:
+        """Insert or update a worklog payload if this account authored it; drop it otherwise."""
+        wid = wl.get("id")
+        if wid is None:
+            return
+        if (wl.get("author") or {}).get("accountId") != self.account_id:
+            self.worklogs.pop(str(wid), None)
+            return
+        try:
+            secs = int(wl.get("timeSpentSeconds") or 0)
+        except Exception:
+            secs = 0
+        self.worklogs[str(wid)] = [str(wl.get("issueId") or ""), wl.get("started"), secs]
+
+    def covers(self, since_ms: int) -> bool:
+        """True when the mirror is synced and reaches back to the window start."""
+        return self.synced and since_ms >= self.horizon_ms
+
+    def rows_for_issue(self, issue_id: str) -> List[List[Any]]:
+        """Worklog rows in the [started, seconds, accountId] shape of jira.get_worklogs."""
+        iid = str(issue_id)
+        return [[started, secs, self.account_id] for (wl_issue, started, secs) in self.worklogs.values() if wl_issue == iid]
+
+    def save(self) -> None:
+        cache_save(self.state_path, self.name, {
+            "account": self.account_id,
+            "horizon": self.horizon_ms,
+            "cursor": self.cursor,
+            "deleted_cursor": self.deleted_cursor,
+            "worklogs": self.worklogs,
+        })
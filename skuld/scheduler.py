@@ -0,0 +1,94 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .git import list_refs
+
+
+def ref_fingerprint(repo: str, reader: Any = None) -> Optional[str]:
+    """Return a short hash of all local branch tips (and HEAD) for the repo.
+
+    Cheap change detector for the watcher: a new commit, amend, rebase or
+    branch switch changes the fingerprint. Returns None when git fails.
+    With a `gitgraph.GitReader` the refs are read without spawning git.
+    """
+    refs = list_refs(repo, reader)
+    if not refs:
+        return None
+    raw = "\n".join(f"{k} {v}" for k, v in sorted(refs.items()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class Debouncer:
+    """Collapse bursts of changes per key into a single run.
+
+    A key becomes due once it has changed and then stayed quiet for
+    `quiet` seconds, or when `interval` seconds passed since its last run
+    (periodic sync even without new commits, to pick up WakaTime time).
+    """
+
+    def __init__(self, quiet: float, interval: float):
+        self.quiet = float(quiet)
+        self.interval = float(interval)
+        self._fp: Dict[str, Optional[str]] = {}
+        self._changed_at: Dict[str, float] = {}
+        self._last_run: Dict[str, float] = {}
+
+    def observe(self, key: str, fingerprint: Optional[str], now: float) -> None:
+        if key not in self._fp:
+            self._fp[key] = fingerprint
+            return
+        if fingerprint != self._fp[key]:
+            self._fp[key] = fingerprint
+            self._changed_at[key] = now
+
+    def due(self, key: str, now: float) -> bool:
+        if key not in self._last_run:
+            return True
+        changed = self._changed_at.get(key)
+        if changed is not None and now - changed >= self.quiet:
+            return True
+        return now - self._last_run[key] >= self.interval
+
+    def mark_run(self, key: str, now: float) -> None:
+        self._last_run[key] = now
+        self._changed_at.pop(key, None)
+
+
+class Backoff:
+    """Exponential backoff on slow or failing runs; resets after a healthy one."""
+
+    def __init__(self, base: float, maximum: float, slow_after: float):
+        self.base = float(base)
+        self.maximum = float(maximum)
+        self.slow_after = float(slow_after)
+        self.delay = 0.0
+
+    def record(self, elapsed: float, ok: bool) -> float:
+        if ok and elapsed < self.slow_after:
+            self.delay = 0.0
+        else:
+            self.delay = min(self.maximum, max(self.base, self.delay * 2))
+        return self.delay
+
+
+def pid_path(state_path: str) -> Path:
+    """Location of the watcher pid file (next to the state file)."""
+    return Path(os.path.expanduser(state_path)).resolve().parent / "watch.pid"
+
+
+def write_pid(state_path: str) -> Path:
+    p = pid_path(state_path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(str(os.getpid()), encoding="utf-8")
+    return p
+
+
+def clear_pid(state_path: str) -> None:
+    try:
+        p = pid_path(state_path)
+        if p.exists() and p.read_text(encoding="utf-8").strip() == str(os.getpid()):
+            p.unlink()
+    except Exception:
+        pass
@@ -1,8 +1,22 @@
+import contextlib
+import datetime as dt
 import hashlib
 import json
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterator, Optional, TypeVar
+
+try:  # POSIX only; elsewhere writes are still atomic but not serialized across processes
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+T = TypeVar("T")
+
+# A reservation whose upload never finished (crash, kill) stops blocking retries after this long
+RESERVATION_TTL = 900.0
 
 
 def _expand(p: str) -> Path:
@@ -32,9 +46,42 @@ def _load(path: Path) -> Dict[str, Any]:
 
 def _save(path: Path, data: Dict[str, Any]) -> None:
     _ensure_dir(path)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
-    tmp.replace(path)
+    # Unique tmp name per writer so concurrent runs never clobber each other's partial file
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold an exclusive inter-process lock on `<state>.lock` for a read-modify-write."""
+    _ensure_dir(path)
+    with open(path.with_suffix(path.suffix + ".lock"), "a+") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _update(state_path: str, mutate: Callable[[Dict[str, Any]], T]) -> T:
+    """Apply `mutate` to the latest on-disk state under the lock, write it back, return its result.
+
+    Re-reading inside the lock merges with whatever other processes (the post-commit
+    hook, syncs of other repos) wrote since this one started, instead of overwriting it.
+    """
+    path = _expand(state_path)
+    with _locked(path):
+        data = _load(path)
+        result = mutate(data)
+        _save(path, data)
+    return result
 
 
 def _entry_id(issue: str, since: str, until: str, seconds: int) -> str:
@@ -42,26 +89,86 @@ def _entry_id(issue: str, since: str, until: str, seconds: int) -> str:
     return hashlib.sha256(raw).hexdigest()
 
 
+def _live(e: Any, now: float) -> bool:
+    """A recorded upload, or a reservation another run may still complete."""
+    if not isinstance(e, dict):
+        return False
+    return not e.get("reserved") or now - float(e.get("reserved_at") or 0) < RESERVATION_TTL
+
+
 def seen(state_path: str, issue: str, since: str, until: str, seconds: int) -> bool:
     path = _expand(state_path)
     data = _load(path)
     eid = _entry_id(issue, since, until, seconds)
-    return any(e.get("id") == eid for e in data.get("entries", []))
+    now = time.time()
+    return any(e.get("id") == eid and _live(e, now) for e in data.get("entries", []) if isinstance(e, dict))
+
+
+def reserve(state_path: str, issue: str, since: str, until: str, seconds: int) -> bool:
+    """Atomically claim the upload of (issue, window, seconds); False if recorded or claimed already.
+
+    The check and the claim happen under one state lock, so of two concurrent syncs
+    only one posts. Finish with `record` (which replaces the claim) or `release`.
+    """
+    eid = _entry_id(issue, since, until, seconds)
 
+    def _claim(data: Dict[str, Any]) -> bool:
+        now = time.time()
+        entries = data.setdefault("entries", [])
+        if any(e.get("id") == eid and _live(e, now) for e in entries if isinstance(e, dict)):
+            return False
+        entries[:] = [e for e in entries if not (isinstance(e, dict) and e.get("id") == eid and e.get("reserved"))]
+        entries.append({"id": eid, "issue": issue, "since": since, "until": until, "seconds": int(seconds),
+                        "reserved": os.getpid(), "reserved_at": now})
+        return True
 
-def record(state_path: str, issue: str, since: str, until: str, seconds: int, worklog_id: str | None = None) -> None:
+    return _update(state_path, _claim)
+
+
+def release(state_path: str, issue: str, since: str, until: str, seconds: int) -> None:
+    """Drop a `reserve` claim whose upload failed, so a later sync can retry it."""
+    eid = _entry_id(issue, since, until, seconds)
+
+    def _drop(data: Dict[str, Any]) -> None:
+        entries = data.setdefault("entries", [])
+        entries[:] = [e for e in entries if not (isinstance(e, dict) and e.get("id") == eid and e.get("reserved"))]
+
+    _update(state_path, _drop)
+
+
+def record(state_path: str, issue: str, since: str, until: str, seconds: int, worklog_id: str | None = None,
+           started: str | None = None) -> None:
+    eid = _entry_id(issue, since, until, seconds)
+
+    def _append(data: Dict[str, Any]) -> None:
+        entries = data.setdefault("entries", [])
+        entries[:] = [e for e in entries if not (isinstance(e, dict) and e.get("id") == eid and e.get("reserved"))]
+        if any(e.get("id") == eid and e.get("worklog_id") == worklog_id for e in entries if isinstance(e, dict)):
+            return
+        entries.append({
+            "id": eid,
+            "issue": issue,
+            "since": since,
+            "until": until,
+            "seconds": int(seconds),
+            "worklog_id": worklog_id,
+            "started": started,
+        })
+
+    _update(state_path, _append)
+
+
+def find_day_worklog(state_path: str, issue: str, day: str) -> Optional[str]:
+    """Return the id of the latest worklog recorded for issue whose `started` falls on day (YYYY-MM-DD)."""
     path = _expand(state_path)
     data = _load(path)
-    eid = _entry_id(issue, since, until, seconds)
-    data.setdefault("entries", []).append({
-        "id": eid,
-        "issue": issue,
-        "since": since,
-        "until": until,
-        "seconds": int(seconds),
-        "worklog_id": worklog_id,
-    })
-    _save(path, data)
+    for e in reversed(data.get("entries", []) or []):
+        if not isinstance(e, dict) or e.get("issue") != issue:
+            continue
+        st = e.get("started")
+        if e.get("worklog_id") and isinstance(st, str) and st[:10] == day:
+            return str(e["worklog_id"])
+    return None
 
 
 def get_last_sync(state_path: str, project_path: str) -> Optional[str]:
@@ -78,7 +185,7 @@ def get_last_sync(state_path: str, project_path: str) -> Optional[str]:
     # Fallback: compute max 'until' from entries
     best: Optional[str] = None
     for e in data.get("entries", []) or []:
-        if not isinstance(e, dict):
+        if not isinstance(e, dict) or e.get("reserved"):
             continue
         u = e.get("until")
         if isinstance(u, str) and u:
@@ -87,11 +194,22 @@ def get_last_sync(state_path: str, project_path: str) -> Optional[str]:
     return best
 
 
+def _later(a: str, b: str) -> str:
+    try:
+        return a if dt.datetime.fromisoformat(a) >= dt.datetime.fromisoformat(b) else b
+    except Exception:  # unparsable, or naive mixed with aware
+        return max(a, b)
+
+
 def set_last_sync(state_path: str, project_path: str, until: str) -> None:
-    """Persist the last sync upper bound for the given project path."""
-    path = _expand(state_path)
-    data = _load(path)
-    if not isinstance(data.get("last_sync"), dict):
-        data["last_sync"] = {}
-    data["last_sync"][str(project_path)] = str(until)
-    _save(path, data)
+    """Persist the last sync upper bound for the given project path.
+
+    Never moves it backwards: a slower sync of an older window finishing last keeps the newer bound.
+    """
+    def _set(data: Dict[str, Any]) -> None:
+        if not isinstance(data.get("last_sync"), dict):
+            data["last_sync"] = {}
+        prev = data["last_sync"].get(str(project_path))
+        data["last_sync"][str(project_path)] = _later(prev, str(until)) if isinstance(prev, str) and prev else str(until)
+
+    _update(state_path, _set)
@@ -0,0 +1,363 @@
+"""Optional team aggregation service.
+
+One `skuld serve` process sits between many engineers' skuld runs and the
+Atlassian sites it is configured for. It dedupes issue metadata lookups
+across users (TTL cache plus single-flight for keys already being fetched,
+scoped to the Jira credential that fetched them) and paces every outbound
+Jira request through one per-host rate-limit budget. Every endpoint except
+`/v1/health` requires the caller's Jira credentials (Basic auth), which are
+checked against `/rest/api/3/myself` on an allowed site before anything is
+served or relayed. Clients talk to it with plain JSON over HTTP, so any
+stand-in server speaking the same protocol can replace it in tests.
+"""
+import base64
+import datetime as dt
+import hashlib
+import json
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request
+
+from .http import urlopen
+from .jira import _auth_header, add_worklog as jira_add_worklog, get_myself, search_issues_noassignee
+
+# How long a verified client credential is trusted before /myself is asked again
+AUTH_TTL = 600.0
+# How long a key Jira rejected is left out of searches (same as the client's own negative cache)
+BAD_KEY_TTL = 86400.0
+
+
+def _site(url: Any) -> str:
+    return str(url or "").strip().rstrip("/").lower()
+
+
+def _identity(site: str, email: str, api_token: str) -> str:
+    """Opaque cache scope for one Jira credential on one site (never the token itself)."""
+    return hashlib.sha256(f"{site}\0{email}\0{api_token}".encode("utf-8")).hexdigest()[:24]
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `acquire` blocks until a request may be sent."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(0.1, float(rate))
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                wait = self._paused_until - now
+                if wait <= 0 and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                if wait <= 0:
+                    wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for a while (e.g. after a 429 Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+
+
+class TeamHub:
+    """Shared state behind the team server: issue cache, rate budgets, submitted previews."""
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, ttl: float = 60.0,
+                 service_email: Optional[str] = None, service_token: Optional[str] = None,
+                 sites: Iterable[str] = ()):
+        self.rate = rate
+        self.burst = burst
+        self.ttl = float(ttl)
+        self.service_email = service_email or None
+        self.service_token = service_token or None
+        self.sites = {_site(s) for s in sites if _site(s)}
+        self._lock = threading.Lock()
+        # Keyed by (site, credential identity, issue key): what one account may see is not shared with another
+        self._issues: Dict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[Tuple[str, str, str], threading.Event] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._previews: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        # {(site, credential identity): {key: monotonic stamp}}: a key one account may not see can be fine for another
+        self._bad_keys: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._verified: Dict[str, float] = {}
+        self.stats = {"lookups": 0, "keys_requested": 0, "keys_fetched": 0, "searches": 0, "worklogs": 0,
+                      "auth_checks": 0}
+
+    def allowed(self, site: str) -> bool:
+        return _site(site) in self.sites
+
+    def authenticate(self, site: str, email: str, api_token: str) -> bool:
+        """Whether (email, api_token) is a working credential on an allowed site."""
+        site = _site(site)
+        if not (email and api_token) or site not in self.sites:
+            return False
+        ident = _identity(site, email, api_token)
+        with self._lock:
+            if time.monotonic() - self._verified.get(ident, float("-inf")) < AUTH_TTL:
+                return True
+            self.stats["auth_checks"] += 1
+        me, err = get_myself(site, email, api_token)
+        if err or not me or not me.get("accountId"):
+            return False
+        with self._lock:
+            self._verified[ident] = time.monotonic()
+        return True
+
+    def bucket(self, site: str) -> TokenBucket:
+        """The rate budget for a site URL or bare host (both map to the same bucket)."""
+        host = urlparse(site).netloc or site
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return b
+
+    def throttle(self, host: str) -> None:
+        """`http.use_throttle` hook: every outbound request waits for its host's budget."""
+        self.bucket(host).acquire()
+
+    def lookup(self, site: str, email: str, api_token: str, keys: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """Return issue fields for keys, fetching only those not cached or in flight elsewhere.
+
+        Jira is asked with the service account when one is configured, else with
+        the caller's own credential; cache entries are shared only between callers
+        that would have used the same credential.
+        """
+        site = _site(site)
+        jira_email, jira_token = (self.service_email, self.service_token) if self.service_token else (email, api_token)
+        scope = (site, _identity(site, jira_email or "", jira_token or ""))
+        now = time.monotonic()
+        fetch: List[str] = []
+        wait: List[threading.Event] = []
+        with self._lock:
+            self.stats["lookups"] += 1
+            self.stats["keys_requested"] += len(keys)
+            for k in keys:
+                hit = self._issues.get(scope + (k,))
+                if hit and now - hit[0] < self.ttl:
+                    continue
+                ev = self._inflight.get(scope + (k,))
+                if ev is not None:
+                    wait.append(ev)
+                    continue
+                self._inflight[scope + (k,)] = threading.Event()
+                fetch.append(k)
+        meta: Dict[str, Any] = {"chunks": []}
+        if fetch:
+            try:
+                with self._lock:
+                    stamps = self._bad_keys.setdefault(scope, {})
+                    for k in [k for k, t in stamps.items() if now - t >= BAD_KEY_TTL]:
+                        del stamps[k]
+                    bad = set(stamps)
+                results, meta = search_issues_noassignee(site, jira_email, jira_token, fetch, bad_keys=bad)
+                stamp = time.monotonic()
+                with self._lock:
+                    stamps = self._bad_keys.setdefault(scope, {})
+                    for k in (meta or {}).get("bad_keys") or []:
+                        stamps.setdefault(k, stamp)
+                    self.stats["searches"] += 1
+                    self.stats["keys_fetched"] += len(fetch)
+                    for k, v in (results or {}).items():
+                        self._issues[scope + (k,)] = (stamp, v)
+            finally:
+                with self._lock:
+                    for k in fetch:
+                        ev = self._inflight.pop(scope + (k,), None)
+                        if ev is not None:
+                            ev.set()
+        for ev in wait:
+            ev.wait(timeout=30)
+        with self._lock:
+            out = {k: self._issues[scope + (k,)][1] for k in keys if scope + (k,) in self._issues}
+        return out, meta
+
+    def post_worklog(self, site: str, email: str, api_token: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Post one worklog as the caller (paced by the site's budget), retrying once after a 429."""
+        site = _site(site)
+        try:
+            started = dt.datetime.fromisoformat(str(item.get("started")))
+        except Exception:
+            started = dt.datetime.now().astimezone()
+        key = str(item.get("key"))
+        for _attempt in range(2):
+            data, err = jira_add_worklog(site, email, api_token, key, int(item.get("seconds") or 0),
+                                         started, str(item.get("comment") or ""))
+            if err and "429" in err:
+                self.bucket(site).pause(5.0)
+                continue
+            break
+        with self._lock:
+            self.stats["worklogs"] += 1
+            # The issue's `updated` stamp just changed for everyone; clients key worklog caches on it
+            for ck in [ck for ck in self._issues if ck[0] == site and ck[2] == key]:
+                self._issues.pop(ck, None)
+        return {"key": item.get("key"), "data": data, "error": err}
+
+    def submit_preview(self, site: str, user: str, project: str, preview: Dict[str, Any]) -> None:
+        with self._lock:
+            self._previews[(_site(site), user, project)] = {"received": time.time(), "preview": preview}
+
+    def aggregate(self, site: str) -> Dict[str, Any]:
+        """Sum submitted preview seconds/deltas per issue across users of one site."""
+        site = _site(site)
+        issues: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            items = [((u, p), e) for (s, u, p), e in self._previews.items() if s == site]
+            stats = dict(self.stats)
+        for (user, _project), entry in items:
+            for it in (entry["preview"].get("issues") or []):
+                agg = issues.setdefault(it.get("key"), {"seconds": 0, "delta": 0, "users": []})
+                agg["seconds"] += int(it.get("seconds") or 0)
+                agg["delta"] += int(it.get("delta") or 0)
+                if user not in agg["users"]:
+                    agg["users"].append(user)
+        return {"clients": len({u for (u, _p), _e in items}), "issues": issues, "stats": stats}
+
+
+def _credentials(header: Optional[str]) -> Tuple[str, str]:
+    """Decode a Basic Authorization header into (email, api_token)."""
+    if not header or not header.startswith("Basic "):
+        return "", ""
+    try:
+        raw = base64.b64decode(header[6:]).decode("utf-8")
+    except Exception:
+        return "", ""
+    email, _, token = raw.partition(":")
+    return email, token
+
+
+def make_server(hub: TeamHub, host: str = "127.0.0.1", port: int = 8787,
+                certfile: Optional[str] = None, keyfile: Optional[str] = None) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # keep the console quiet
+            pass
+
+        def _reply(self, code: int, obj: Any) -> None:
+            body = json.dumps(obj, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if code == 401:
+                self.send_header("WWW-Authenticate", 'Basic realm="skuld"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self) -> Dict[str, Any]:
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                data = json.loads(self.rfile.read(n) or b"{}") if n else {}
+            except Exception:
+                data = {}
+            return data if isinstance(data, dict) else {}
+
+        def _authed(self, site: str) -> Optional[Tuple[str, str]]:
+            """Caller's (email, token) if `site` is allowed and the credential works there; else reply and None."""
+            if not hub.allowed(site):
+                self._reply(403, {"error": "site_not_allowed"})
+                return None
+            email, token = _credentials(self.headers.get("Authorization"))
+            if not hub.authenticate(site, email, token):
+                self._reply(401, {"error": "unauthorized"})
+                return None
+            return email, token
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            path = url.path.rstrip("/")
+            if path == "/v1/health":
+                return self._reply(200, {"ok": True})
+            if path == "/v1/previews":
+                site = (parse_qs(url.query).get("site") or [""])[0]
+                if not site and len(hub.sites) == 1:
+                    site = next(iter(hub.sites))
+                if self._authed(site) is None:
+                    return None
+                return self._reply(200, hub.aggregate(site))
+            return self._reply(404, {"error": "not_found"})
+
+        def do_POST(self):
+            body = self._json()
+            path = self.path.rstrip("/")
+            if path not in ("/v1/issues", "/v1/worklogs", "/v1/previews"):
+                return self._reply(404, {"error": "not_found"})
+            site = str(body.get("site") or "")
+            creds = self._authed(site)
+            if creds is None:
+                return None
+            email, token = creds
+            if path == "/v1/issues":
+                keys = [str(k) for k in (body.get("keys") or []) if k]
+                results, meta = hub.lookup(site, email, token, keys)
+                return self._reply(200, {"issues": results, "meta": meta})
+            if path == "/v1/worklogs":
+                items = body.get("worklogs") or []
+                return self._reply(200, {"results": [hub.post_worklog(site, email, token, it) for it in items if isinstance(it, dict)]})
+            hub.submit_preview(site, email, str(body.get("project") or ""),
+                               body.get("preview") if isinstance(body.get("preview"), dict) else {})
+            return self._reply(202, {"ok": True})
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    if certfile:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(certfile, keyfile or None)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+    return server
+
+
+def _call(server: str, path: str, body: Dict[str, Any], email: str, api_token: str, timeout: int) -> Tuple[Any, Optional[str]]:
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+    if email and api_token:
+        headers["Authorization"] = _auth_header(email, api_token)
+    req = Request(f"{server.rstrip('/')}{path}", data=json.dumps(body, default=str).encode("utf-8"), headers=headers, method="POST")
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return json.load(resp), None
+    except HTTPError as e:
+        return None, f"{e}"
+    except Exception as e:
+        return None, str(e)
+
+
+def search_issues(server: str, site: str, email: str, api_token: str, keys: List[str], timeout: int = 30):
+    """Team-server equivalent of jira.search_issues_noassignee: returns (results, meta)."""
+    data, err = _call(server, "/v1/issues", {"site": site, "keys": list(keys)}, email, api_token, timeout)
+    if err or not isinstance(data, dict):
+        return {}, {"chunks": [{"keys": list(keys), "status": None, "error": err or "bad_response"}]}
+    return data.get("issues") or {}, data.get("meta") or {"chunks": []}
+
+
+def add_worklog(server: str, site: str, email: str, api_token: str, key: str, seconds: int, started: dt.datetime,
+                comment: str, timeout: int = 60) -> Tuple[Optional[dict], Optional[str]]:
+    """Team-server equivalent of jira.add_worklog; the server posts under the site's shared budget."""
+    item = {"key": key, "seconds": int(seconds), "started": started.isoformat(), "comment": comment}
+    data, err = _call(server, "/v1/worklogs", {"site": site, "worklogs": [item]}, email, api_token, timeout)
+    if err:
+        return None, err
+    results = (data or {}).get("results") or []
+    if not results:
+        return None, "empty_response"
+    return results[0].get("data"), results[0].get("error")
+
+
+def submit_preview(server: str, site: str, email: str, api_token: str, project: str, preview: Dict[str, Any],
+                   timeout: int = 5) -> Optional[str]:
+    """Share a preview with the team server (best-effort); returns an error string on failure."""
+    _data, err = _call(server, "/v1/previews", {"site": site, "project": project, "preview": preview}, email, api_token, timeout)
+    return err
@@ -1,11 +1,14 @@
+import hashlib
 import json
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 import configparser
 from urllib.parse import urlencode
-from urllib.request import urlopen, Request
+from urllib.request import Request
 import ssl
 
+from .http import urlopen
+from .intervals import Durations, branch_seconds
 
 
 def _from_summary_record(rec: Dict[str, Any]) -> float:
@@ -146,84 +149,337 @@ def fetch_summary(api_key: str, since_iso: str, until_iso: str, project: Optiona
     return out
 
 
-def fetch_durations_summary(api_key: str, since_iso: str, until_iso: str, project: Optional[str] = None, timeout: int = 10) -> Dict[str, Any]:
+def _fetch_duration_records(api_key: str, day: str, project: Optional[str], timeout: int, ctx) -> Optional[list]:
+    """Fetch one day of durations as compact [time, duration, branch] rows; None on error."""
+    params = {
+        "date": day,
+        "api_key": api_key,
+    }
+    if project:
+        params["project"] = project
+    url = f"https://wakatime.com/api/v1/users/current/durations?{urlencode(params)}"
+    try:
+        req = Request(url)
+        with urlopen(req, timeout=timeout, context=ctx) as resp:
+            data = json.load(resp)
+    except Exception:
+        return None
+    # Expect list or dict with "data" list
+    records = []
+    if isinstance(data, list):
+        records = data
+    elif isinstance(data, dict) and isinstance(data.get("data"), list):
+        records = data.get("data") or []
+    rows = []
+    for rec in records:
+        try:
+            dur = float(rec.get("duration") or rec.get("seconds") or 0.0)
+        except Exception:
+            dur = 0.0
+        # rec["time"] is a unix epoch seconds, rec["branch"] may be present
+        try:
+            ts = float(rec.get("time") or 0.0)
+        except Exception:
+            ts = 0.0
+        rows.append([ts, dur, rec.get("branch") or ""])
+    return rows
+
+
+# Longest date range requested from the Summaries API in one call
+SUMMARY_MAX_DAYS = 90
+
+
+def _fetch_summary_days(api_key: str, start: str, end: str, project: Optional[str], timeout: int,
+                        ctx) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Fetch Summaries for [start, end] as {date: {"total", "branches"}}; None on error.
+
+    Without a `project` filter each day also carries "projects" ({name: seconds}).
     """
-    Aggregate per-branch seconds using WakaTime Durations API for the window [since, until].
-    Returns { "total_seconds": float, "branches": { name: seconds } }
-    Falls back to empty values on any error.
+    params = {
+        "start": start,
+        "end": end,
+        "api_key": api_key,
+    }
+    if project:
+        params["project"] = project
+    url = f"https://wakatime.com/api/v1/users/current/summaries?{urlencode(params)}"
+    try:
+        req = Request(url)
+        with urlopen(req, timeout=timeout, context=ctx) as resp:
+            data = json.load(resp)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("data"), list):
+        return None
+    days: Dict[str, Dict[str, Any]] = {}
+    for rec in data["data"]:
+        if not isinstance(rec, dict):
+            continue
+        date = ((rec.get("range") or {}).get("date") or "")[:10]
+        if not date:
+            continue
+        branches: Dict[str, float] = {}
+        for b in rec.get("branches") or []:
+            try:
+                if b.get("name"):
+                    branches[b["name"]] = branches.get(b["name"], 0.0) + float(b.get("total_seconds") or 0.0)
+            except Exception:
+                pass
+        days[date] = {"total": _from_summary_record(rec), "branches": branches}
+        if not project:
+            # Unfiltered summaries also break the day down by project
+            projects: Dict[str, float] = {}
+            for p in rec.get("projects") or []:
+                try:
+                    if p.get("name"):
+                        projects[p["name"]] = projects.get(p["name"], 0.0) + float(p.get("total_seconds") or 0.0)
+                except Exception:
+                    pass
+            days[date]["projects"] = projects
+    return days
+
+
+def plan_requests(since_dt, until_dt, cached: Dict[str, bool], settled_before, now=None, precise: bool = True) -> list:
+    """Cheapest way to cover [since_dt, until_dt] day by day.
+
+    `cached` maps settled dates (YYYY-MM-DD) in the day cache to whether the entry holds
+    per-duration rows (sliceable) rather than day totals.
+
+    Returns steps ("cache", day, day), ("durations", day, day) or ("summaries", first, last):
+    settled days come from the cache; days the window cuts through need Durations when
+    `precise` (they are the only source that can be sliced by time); every other day is a
+    whole day, and consecutive ones share one Summaries request (up to SUMMARY_MAX_DAYS).
+    A window reaching (about) `now` does not cut its last day: there is no later data yet.
     """
-    out: Dict[str, Any] = {"total_seconds": 0.0, "branches": {}}
+    import datetime as dt
+    now = now or dt.datetime.now(tz=until_dt.tzinfo)
+    # A window ending (about) now is not cut: nothing after it has been recorded yet
+    live_after = now - dt.timedelta(minutes=5)
+    steps: list = []
+    run: list = []
+
+    def _flush() -> None:
+        if run:
+            steps.append(("summaries", run[0], run[-1]))
+            run.clear()
+
+    day = since_dt.date()
+    while day <= until_dt.date():
+        start = dt.datetime.combine(day, dt.time(), tzinfo=since_dt.tzinfo)
+        end = start + dt.timedelta(days=1)
+        clipped = since_dt > start or (until_dt < end and until_dt < live_after)
+        key = day.isoformat()
+        if day < settled_before and key in cached and (cached[key] or not (clipped and precise)):
+            _flush()
+            steps.append(("cache", day, day))
+        elif clipped and precise:
+            _flush()
+            steps.append(("durations", day, day))
+        else:
+            run.append(day)
+            if len(run) >= SUMMARY_MAX_DAYS:
+                _flush()
+        day = day + dt.timedelta(days=1)
+    _flush()
+    return steps
+
+
+def fetch_branch_totals(api_key: str, since_iso: str, until_iso: str, project: Optional[str] = None, timeout: int = 10,
+                        day_cache: Optional[Dict[str, Any]] = None, precise: bool = True) -> Dict[str, Any]:
+    """
+    Per-branch seconds for [since, until] using the cheapest mix of endpoints (see
+    `plan_requests`). Returns {"total_seconds", "branches": {name: seconds}, "day_hashes"},
+    plus "plan" (the steps taken) and "requests" (API calls made). With `precise=False` edge days are counted
+    whole, e.g. for listing branch totals over the last N days. "complete" is False when a
+    request failed, and "error" names the days that are missing from the totals.
+
+    `day_cache` ({date: {"hash", "rows"}} or {date: {"hash", "total", "branches"}}) serves
+    and collects settled days (before yesterday).
+    """
+    out: Dict[str, Any] = {"total_seconds": 0.0, "branches": {}, "day_hashes": {}, "plan": [], "requests": 0,
+                           "complete": True, "error": None}
     if not api_key:
         return out
-    # Normalize window bounds
     try:
         import datetime as dt
         since_dt = dt.datetime.fromisoformat(since_iso)
         until_dt = dt.datetime.fromisoformat(until_iso)
     except Exception:
+        out.update(complete=False, error=f"invalid window {since_iso} → {until_iso}")
         return out
-    # Ensure timezone-aware for comparisons; assume local if missing
     local_tz = dt.datetime.now().astimezone().tzinfo
     if since_dt.tzinfo is None:
         since_dt = since_dt.replace(tzinfo=local_tz)
     if until_dt.tzinfo is None:
         until_dt = until_dt.replace(tzinfo=local_tz)
-    # Convert to POSIX for filtering
     since_ts = since_dt.timestamp()
     until_ts = until_dt.timestamp()
+    settled_before = dt.date.today() - dt.timedelta(days=1)
+    cached = {k: isinstance(v, dict) and isinstance(v.get("rows"), list) for k, v in (day_cache or {}).items()
+              if isinstance(v, dict)}
+    steps = plan_requests(since_dt, until_dt, cached, settled_before, precise=precise)
 
     total = 0.0
     branches: Dict[str, float] = {}
-
-    # Iterate per-day to query durations (API is day-scoped)
-    day = since_dt.date()
-    end_day = until_dt.date()
+    day_hashes: Dict[str, str] = {}
     ctx = ssl.create_default_context()
-    while day <= end_day:
-        params = {
-            "date": day.isoformat(),
-            "api_key": api_key,
-        }
-        if project:
-            params["project"] = project
-        url = f"https://wakatime.com/api/v1/users/current/durations?{urlencode(params)}"
-        try:
-            req = Request(url)
-            with urlopen(req, timeout=timeout, context=ctx) as resp:
-                data = json.load(resp)
-        except Exception:
-            day = day.fromordinal(day.toordinal() + 1)
+
+    # Duration rows are clipped to the window and merged at the end; `whole` holds rows
+    # of edge days counted in full (precise=False).
+    exact, whole = Durations(), Durations()
+    missing: list = []
+
+    def _add_day(key: str, entry: Dict[str, Any], clip: bool) -> None:
+        nonlocal total
+        if isinstance(entry.get("rows"), list):
+            (exact if clip else whole).extend(entry["rows"])
+        else:
+            total += float(entry.get("total") or 0.0)
+            for bname, secs in (entry.get("branches") or {}).items():
+                branches[bname] = branches.get(bname, 0.0) + float(secs or 0.0)
+        day_hashes[key] = entry.get("hash") or ""
+
+    def _keep(day, key: str, entry: Dict[str, Any]) -> None:
+        entry["hash"] = hashlib.sha256(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        if day_cache is not None and day < settled_before:
+            day_cache[key] = entry
+
+    for kind, first, last in steps:
+        key = first.isoformat()
+        if kind == "cache":
+            _add_day(key, day_cache[key], clip=precise)
             continue
-        # Expect list or dict with "data" list
-        records = []
-        if isinstance(data, list):
-            records = data
-        elif isinstance(data, dict) and isinstance(data.get("data"), list):
-            records = data.get("data") or []
-        for rec in records:
-            try:
-                dur = float(rec.get("duration") or rec.get("seconds") or 0.0)
-            except Exception:
-                dur = 0.0
-            if dur <= 0:
+        out["requests"] += 1
+        if kind == "durations":
+            rows = _fetch_duration_records(api_key, key, project, timeout, ctx)
+            if rows is None:
+                missing.append(key)
                 continue
-            # rec["time"] is a unix epoch seconds, rec["branch"] may be present
+            entry = {"rows": rows}
+            _keep(first, key, entry)
+            _add_day(key, entry, clip=True)
+            continue
+        days = _fetch_summary_days(api_key, key, last.isoformat(), project, timeout, ctx)
+        if days is None:
+            missing.append(key if first == last else f"{key}..{last.isoformat()}")
+            continue
+        for dkey, entry in sorted(days.items()):
             try:
-                ts = float(rec.get("time") or 0.0)
+                d = dt.date.fromisoformat(dkey)
             except Exception:
-                ts = 0.0
-            if ts <= 0.0 or ts < since_ts or ts > until_ts:
                 continue
-            bname = rec.get("branch") or ""
-            total += dur
-            if bname:
-                branches[bname] = branches.get(bname, 0.0) + dur
-        day = day.fromordinal(day.toordinal() + 1)
+            _keep(d, dkey, entry)
+            _add_day(dkey, entry, clip=False)
+    for cols, lo, hi in ((exact, since_ts, until_ts), (whole, float("-inf"), float("inf"))):
+        secs, by_branch = branch_seconds(cols, lo, hi)
+        total += secs
+        for bname, bsecs in by_branch.items():
+            branches[bname] = branches.get(bname, 0.0) + bsecs
     out["total_seconds"] = float(total)
     out["branches"] = branches
+    out["day_hashes"] = day_hashes
+    out["plan"] = [[kind, first.isoformat(), last.isoformat()] for kind, first, last in steps]
+    if missing:
+        out["complete"] = False
+        out["error"] = f"WakaTime requests failed for {', '.join(missing)}"
     return out
 
 
+def _day_branches(entry: Dict[str, Any]) -> Dict[str, float]:
+    """Whole-day {branch: seconds} from a day-cache entry (rows or summary totals)."""
+    if isinstance(entry.get("rows"), list):
+        cols = Durations(entry["rows"])
+        return branch_seconds(cols)[1]
+    return {b: float(v or 0.0) for b, v in (entry.get("branches") or {}).items()}
+
+
+def fetch_day_branches(api_key: str, first, last, project: Optional[str] = None, timeout: int = 10,
+                       day_cache: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Dict[str, float]], int, bool]:
+    """
+    Per-day branch seconds for the whole days `first`..`last` (dates), as
+    ({date: {branch: seconds}}, requests made, complete). Cached settled days are reused
+    and days are otherwise fetched through ranged Summaries; `complete` is False when a
+    request failed, in which case the returned days have gaps.
+    """
+    import datetime as dt
+    out: Dict[str, Dict[str, float]] = {}
+    if not api_key or first > last:
+        return out, 0, True
+    tz = dt.datetime.now().astimezone().tzinfo
+    since_dt = dt.datetime.combine(first, dt.time(), tzinfo=tz)
+    until_dt = dt.datetime.combine(last, dt.time.max, tzinfo=tz)
+    settled_before = dt.date.today() - dt.timedelta(days=1)
+    cached = {k: isinstance(v, dict) and isinstance(v.get("rows"), list) for k, v in (day_cache or {}).items()
+              if isinstance(v, dict)}
+    requests = 0
+    complete = True
+    ctx = ssl.create_default_context()
+    for kind, start, end in plan_requests(since_dt, until_dt, cached, settled_before, precise=False):
+        key = start.isoformat()
+        if kind == "cache":
+            out[key] = _day_branches(day_cache[key])
+            continue
+        requests += 1
+        days = _fetch_summary_days(api_key, key, end.isoformat(), project, timeout, ctx)
+        if days is None:
+            complete = False
+            continue
+        for dkey, entry in days.items():
+            try:
+                d = dt.date.fromisoformat(dkey)
+            except Exception:
+                continue
+            if day_cache is not None and d < settled_before:
+                entry["hash"] = hashlib.sha256(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+                day_cache[dkey] = entry
+            out[dkey] = _day_branches(entry)
+    return out, requests, complete
+
+
+def fetch_day_projects(api_key: str, first, last, timeout: int = 10) -> Tuple[Dict[str, Dict[str, float]], int, bool]:
+    """
+    Per-day seconds of every WakaTime project for the days `first`..`last` (dates), as
+    ({date: {project: seconds}}, requests made, complete); ranged Summaries, up to
+    SUMMARY_MAX_DAYS per request.
+    """
+    import datetime as dt
+    out: Dict[str, Dict[str, float]] = {}
+    requests = 0
+    complete = True
+    if not api_key:
+        return out, requests, complete
+    ctx = ssl.create_default_context()
+    start = first
+    while start <= last:
+        end = min(last, start + dt.timedelta(days=SUMMARY_MAX_DAYS - 1))
+        requests += 1
+        days = _fetch_summary_days(api_key, start.isoformat(), end.isoformat(), None, timeout, ctx)
+        if days is None:
+            complete = False
+        else:
+            for dkey, entry in days.items():
+                out[dkey] = entry.get("projects") or {}
+        start = end + dt.timedelta(days=1)
+    return out, requests, complete
+
+
+def fetch_project_names(api_key: str, timeout: int = 10) -> Optional[list]:
+    """Names of all the user's WakaTime projects (including ones without recent time); None on error."""
+    if not api_key:
+        return None
+    url = f"https://wakatime.com/api/v1/users/current/projects?{urlencode({'api_key': api_key})}"
+    try:
+        req = Request(url)
+        with urlopen(req, timeout=timeout, context=ssl.create_default_context()) as resp:
+            data = json.load(resp)
+    except Exception:
+        return None
+    records = data.get("data") if isinstance(data, dict) else None
+    if not isinstance(records, list):
+        return None
+    return [r["name"] for r in records if isinstance(r, dict) and r.get("name")]
+
+
 def discover_api_key() -> Optional[str]:
     """Attempt to locate a local WakaTime API key from ~/.wakatime.cfg."""
     cfg_path = Path("~/.wakatime.cfg").expanduser()